@@ -0,0 +1,73 @@
+"""
+Bounded-concurrency dispatch of Gemini analyses.
+
+Every (resume, action) pair becomes one request. Requests run concurrently on
+an asyncio event loop, limited by a concurrency cap; the shared token bucket in
+``llm_integration`` keeps them within the per-minute request budget, and each
+request succeeds or fails on its own.
+"""
+import asyncio
+import os
+
+from llm_integration import get_gemini_response
+
+# Maximum number of model requests in flight at once
+ANALYSIS_CONCURRENCY = int(os.getenv("ATS_ANALYSIS_CONCURRENCY", "4"))
+
+
+async def _analyze_one(semaphore, request, input_text, analyze_fn, is_cancelled, on_partial):
+    file_name, action, pdf_content, prompt = request
+    async with semaphore:
+        if is_cancelled and is_cancelled():
+            return file_name, action, None, "Cancelled"
+        kwargs = {}
+        if on_partial:
+            kwargs["on_partial"] = lambda text: on_partial(file_name, action, text)
+        try:
+            response = await asyncio.to_thread(analyze_fn, input_text, pdf_content, prompt, **kwargs)
+            return file_name, action, response, None
+        except Exception as e:
+            return file_name, action, None, str(e)
+
+
+async def _dispatch(requests, input_text, concurrency, on_result, analyze_fn, is_cancelled, on_partial):
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    tasks = [
+        asyncio.create_task(_analyze_one(semaphore, request, input_text, analyze_fn, is_cancelled, on_partial))
+        for request in requests
+    ]
+
+    results = {}
+    for completed in asyncio.as_completed(tasks):
+        file_name, action, response, error = await completed
+        results[(file_name, action)] = (response, error)
+        if on_result:
+            on_result(file_name, action, response, error)
+    return results
+
+
+def dispatch_analyses(requests, input_text, concurrency=ANALYSIS_CONCURRENCY, on_result=None,
+                      analyze_fn=get_gemini_response, is_cancelled=None, on_partial=None):
+    """
+    Runs a batch of analyses concurrently and reports each one as it completes.
+
+    Args:
+        requests (list): (file_name, action, pdf_content, prompt) tuples
+        input_text (str): The job description
+        concurrency (int): Maximum number of requests in flight
+        on_result (callable): Optional ``on_result(file_name, action, response, error)``
+            callback, invoked on the calling thread as each request finishes
+        analyze_fn (callable): ``analyze_fn(input_text, pdf_content, prompt)`` used for
+            each request (e.g. ``get_combined_analysis`` for single-call analysis)
+        is_cancelled (callable): Optional check; requests not yet started when it
+            returns True complete immediately with a "Cancelled" error
+        on_partial (callable): Optional ``on_partial(file_name, action, text_so_far)``
+            callback for streamed responses; passed to ``analyze_fn`` as its
+            ``on_partial`` keyword and invoked from worker threads
+
+    Returns:
+        dict: {(file_name, action): (response, error)}
+    """
+    if not requests:
+        return {}
+    return asyncio.run(_dispatch(requests, input_text, concurrency, on_result, analyze_fn, is_cancelled, on_partial))
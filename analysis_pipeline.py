@@ -0,0 +1,134 @@
+"""
+Resume analysis pipeline run as a background job.
+
+Stages: optional local pre-scoring from the PDF text layers, parallel
+ingestion (rasterization) of the new PDFs that are still in the running, then
+concurrent model analyses. Progress, per-resume results and intermediate
+artifacts are reported through a ``job_queue.JobContext`` so the UI can poll
+them while the batch runs.
+"""
+from analysis_dispatcher import dispatch_analyses
+from ingestion import extract_texts, ingest_pdfs
+from llm_integration import get_gemini_response, get_combined_analysis
+from prescorer import score_resumes, select_top_candidates
+from prompts import get_prompts, get_combined_prompt, split_combined_analysis
+from session_store import CompactPDFData
+
+# Artifact keys
+PDF_ARTIFACT_PREFIX = "pdf:"
+PRESCORES_ARTIFACT = "prescores"
+
+
+def run_analysis_batch(ctx, named_files, input_text, user_mode, selected_action,
+                       combined_mode=False, prescore_top_k=None, known_resumes=None, stream=False,
+                       artifact_owner=None, extraction_mode=None):
+    """
+    Ingests and analyzes a batch of resumes.
+
+    Args:
+        ctx (JobContext): Job handle for progress, results and artifacts
+        named_files (list): (file_name, pdf_bytes) tuples that still need ingestion
+        input_text (str): The job description
+        user_mode (str): "Recruiter" or "Student"
+        selected_action (str): Action to run when not in combined mode
+        combined_mode (bool): Run every action of the mode in one structured request
+        prescore_top_k (int): When set, only the top K pre-scored resumes are analyzed
+        known_resumes (dict): {file_name: {"content", "text", "done_actions"}} for resumes
+            already ingested by the session; an optional "pdf_bytes" lets pre-scoring read
+            the text layer of resumes ingested without one (image mode)
+        stream (bool): Stream responses and publish the partial text through
+            ``ctx.set_partial`` (ignored in combined mode, which needs the whole JSON)
+        artifact_owner (str): Blob store owner charged for the prepared PDFs (the
+            submitting session); defaults to the job itself
+        extraction_mode (str): "auto", "text" or "image", passed through to ingestion
+            (defaults to ATS_PDF_EXTRACTION_MODE)
+
+    Results are reported as ``ctx.add_result(file_name, action, response, error)``;
+    an empty action marks a file-level (ingestion) error. Prepared PDFs are stored
+    as ``pdf:<file_name>`` artifacts in their compact session form
+    (``session_store.CompactPDFData``), so they count against the memory budgets.
+    """
+    resumes = {name: dict(resume) for name, resume in (known_resumes or {}).items()}
+    known_pdf_bytes = {name: resume.pop("pdf_bytes", None) for name, resume in resumes.items()}
+    ingest_share = 0.5
+
+    # Stage 1: rank the pool locally from the text layers and only rasterize the top candidates
+    if prescore_top_k:
+        texts = {name: resume.get("text", "") for name, resume in resumes.items()}
+        unread = [(name, pdf_bytes) for name, pdf_bytes in known_pdf_bytes.items() if pdf_bytes and not texts[name]]
+        unread += list(named_files)
+        for read, (file_name, text) in enumerate(extract_texts(unread), start=1):
+            ctx.check_cancelled()
+            texts[file_name] = text
+            ctx.set_progress(0.25 * read / len(unread), f"Read {file_name} ({read}/{len(unread)})")
+
+        ranked = score_resumes(input_text, texts)
+        ctx.set_artifact(PRESCORES_ARTIFACT, ranked)
+        shortlisted = set(select_top_candidates(ranked, prescore_top_k))
+        resumes = {name: resume for name, resume in resumes.items() if name in shortlisted}
+        named_files = [(name, pdf_bytes) for name, pdf_bytes in named_files if name in shortlisted]
+        ctx.set_progress(0.25, f"Shortlisted {len(shortlisted)} of {len(ranked)} resume(s) for AI analysis")
+        ingest_share = 0.25
+
+    # Stage 2: parallel ingestion of new or changed files
+    start = 0.5 - ingest_share
+    for extracted, (file_name, prepared, error) in enumerate(ingest_pdfs(named_files, extraction_mode), start=1):
+        ctx.check_cancelled()
+        if error:
+            ctx.add_result(file_name, "", None, f"Error processing resume: {error}")
+        else:
+            pdf_data = CompactPDFData(prepared, owner=artifact_owner or f"job:{ctx.job_id}")
+            ctx.set_artifact(PDF_ARTIFACT_PREFIX + file_name, pdf_data)
+            resumes[file_name] = {"content": prepared["content"], "text": prepared.get("text", ""), "done_actions": []}
+        ctx.set_progress(
+            start + ingest_share * extracted / len(named_files),
+            f"Extracted {file_name} ({extracted}/{len(named_files)})"
+        )
+
+    # Stage 3: concurrent AI analyses: the selected action, or every action
+    # in a single structured request per resume
+    prompts = get_prompts(user_mode)
+    if combined_mode:
+        wanted_actions, analyze_fn = list(prompts), get_combined_analysis
+        combined_prompt = get_combined_prompt(user_mode)
+    else:
+        wanted_actions, analyze_fn = [selected_action], get_gemini_response
+
+    analysis_requests = []
+    for file_name, resume in resumes.items():
+        if all(action in resume["done_actions"] for action in wanted_actions):
+            continue
+        if combined_mode:
+            analysis_requests.append((file_name, None, resume["content"], combined_prompt))
+        else:
+            analysis_requests.append((file_name, selected_action, resume["content"], prompts[selected_action]))
+
+    analyzed = 0
+
+    def on_analysis_result(file_name, action, response, error):
+        nonlocal analyzed
+        if error and ctx.is_cancelled():
+            return  # Skipped by cancellation; leave it to be analyzed next time
+        if error:
+            for wanted_action in wanted_actions:
+                ctx.add_result(file_name, wanted_action, None, error)
+        elif combined_mode:
+            for split_action, split_response in split_combined_analysis(response, user_mode).items():
+                ctx.add_result(file_name, split_action, split_response)
+        else:
+            ctx.add_result(file_name, action, response)
+
+        analyzed += 1
+        ctx.set_progress(
+            0.5 + 0.5 * analyzed / len(analysis_requests),
+            f"Analyzed {file_name} ({analyzed}/{len(analysis_requests)})"
+        )
+
+    if analysis_requests:
+        ctx.set_progress(0.5, f"Analyzing {len(analysis_requests)} resume(s) with AI...")
+        dispatch_analyses(
+            analysis_requests, input_text,
+            on_result=on_analysis_result, analyze_fn=analyze_fn, is_cancelled=ctx.is_cancelled,
+            on_partial=ctx.set_partial if stream and not combined_mode else None
+        )
+    ctx.check_cancelled()
@@ -0,0 +1,399 @@
+"""
+HTTP API for the resume analyzer.
+
+Runs alongside (or instead of) the Streamlit app so other services can drive
+the analyzer directly:
+
+    GET    /health              Liveness check
+    POST   /v1/analyze          Analyze one resume and wait for the result
+    POST   /v1/jobs             Queue a batch of resumes; returns a job ID (202)
+    GET    /v1/jobs/<job_id>    Job status, progress and results so far
+    DELETE /v1/jobs/<job_id>    Cancel a job
+
+Requests are JSON (resumes as base64 in ``resume`` / ``resumes``) or
+multipart/form-data (resume file field(s) plus ``job_description``, ``mode``,
+``action`` and ``combined`` fields). Every request runs on its own thread, with
+bounded pools behind them: the ingestion pool for rasterization, a semaphore
+on model calls, and the job workers for batches. Requests beyond
+ATS_API_MAX_INFLIGHT are rejected with 503 and a Retry-After header so load
+balancers can back off.
+
+Run it from the app's directory (or point the ``ATS_*_PATH`` settings at the
+same files) so both share the request quota, the response and page caches and
+the job database; jobs are owned per process, so neither interrupts the
+other's running jobs.
+
+    python api_server.py --port 8000
+"""
+import argparse
+import base64
+import binascii
+import hmac
+import json
+import os
+import re
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from analysis_pipeline import run_analysis_batch
+from ingestion import prepare_pdf
+from job_queue import get_job_manager
+from leaderboard_report import extract_match_percentage
+from llm_integration import get_gemini_response, get_combined_analysis
+from prompts import get_prompts, get_combined_prompt, split_combined_analysis
+from resilience import (
+    CircuitOpenError, DeadlineExceededError, ModelCallError, RateLimitedError, TransientModelError
+)
+
+API_HOST = os.getenv("ATS_API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("ATS_API_PORT", "8000"))
+API_TOKEN = os.getenv("ATS_API_TOKEN", "")  # When set, requests need "Authorization: Bearer <token>"
+API_MAX_INFLIGHT = int(os.getenv("ATS_API_MAX_INFLIGHT", "64"))  # Requests handled at once
+API_MODEL_CONCURRENCY = int(os.getenv("ATS_API_MODEL_CONCURRENCY", "16"))  # Model calls of /v1/analyze in flight
+API_MAX_BODY_BYTES = int(os.getenv("ATS_API_MAX_BODY_BYTES", str(50 * 1024 * 1024)))
+API_MAX_RESUME_BYTES = 10 * 1024 * 1024  # Same limit as uploads in the app
+API_RETRY_AFTER = 5  # Seconds clients should wait after a 503 for overload
+
+_JOB_PATH = re.compile(r"^/v1/jobs/([0-9a-f]{32})$")
+
+
+class APIError(Exception):
+    """Error answered with an HTTP status and a JSON ``{"error": message}`` body."""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def _model_error_status(error):
+    """HTTP status and headers for a typed model call failure."""
+    if isinstance(error, RateLimitedError):
+        return 429, {"Retry-After": str(int(error.retry_after or API_RETRY_AFTER))}
+    if isinstance(error, CircuitOpenError):
+        return 503, {"Retry-After": str(API_RETRY_AFTER)}
+    if isinstance(error, DeadlineExceededError):
+        return 504, {}
+    if isinstance(error, TransientModelError):
+        return 503, {"Retry-After": str(API_RETRY_AFTER)}
+    return 502, {}
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _default_file_name(index):
+    """Name of the ``index``-th (1-based) resume when the client gave none."""
+    return f"resume_{index}.pdf"
+
+
+def _decode_resume(resume, index):
+    """Turn a JSON resume ({"file_name", "data": base64}) into (file_name, pdf_bytes)."""
+    if not isinstance(resume, dict) or not resume.get("data"):
+        raise APIError(400, "Each resume needs base64 'data' (and optionally 'file_name')")
+    try:
+        pdf_bytes = base64.b64decode(resume["data"], validate=True)
+    except (binascii.Error, ValueError, TypeError):
+        raise APIError(400, "Resume data is not valid base64")
+    return resume.get("file_name") or _default_file_name(index), pdf_bytes
+
+
+def parse_analysis_request(content_type, body):
+    """
+    Parse a JSON or multipart request body.
+
+    Returns:
+        dict: job_description, mode, action, combined, extraction_mode and
+        resumes as a list of (file_name, pdf_bytes). Unnamed resumes are named
+        by position; file names must be unique, since results are keyed by them.
+    """
+    if content_type.startswith("multipart/form-data"):
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+        )
+        if not message.is_multipart():
+            raise APIError(400, "Malformed multipart body")
+        fields, resumes = {}, []
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            data = part.get_payload(decode=True) or b""
+            if part.get_filename() is not None:
+                resumes.append((part.get_filename() or _default_file_name(len(resumes) + 1), data))
+            elif name:
+                fields[name] = data.decode("utf-8", errors="replace")
+    elif content_type.startswith("application/json"):
+        try:
+            fields = json.loads(body)
+        except ValueError as e:
+            raise APIError(400, f"Invalid JSON: {e}")
+        if not isinstance(fields, dict):
+            raise APIError(400, "Expected a JSON object")
+        raw_resumes = fields.get("resumes") or ([fields["resume"]] if fields.get("resume") else [])
+        resumes = [_decode_resume(resume, index) for index, resume in enumerate(raw_resumes, start=1)]
+    else:
+        raise APIError(415, "Use application/json or multipart/form-data")
+
+    input_text = (fields.get("job_description") or "").strip()
+    if not input_text:
+        raise APIError(400, "'job_description' is required")
+    if not resumes:
+        raise APIError(400, "At least one resume is required")
+    seen = set()
+    for file_name, pdf_bytes in resumes:
+        if file_name in seen:
+            raise APIError(400, f"Duplicate file name: {file_name}; every resume needs a unique name")
+        seen.add(file_name)
+        if not pdf_bytes.startswith(b"%PDF"):
+            raise APIError(400, f"{file_name} is not a PDF")
+        if len(pdf_bytes) > API_MAX_RESUME_BYTES:
+            raise APIError(413, f"{file_name} is larger than {API_MAX_RESUME_BYTES // (1024 * 1024)}MB")
+
+    user_mode = fields.get("mode") or "Recruiter"
+    if user_mode not in ("Recruiter", "Student"):
+        raise APIError(400, "'mode' must be 'Recruiter' or 'Student'")
+    prompts = get_prompts(user_mode)
+    action = fields.get("action")
+    if action:
+        matches = [name for name in prompts if name.strip().lower() == action.strip().lower()]
+        if not matches:
+            raise APIError(400, f"Unknown action; choose from: {', '.join(name.strip() for name in prompts)}")
+        action = matches[0]
+    else:
+        action = next(iter(prompts))
+
+    extraction_mode = (fields.get("extraction_mode") or "").strip().lower() or None
+    if extraction_mode not in (None, "auto", "text", "image"):
+        raise APIError(400, "'extraction_mode' must be 'auto', 'text' or 'image'")
+
+    return {
+        "job_description": input_text,
+        "mode": user_mode,
+        "action": action,
+        "combined": _parse_bool(fields.get("combined")),
+        "extraction_mode": extraction_mode,
+        "resumes": resumes,
+    }
+
+
+class AnalysisService:
+    """Request handling independent of HTTP: synchronous analyses and batch jobs."""
+
+    def __init__(self, job_manager=None, model_concurrency=API_MODEL_CONCURRENCY):
+        self._job_manager = job_manager
+        self._model_slots = threading.BoundedSemaphore(max(1, model_concurrency))
+
+    @property
+    def job_manager(self):
+        return self._job_manager or get_job_manager()
+
+    def analyze(self, request):
+        """Analyze a single resume; returns the response body."""
+        if len(request["resumes"]) != 1:
+            raise APIError(400, "/v1/analyze takes exactly one resume; use /v1/jobs for batches")
+        file_name, pdf_bytes = request["resumes"][0]
+        _, prepared, error = prepare_pdf(file_name, pdf_bytes, request["extraction_mode"])
+        if error:
+            raise APIError(422, error)
+
+        user_mode, input_text = request["mode"], request["job_description"]
+        try:
+            with self._model_slots:
+                if request["combined"]:
+                    analysis = get_combined_analysis(input_text, prepared["content"], get_combined_prompt(user_mode))
+                    responses = split_combined_analysis(analysis, user_mode)
+                else:
+                    action = request["action"]
+                    responses = {
+                        action: get_gemini_response(input_text, prepared["content"], get_prompts(user_mode)[action])
+                    }
+        except ModelCallError as e:
+            status, headers = _model_error_status(e)
+            raise APIError(status, str(e), headers)
+        except ValueError as e:
+            raise APIError(502, str(e))  # The model returned unusable JSON
+
+        return {
+            "file_name": file_name,
+            "mode": user_mode,
+            "extraction_mode": prepared.get("extraction_mode"),
+            "results": [
+                {"action": action.strip(), "response": response,
+                 "match": extract_match_percentage({action: response})}
+                for action, response in responses.items()
+            ],
+        }
+
+    def submit_job(self, request):
+        """Queue a batch; returns the job ID."""
+        return self.job_manager.submit(
+            "api_batch", _run_api_batch, request["resumes"], request["job_description"], request["mode"],
+            request["action"], request["combined"], request["extraction_mode"], self.job_manager
+        )
+
+    def get_job(self, job_id):
+        job = self.job_manager.get(job_id)
+        if job is None:
+            raise APIError(404, "Unknown job")
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "progress": job["progress"],
+            "message": job["message"],
+            "error": job["error"],
+            "results": [
+                {"file_name": result["item"], "action": result["action"].strip(),
+                 "response": result["response"], "error": result["error"],
+                 "match": extract_match_percentage({"": result["response"]}) if result["response"] else None}
+                for result in job["results"]
+            ],
+        }
+
+    def cancel_job(self, job_id):
+        if self.job_manager.get(job_id) is None:
+            raise APIError(404, "Unknown job")
+        self.job_manager.cancel(job_id)
+        return {"job_id": job_id, "cancel_requested": True}
+
+
+def _run_api_batch(ctx, named_files, input_text, user_mode, action, combined, extraction_mode, job_manager):
+    """Job function for /v1/jobs: results are read from the job store, so artifacts are dropped."""
+    try:
+        run_analysis_batch(ctx, named_files, input_text, user_mode, action, combined_mode=combined,
+                           extraction_mode=extraction_mode)
+    finally:
+        job_manager.release(ctx.job_id)
+
+
+class APIRequestHandler(BaseHTTPRequestHandler):
+    """Request handler; the server's ``service`` attribute holds the AnalysisService."""
+
+    server_version = "ATSResumeExpertAPI/1.0"
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self):
+        token = self.server.token
+        if not token:
+            return True
+        supplied = self.headers.get("Authorization", "")
+        return hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode())
+
+    def _read_body(self):
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            raise APIError(411, "Content-Length is required")
+        if length < 0:
+            raise APIError(400, "Content-Length must not be negative")
+        if length > self.server.max_body_bytes:
+            raise APIError(413, "Request body is too large")
+        return self.rfile.read(length)
+
+    def _handle(self, route):
+        if not self.server.inflight.acquire(blocking=False):
+            # Shed load before reading the body; the connection is closed afterwards
+            self.close_connection = True
+            self._send_json(503, {"error": "Server is busy"}, {"Retry-After": str(API_RETRY_AFTER)})
+            return
+        try:
+            if not self._authorized():
+                raise APIError(401, "Missing or invalid API token")
+            status, payload = route()
+            self._send_json(status, payload)
+        except APIError as e:
+            self._send_json(e.status, {"error": str(e)}, e.headers)
+        except Exception as e:
+            self.log_error("Unhandled error: %r", e)
+            self._send_json(500, {"error": "Internal server error"})
+        finally:
+            self.server.inflight.release()
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+            return
+        match = _JOB_PATH.match(self.path)
+        if match:
+            self._handle(lambda: (200, self.server.service.get_job(match.group(1))))
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        service = self.server.service
+        if self.path == "/v1/analyze":
+            self._handle(lambda: (200, service.analyze(self._parse())))
+        elif self.path == "/v1/jobs":
+            def submit():
+                job_id = service.submit_job(self._parse())
+                return 202, {"job_id": job_id, "status_url": f"/v1/jobs/{job_id}"}
+            self._handle(submit)
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_DELETE(self):
+        match = _JOB_PATH.match(self.path)
+        if match:
+            self._handle(lambda: (200, self.server.service.cancel_job(match.group(1))))
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def _parse(self):
+        return parse_analysis_request(self.headers.get("Content-Type", ""), self._read_body())
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def create_server(host=API_HOST, port=API_PORT, service=None, token=API_TOKEN,
+                  max_inflight=API_MAX_INFLIGHT, max_body_bytes=API_MAX_BODY_BYTES, verbose=False):
+    """
+    Create (but do not start) the API server.
+
+    Returns:
+        ThreadingHTTPServer: Call ``serve_forever()``; ``server_address`` holds the bound port
+    """
+    server = ThreadingHTTPServer((host, port), APIRequestHandler)
+    server.daemon_threads = True
+    server.service = service or AnalysisService()
+    server.token = token
+    server.inflight = threading.BoundedSemaphore(max(1, max_inflight))
+    server.max_body_bytes = max_body_bytes
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP API for the resume analyzer")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    import config  # noqa: F401 - loads .env and configures the model backend
+
+    server = create_server(args.host, args.port, verbose=args.verbose)
+    print(f"ATS Resume Expert API listening on http://{args.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,183 @@
 import streamlit as st
 from config import *
-from pdf_processing import process_uploaded_pdf
-from llm_integration import get_gemini_response
+from page_cache import compute_content_hash
+from analysis_pipeline import run_analysis_batch, PDF_ARTIFACT_PREFIX, PRESCORES_ARTIFACT
+from job_queue import get_job_manager, FINISHED_STATES, COMPLETED, CANCELLED
+from report_export import export_reports, export_leaderboard, collect_leaderboard_candidates, EXPORT_ARTIFACT
 from prompts import get_prompts
 from ui import create_streamlit_ui
-from response_display import display_response, display_preview, create_summary_dashboard, display_download_options
+from response_display import display_response, display_preview, create_summary_dashboard, display_download_options, display_prescore_ranking
 import time
+import uuid
+
+MAX_BATCH_FILES = 10  # Files analyzed per batch without pre-scoring
+MAX_PRESCORE_FILES = 500  # Files accepted when pre-scoring shortlists candidates
+JOB_POLL_INTERVAL = 1.0  # Seconds between progress refreshes while a job runs
+STREAM_POLL_INTERVAL = 0.3  # Faster refreshes while a response is streaming in
+
+def _merge_job_results(job, artifacts):
+    """
+    Merges a background job's partial results into the session results.
+    Safe to call on every poll: merging the same results again changes nothing.
+    """
+    results = st.session_state.results
+    
+    for key, pdf_data in artifacts.items():
+        if not key.startswith(PDF_ARTIFACT_PREFIX):
+            continue
+        file_name = key[len(PDF_ARTIFACT_PREFIX):]
+        if results.get(file_name, {}).get("pdf_data", {}).get("content_hash") != pdf_data["content_hash"]:
+            # The job already stored it compactly, charged to this session; replaced entries free their blobs
+            results[file_name] = {"pdf_data": pdf_data, "responses": {}}
+    
+    if artifacts.get(PRESCORES_ARTIFACT):
+        st.session_state.prescores = artifacts[PRESCORES_ARTIFACT]
+    
+    for row in job["results"]:
+        file_name = row["item"]
+        if not row["action"]:
+            results[file_name] = {"error": row["error"]}
+        elif "responses" in results.get(file_name, {}):
+            # Failed analyses are kept apart from responses so the next run retries them
+            entry = results[file_name]
+            if row["error"]:
+                entry.setdefault("errors", {})[row["action"]] = row["error"]
+            else:
+                entry["responses"][row["action"]] = row["response"]
+                entry.get("errors", {}).pop(row["action"], None)
+
+def _poll_analysis_job(job_manager, job):
+    """
+    Shows the progress of the active analysis job and merges its results.
+    
+    Returns:
+        bool: True while the job is still running
+    """
+    _merge_job_results(job, job_manager.get_artifacts(job["id"]))
+    
+    if job["status"] not in FINISHED_STATES:
+        st.progress(job["progress"])
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.text(job["message"] or "Starting analysis...")
+        with col2:
+            if st.button("⏹ Cancel", use_container_width=True):
+                job_manager.cancel(job["id"])
+        return True
+    
+    # The job has finished: release its artifacts and report the outcome once
+    job_manager.release(job["id"])
+    st.session_state.active_job_id = None
+    st.session_state.processing_complete = True
+    if job["status"] == COMPLETED:
+        st.success("🎉 Analysis completed successfully!")
+    elif job["status"] == CANCELLED:
+        st.warning("⏹ Analysis cancelled. Completed results are kept.")
+    else:
+        st.error(f"❌ Analysis failed: {job['error'] or job['message']}")
+    return False
+
+def _exportable_candidates(results):
+    """Return {file_name: {action: response}} of every candidate with completed analyses."""
+    candidates = {}
+    for file_name, data in results.items():
+        responses = {
+            action: response for action, response in data.get("responses", {}).items()
+            if response and response.strip()
+        }
+        if responses:
+            candidates[file_name] = responses
+    return candidates
+
+def _batch_export_section(job_manager):
+    """
+    Offers a ZIP export of every candidate's report and a leaderboard PDF of the
+    whole pool, each rendered as a background job.
+    
+    Returns:
+        bool: True while an export is still running
+    """
+    candidates = _exportable_candidates(st.session_state.results)
+    export_job = job_manager.get(st.session_state.export_job_id) if st.session_state.export_job_id else None
+    if not candidates and not st.session_state.prescores and not export_job:
+        return False
+    
+    st.markdown("### 📦 Batch Export")
+    if not export_job or export_job["status"] in FINISHED_STATES:
+        col1, col2 = st.columns(2)
+        with col1:
+            if candidates and st.button(f"📦 Export reports for all {len(candidates)} candidate(s) (ZIP)", use_container_width=True):
+                st.session_state.export_job_id = job_manager.submit("export", export_reports, candidates)
+        with col2:
+            if st.button("🏆 Export candidate leaderboard (PDF)", use_container_width=True):
+                leaderboard = collect_leaderboard_candidates(candidates, st.session_state.prescores)
+                st.session_state.export_job_id = job_manager.submit("leaderboard", export_leaderboard, leaderboard, candidates)
+        if st.session_state.export_job_id:
+            export_job = job_manager.get(st.session_state.export_job_id)
+    
+    if not export_job:
+        return False
+    
+    if export_job["status"] not in FINISHED_STATES:
+        st.progress(export_job["progress"])
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.text(export_job["message"] or "Starting export...")
+        with col2:
+            if st.button("⏹ Cancel export", use_container_width=True):
+                job_manager.cancel(export_job["id"])
+        return True
+    
+    export_path = job_manager.get_artifacts(export_job["id"]).get(EXPORT_ARTIFACT)
+    if export_job["status"] == COMPLETED and export_path:
+        failed = sum(1 for row in export_job["results"] if row["error"])
+        if failed:
+            st.warning(f"⚠️ {failed} report(s) could not be rendered; see errors.txt in the archive.")
+        is_leaderboard = export_job["kind"] == "leaderboard"
+        label = "Leaderboard (PDF)" if is_leaderboard else "All Reports (ZIP)"
+        # The file is only read into the session once the user asks for it, and
+        # dropped again after the download so later reruns do not reload it
+        ready_key = f"export_ready_{export_job['id']}"
+        if not st.session_state.get(ready_key):
+            if st.button(f"⚙️ Prepare {label} download", use_container_width=True):
+                st.session_state[ready_key] = True
+        if st.session_state.get(ready_key):
+            with open(export_path, "rb") as export_file:
+                st.download_button(
+                    label=f"📥 Download {label}",
+                    data=export_file,
+                    file_name=f"ATS_{'Leaderboard' if is_leaderboard else 'Reports'}_{time.strftime('%Y%m%d_%H%M%S')}"
+                              f".{'pdf' if is_leaderboard else 'zip'}",
+                    mime="application/pdf" if is_leaderboard else "application/zip",
+                    on_click=st.session_state.pop,
+                    args=(ready_key, None),
+                    use_container_width=True
+                )
+    elif export_job["status"] == CANCELLED:
+        st.warning("⏹ Export cancelled.")
+    elif export_job["status"] != COMPLETED:
+        st.error(f"❌ Export failed: {export_job['error'] or export_job['message']}")
+    return False
 
 def main():
     """
     Main application function with enhanced error handling and user experience.
     """
     # Initialize session state variables
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
     if "results" not in st.session_state:
         st.session_state.results = {}
     if "fullscreen_preview" not in st.session_state:
         st.session_state.fullscreen_preview = None
     if "processing_complete" not in st.session_state:
         st.session_state.processing_complete = False
+    if "prescores" not in st.session_state:
+        st.session_state.prescores = None
+    if "active_job_id" not in st.session_state:
+        st.session_state.active_job_id = None
+    if "export_job_id" not in st.session_state:
+        st.session_state.export_job_id = None
 
     # Create the UI
     input_text, uploaded_files, user_mode = create_streamlit_ui()
@@ -33,8 +193,31 @@ def main():
     # Action selection with better UI
     st.markdown("### 🎯 Choose Analysis Type")
     selected_action = st.radio("", actions, horizontal=True)
+    combined_mode = st.checkbox(
+        "⚡ Run all analyses in a single request",
+        help="Ask the AI once per resume for every analysis type (fewer API calls and uploads)"
+    )
+    stream_enabled = st.checkbox(
+        "📡 Show responses as they are generated",
+        value=True,
+        disabled=combined_mode,
+        help="Stream the AI's answer while it is written instead of waiting for the full response"
+    )
+    prescore_enabled = st.checkbox(
+        "🔎 Pre-score locally and analyze only the top candidates with AI",
+        help=f"Rank up to {MAX_PRESCORE_FILES} resumes by keyword and skill overlap with the job description, "
+             "then send only the best matches to the AI"
+    )
+    top_k = MAX_BATCH_FILES
+    if prescore_enabled:
+        top_k = int(st.number_input(
+            "Candidates to analyze with AI:", min_value=1, max_value=MAX_PRESCORE_FILES, value=MAX_BATCH_FILES
+        ))
 
-    # Process files only when "Submit" button is clicked
+    job_manager = get_job_manager()
+    active_job = job_manager.get(st.session_state.active_job_id) if st.session_state.active_job_id else None
+
+    # Submit a background job only when "Submit" button is clicked
     if st.button("🚀 Analyze Resumes", type="primary", use_container_width=True):
         if not uploaded_files:
             st.error("❌ Please upload at least one resume file.")
@@ -44,78 +227,72 @@ def main():
             st.error("❌ Please provide a job description.")
             return
 
-        # Reset processing state
-        st.session_state.processing_complete = False
-        
-        # Show processing info
-        st.info("ℹ️ **Free Tier Info**: 15 requests per minute. Processing may be slower to avoid rate limits.")
-        
-        # Progress tracking
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        total_files = len(uploaded_files)
-        processed_files = 0
-        
-        for i, file in enumerate(uploaded_files[:10]):  # Limit to 10 files
-            file_name = file.name
-            status_text.text(f"Processing {file_name}... ({i+1}/{total_files})")
+        if active_job and active_job["status"] not in FINISHED_STATES:
+            st.warning("⏳ A batch is already running. Wait for it to finish or cancel it.")
+        else:
+            # Reset processing state
+            st.session_state.processing_complete = False
             
-            # Process PDF if not already processed
-            if file_name not in st.session_state.results:
-                try:
-                    with st.spinner(f"Extracting content from {file_name}..."):
-                        pdf_data = process_uploaded_pdf(file)
-                        st.session_state.results[file_name] = {
-                            "pdf_data": pdf_data,
-                            "responses": {}
-                        }
-                except Exception as e:
-                    st.error(f"❌ Error processing {file_name}: {str(e)}")
-                    st.session_state.results[file_name] = {"error": f"Error processing resume: {e}"}
-                    continue
+            # Show processing info
+            st.info("ℹ️ **Free Tier Info**: 15 requests per minute. Processing may be slower to avoid rate limits.")
             
-            # Generate AI response for the selected action
-            if (file_name in st.session_state.results and 
-                "responses" in st.session_state.results[file_name] and
-                selected_action not in st.session_state.results[file_name]["responses"]):
-                
-                try:
-                    with st.spinner(f"Analyzing {file_name} with AI..."):
-                        pdf_content = st.session_state.results[file_name]["pdf_data"]["content"]
-                        response = get_gemini_response(input_text, pdf_content, prompts[selected_action])
-                        st.session_state.results[file_name]["responses"][selected_action] = response
-                        
-                        # Check for rate limiting
-                        if any(keyword in response.lower() for keyword in ["rate limit", "wait", "quota"]):
-                            st.warning(f"⚠️ Rate limit reached for {file_name}. {response}")
-                            break
-                            
-                except Exception as e:
-                    st.error(f"❌ AI analysis failed for {file_name}: {str(e)}")
-                    st.session_state.results[file_name]["responses"][selected_action] = f"Error: {str(e)}"
+            batch_files = uploaded_files[:MAX_PRESCORE_FILES if prescore_enabled else MAX_BATCH_FILES]
             
-            processed_files += 1
-            progress_bar.progress(processed_files / total_files)
-        
-        # Complete processing
-        progress_bar.progress(1.0)
-        status_text.text("✅ Processing complete!")
-        st.session_state.processing_complete = True
-        time.sleep(1)
-        status_text.empty()
-        progress_bar.empty()
-        
-        st.success("🎉 Analysis completed successfully!")
+            # Only new or changed files are ingested again (a new file reusing a name is re-processed)
+            pending_files = []
+            known_resumes = {}
+            for file in batch_files:
+                pdf_bytes = file.getvalue()
+                cached_result = st.session_state.results.get(file.name, {})
+                pdf_data = cached_result.get("pdf_data", {})
+                if pdf_data.get("content_hash") != compute_content_hash(pdf_bytes):
+                    pending_files.append((file.name, pdf_bytes))
+                else:
+                    known_resumes[file.name] = {
+                        "content": pdf_data["content"],
+                        "text": pdf_data.get("text", ""),
+                        "done_actions": list(cached_result.get("responses", {}))
+                    }
+                    if prescore_enabled and not pdf_data.get("text"):
+                        # Ingested without a text layer (image mode): let the pre-scorer read it
+                        known_resumes[file.name]["pdf_bytes"] = pdf_bytes
+            
+            st.session_state.prescores = None
+            st.session_state.active_job_id = job_manager.submit(
+                "analysis", run_analysis_batch,
+                pending_files, input_text, user_mode, selected_action,
+                combined_mode=combined_mode,
+                prescore_top_k=top_k if prescore_enabled else None,
+                known_resumes=known_resumes,
+                stream=stream_enabled,
+                artifact_owner=st.session_state.session_id
+            )
+            active_job = job_manager.get(st.session_state.active_job_id)
+    
+    # Poll the background job: show progress and merge partial results
+    job_running = False
+    streaming = {}
+    if active_job:
+        job_running = _poll_analysis_job(job_manager, active_job)
+        if job_running:
+            # Responses still being generated; only finished ones reach st.session_state.results
+            streaming = {
+                file_name: text for (file_name, action), text in job_manager.get_partials(active_job["id"]).items()
+                if action == selected_action
+            }
 
     # Display summary dashboard
     if st.session_state.results:
         create_summary_dashboard(st.session_state.results)
+    if st.session_state.prescores:
+        display_prescore_ranking(st.session_state.prescores, top_k)
+    export_running = _batch_export_section(job_manager)
 
     # Resume selection and results display
     available_resumes = [
         file_name for file_name, data in st.session_state.results.items()
-        if "responses" in data and selected_action in data.get("responses", {})
+        if selected_action in data.get("responses", {}) or selected_action in data.get("errors", {})
+        or file_name in streaming
     ]
 
     # Sidebar for resume selection
@@ -145,7 +322,17 @@ def main():
             # Display preview and response
             display_preview(pdf_data, selected_resume)
 
-            if selected_action in responses:
+            if selected_action not in responses and selected_resume in streaming:
+                display_response(
+                    f"📊 {selected_action} - {selected_resume}",
+                    streaming[selected_resume],
+                    streaming=True
+                )
+            elif selected_action not in responses and selected_action in st.session_state.results[selected_resume].get("errors", {}):
+                st.markdown(f"### 📊 {selected_action} - {selected_resume}")
+                st.warning(f"⚠️ {st.session_state.results[selected_resume]['errors'][selected_action]}")
+                st.info("🔄 Click 'Analyze Resumes' to retry this analysis.")
+            elif selected_action in responses:
                 display_response(
                     f"📊 {selected_action} - {selected_resume}", 
                     responses[selected_action]
@@ -156,5 +343,10 @@ def main():
             else:
                 st.info("🔄 Click 'Analyze Resumes' to generate analysis for this resume.")
 
+    # Keep polling while a background job runs
+    if job_running or export_running:
+        time.sleep(STREAM_POLL_INTERVAL if streaming else JOB_POLL_INTERVAL)
+        st.rerun()
+
 if __name__ == "__main__":
     main()
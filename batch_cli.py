@@ -0,0 +1,257 @@
+"""
+Headless batch screening of resumes against a job description.
+
+    python batch_cli.py --jd job.txt resumes/ --output results.jsonl
+    python batch_cli.py --jd job.txt "incoming/**/*.pdf" --output results.csv --combined --concurrency 8
+
+Resumes are ingested in chunks by the parallel ingestion pool and analyzed by
+the concurrent dispatcher, through the same rate limiter, response cache and
+retry layer as the app. Every result is appended to the output (JSON lines or
+CSV, by extension) and flushed as soon as it completes, so an interrupted run
+loses nothing. Re-running with the same output skips resumes that already have
+successful results and retries those that failed.
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from analysis_dispatcher import ANALYSIS_CONCURRENCY, dispatch_analyses
+from ingestion import ingest_pdfs
+from leaderboard_report import extract_match_percentage
+from llm_integration import get_gemini_response, get_combined_analysis
+from prompts import get_prompts, get_combined_prompt, split_combined_analysis
+
+BATCH_CHUNK_SIZE = int(os.getenv("ATS_BATCH_CHUNK_SIZE", "50"))  # Resumes ingested and held in memory at once
+OUTPUT_FIELDS = ("file", "action", "match", "response", "error", "completed_at")
+
+
+def find_resumes(inputs):
+    """
+    Expand directories (searched recursively) and glob patterns into PDF paths.
+
+    Returns:
+        list: Sorted unique paths
+    """
+    paths = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*")
+        for path in glob.glob(pattern, recursive=True):
+            if os.path.isfile(path) and path.lower().endswith(".pdf"):
+                paths.add(os.path.normpath(path))
+    return sorted(paths)
+
+
+def _output_format(path, requested=None):
+    if requested:
+        return requested
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def load_completed(path, fmt):
+    """
+    Read the (file, action) pairs that already have a successful result.
+
+    Rows that recorded an error are not counted, so they are retried.
+    """
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            rows = list(csv.DictReader(f))
+        else:
+            rows = []
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    continue  # A partially written line from an interrupted run
+    for row in rows:
+        if row.get("file") and not row.get("error"):
+            completed.add((row["file"], row.get("action")))
+    return completed
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+class ResultWriter:
+    """Appends result rows to a JSON lines or CSV file, flushing after every row."""
+
+    def __init__(self, path, fmt):
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        torn_line = not new_file and not _ends_with_newline(path)
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        if torn_line:
+            self._file.write("\n")  # Keep new rows off a line cut short by an interrupted run
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=OUTPUT_FIELDS)
+            if new_file:
+                self._csv.writeheader()
+        self.written = 0
+        self.errors = 0
+
+    def write(self, file_name, action, response=None, error=None):
+        row = {
+            "file": file_name,
+            "action": action,
+            "match": extract_match_percentage({action: response}) if response else None,
+            "response": response,
+            "error": error,
+            "completed_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        if self._csv:
+            self._csv.writerow({key: "" if value is None else value for key, value in row.items()})
+        else:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.written += 1
+        self.errors += bool(error)
+
+    def close(self):
+        self._file.close()
+
+
+def _resolve_action(prompts, action):
+    """Match an action name loosely (prompt titles carry stray whitespace)."""
+    if action is None:
+        return next(iter(prompts))
+    for name in prompts:
+        if name.strip().lower() == action.strip().lower():
+            return name
+    raise ValueError(f"Unknown action {action!r}; choose from: {', '.join(name.strip() for name in prompts)}")
+
+
+def run_batch(input_text, paths, writer, user_mode="Recruiter", action=None, combined=False,
+              completed=frozenset(), concurrency=ANALYSIS_CONCURRENCY, chunk_size=BATCH_CHUNK_SIZE,
+              extraction_mode=None, log=None):
+    """
+    Screens resumes and writes one row per (resume, action) as each completes.
+
+    Args:
+        input_text (str): The job description
+        paths (list): PDF paths
+        writer (ResultWriter): Destination of the result rows
+        user_mode (str): "Recruiter" or "Student"
+        action (str): Analysis to run (defaults to the mode's first); ignored when combined
+        combined (bool): Run every analysis of the mode in one structured request
+        completed (set): (file, action) pairs to skip
+        concurrency (int): Model requests in flight
+        chunk_size (int): Resumes ingested per chunk
+        extraction_mode (str): "auto", "text" or "image"
+        log (callable): Receives progress messages
+
+    Returns:
+        tuple: (resumes analyzed, resumes skipped)
+    """
+    log = log or (lambda message: None)
+    prompts = get_prompts(user_mode)
+    if combined:
+        wanted_actions, analyze_fn = list(prompts), get_combined_analysis
+        combined_prompt = get_combined_prompt(user_mode)
+    else:
+        wanted_actions, analyze_fn = [_resolve_action(prompts, action)], get_gemini_response
+
+    pending = [path for path in paths if not all((path, wanted) in completed for wanted in wanted_actions)]
+    skipped = len(paths) - len(pending)
+    if skipped:
+        log(f"Skipping {skipped} resume(s) with existing results")
+
+    def on_result(file_name, result_action, response, error):
+        if error:
+            for wanted in wanted_actions:
+                writer.write(file_name, wanted, error=error)
+        elif combined:
+            for split_action, split_response in split_combined_analysis(response, user_mode).items():
+                writer.write(file_name, split_action, split_response)
+        else:
+            writer.write(file_name, result_action, response)
+
+    started = time.monotonic()
+    for first in range(0, len(pending), chunk_size):
+        chunk = pending[first:first + chunk_size]
+        named_files = []
+        for path in chunk:
+            try:
+                with open(path, "rb") as f:
+                    named_files.append((path, f.read()))
+            except OSError as e:
+                writer.write(path, "", error=f"Error reading resume: {e}")
+
+        requests = []
+        for file_name, prepared, error in ingest_pdfs(named_files, extraction_mode):
+            if error:
+                writer.write(file_name, "", error=f"Error processing resume: {error}")
+            elif combined:
+                requests.append((file_name, None, prepared["content"], combined_prompt))
+            else:
+                requests.append((file_name, wanted_actions[0], prepared["content"], prompts[wanted_actions[0]]))
+        del named_files
+
+        dispatch_analyses(requests, input_text, concurrency=concurrency, on_result=on_result, analyze_fn=analyze_fn)
+        done = min(first + chunk_size, len(pending))
+        log(f"{done}/{len(pending)} resume(s) analyzed ({time.monotonic() - started:.0f}s elapsed)")
+
+    return len(pending), skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen a batch of resumes against a job description")
+    parser.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("--jd", required=True, help="Job description text file")
+    parser.add_argument("--output", "-o", required=True, help="Results file (.jsonl or .csv), appended to")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="Output format (default: from the extension)")
+    parser.add_argument("--mode", choices=("Recruiter", "Student"), default="Recruiter")
+    parser.add_argument("--action", help="Analysis to run (default: the mode's first analysis)")
+    parser.add_argument("--combined", action="store_true", help="Run every analysis in one request per resume")
+    parser.add_argument("--concurrency", type=int, default=ANALYSIS_CONCURRENCY, help="Model requests in flight")
+    parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE, help="Resumes ingested at once")
+    parser.add_argument("--extraction-mode", choices=("auto", "text", "image"))
+    args = parser.parse_args(argv)
+
+    import config  # noqa: F401 - loads .env and configures the model backend
+
+    with open(args.jd, encoding="utf-8") as f:
+        input_text = f.read()
+    paths = find_resumes(args.inputs)
+    if not paths:
+        parser.error("no PDF files found")
+
+    fmt = _output_format(args.output, args.format)
+    completed = load_completed(args.output, fmt)
+
+    def log(message):
+        print(message, file=sys.stderr, flush=True)
+
+    log(f"Found {len(paths)} resume(s)")
+    writer = ResultWriter(args.output, fmt)
+    try:
+        run_batch(
+            input_text, paths, writer, user_mode=args.mode, action=args.action, combined=args.combined,
+            completed=completed, concurrency=args.concurrency, chunk_size=max(1, args.chunk_size),
+            extraction_mode=args.extraction_mode, log=log
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    except KeyboardInterrupt:
+        log("Interrupted; re-run the same command to resume")
+        return 130
+    finally:
+        writer.close()
+
+    log(f"Wrote {writer.written} result(s) to {args.output}, {writer.errors} with errors")
+    return 1 if writer.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,27 @@
 from dotenv import load_dotenv
 import os
-import google.generativeai as genai
 
 # Load environment variables - try multiple paths
 # For local development
 load_dotenv()  # Look for .env in current directory
 load_dotenv('.env')  # Explicitly look for .env file
 
+# Imported after .env is loaded so backend settings can live there too
+from llm_backends import LLM_BACKEND
+from llm_cassette import CASSETTE_MODE
+
 # Configure generative AI
 # Try multiple environment variable names for flexibility
 API_KEY = os.getenv("key") or os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
 
-if not API_KEY:
-    raise ValueError("Google API Key not found. Please set it in the .env file.")
+# The mock backends and cassette replays used for offline runs need no key
+if LLM_BACKEND == "gemini" and CASSETTE_MODE != "replay":
+    if not API_KEY:
+        raise ValueError("Google API Key not found. Please set it in the .env file.")
 
-# Remove any quotes that might have been included
-API_KEY = API_KEY.strip('"').strip("'")
+    # Remove any quotes that might have been included
+    API_KEY = API_KEY.strip('"').strip("'")
 
-genai.configure(api_key=API_KEY)
+    # Configure the shared Gemini client once for the whole process
+    import gemini_client
+    gemini_client.configure(API_KEY)
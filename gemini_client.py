@@ -0,0 +1,88 @@
+"""
+Long-lived Gemini client layer.
+
+The SDK is configured once per process and model handles are built once per
+(model, generation config) pair, so the underlying transport (and its open
+connections) is reused across requests instead of being rebuilt on every call.
+"""
+import json
+import os
+import threading
+
+import google.generativeai as genai
+from dotenv import load_dotenv
+
+DEFAULT_MODEL_NAME = "gemini-2.0-flash"
+
+_configured = False
+_models = {}
+_lock = threading.Lock()
+
+
+def _resolve_api_key():
+    """Read the API key from the environment (same variable names as config.py)."""
+    load_dotenv()
+    api_key = os.getenv("key") or os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        return None
+    # Remove any quotes that might have been included
+    return api_key.strip('"').strip("'")
+
+
+def configure(api_key=None):
+    """
+    Configure the SDK once for this process.
+
+    Args:
+        api_key (str): Explicit key; resolved from the environment when omitted
+
+    Raises:
+        ValueError: If no API key can be found
+    """
+    global _configured
+    with _lock:
+        if _configured and api_key is None:
+            return
+        api_key = api_key or _resolve_api_key()
+        if not api_key:
+            raise ValueError("Google API Key not found. Please set it in the .env file.")
+        genai.configure(api_key=api_key)
+        # Handles built against the previous configuration must not be reused
+        _models.clear()
+        _configured = True
+
+
+def _config_key(generation_config):
+    if generation_config is None:
+        return None
+    return json.dumps(generation_config, sort_keys=True, default=str)
+
+
+def get_model(model_name=DEFAULT_MODEL_NAME, generation_config=None):
+    """Return the shared model handle for a (model, generation config) pair."""
+    configure()
+    key = (model_name, _config_key(generation_config))
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                model = genai.GenerativeModel(model_name, generation_config=generation_config)
+                _models[key] = model
+    return model
+
+
+def generate_content(parts, model_name=DEFAULT_MODEL_NAME, generation_config=None, **kwargs):
+    """
+    Single entry point for model calls.
+
+    Args:
+        parts (list): Content parts (strings and/or {"mime_type", "data"} dicts)
+        model_name (str): Gemini model to use
+        generation_config (dict): Optional generation settings
+        **kwargs: Passed through to ``GenerativeModel.generate_content``
+
+    Returns:
+        The SDK response object
+    """
+    return get_model(model_name, generation_config).generate_content(parts, **kwargs)
@@ -0,0 +1,227 @@
+"""
+Parallel ingestion of uploaded resumes.
+
+Rasterization (poppler subprocesses) and JPEG encoding are CPU bound, so a
+batch of uploads is spread over a bounded process pool. Results are yielded as
+soon as each file completes, and a failure in one file never aborts the batch.
+Identical PDFs being prepared at the same time (the same resume uploaded by
+several sessions) share one preparation. ``extract_texts`` reads only the
+text layers, for ranking a pool before anything is rasterized.
+"""
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from page_cache import compute_content_hash
+from pdf_processing import extract_text_layer, prepare_pdf_bytes, MAX_RENDER_PAGES
+from single_flight import SingleFlight
+
+# Upper bound on worker processes (defaults to the number of cores, capped at 8)
+INGEST_MAX_WORKERS = int(os.getenv("ATS_INGEST_MAX_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+_pool = None
+_pool_lock = threading.Lock()
+# Bounds inline preparation when there is no pool to queue on
+_inline_slots = threading.BoundedSemaphore(max(1, INGEST_MAX_WORKERS))
+# Preparations in flight, keyed by (content hash, extraction mode)
+_inline_flights = SingleFlight()
+_pool_flights = {}
+_pool_flights_lock = threading.Lock()
+# Pool each submitted preparation runs on, for resetting the right pool when it breaks
+_future_pools = weakref.WeakKeyDictionary()
+
+
+def _get_pool():
+    """Return the long-lived ingestion pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # "spawn" avoids forking the multi-threaded Streamlit server process
+            _pool = ProcessPoolExecutor(
+                max_workers=INGEST_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _reset_pool(broken):
+    """
+    Drop a broken pool so the next batch starts with fresh workers. Does nothing
+    once ``broken`` was already replaced, so the other futures of the same broken
+    pool do not shut down its healthy successor.
+    """
+    global _pool
+    with _pool_lock:
+        if broken is None or _pool is not broken:
+            return
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _pages_per_file(file_count):
+    """Split the cores between files so small batches still render pages in parallel."""
+    spare = max(1, (os.cpu_count() or 1) // max(1, file_count))
+    return min(MAX_RENDER_PAGES, spare)
+
+
+def _ingest_one(file_name, pdf_bytes, extraction_mode, thread_count):
+    """Worker entry point: prepare a single PDF, capturing errors as data."""
+    try:
+        return file_name, prepare_pdf_bytes(pdf_bytes, extraction_mode, thread_count), None
+    except Exception as e:
+        return file_name, None, str(e)
+
+
+def _ingest_inline(file_name, pdf_bytes, extraction_mode, thread_count, slots=None):
+    """
+    Prepare a PDF on the calling thread, joining an identical preparation in
+    flight. Only the thread doing the work takes one of ``slots``, if given.
+    """
+    def prepare():
+        if slots is None:
+            return _ingest_one(file_name, pdf_bytes, extraction_mode, thread_count)
+        with slots:
+            return _ingest_one(file_name, pdf_bytes, extraction_mode, thread_count)
+
+    _, prepared, error = _inline_flights.do((compute_content_hash(pdf_bytes), extraction_mode), prepare)
+    return file_name, prepared, error
+
+
+def _submit_coalesced(pool, pdf_bytes, extraction_mode, thread_count):
+    """Submit a PDF to the pool, or return the future of an identical one in flight."""
+    key = (compute_content_hash(pdf_bytes), extraction_mode)
+    with _pool_flights_lock:
+        future = _pool_flights.get(key)
+        if future is not None:
+            return future
+        future = _pool_flights[key] = pool.submit(_ingest_one, "", pdf_bytes, extraction_mode, thread_count)
+        _future_pools[future] = pool
+
+    def forget(done):
+        with _pool_flights_lock:
+            if _pool_flights.get(key) is done:
+                del _pool_flights[key]
+
+    future.add_done_callback(forget)
+    return future
+
+
+def _submit_all(pool, named_files, extraction_mode, thread_count):
+    """Returns {future: [file names]}; duplicate contents share a future."""
+    futures = {}
+    for file_name, pdf_bytes in named_files:
+        future = _submit_coalesced(pool, pdf_bytes, extraction_mode, thread_count)
+        futures.setdefault(future, []).append(file_name)
+    return futures
+
+
+def _future_outcomes(future, file_names):
+    try:
+        _, prepared, error = future.result()
+        return [(file_name, prepared, error) for file_name in file_names]
+    except BrokenProcessPool as e:
+        _reset_pool(_future_pools.get(future))
+        error = f"Error processing PDF: worker process failed ({e})"
+    except Exception as e:
+        error = f"Error processing PDF: {str(e)}"
+    return [(file_name, None, error) for file_name in file_names]
+
+
+def ingest_pdfs(named_files, extraction_mode=None):
+    """
+    Prepares a batch of PDFs concurrently.
+
+    Args:
+        named_files (list): (file_name, pdf_bytes) tuples
+        extraction_mode (str): Passed through to ``prepare_pdf_bytes``
+
+    Yields:
+        tuple: (file_name, prepared, error) in completion order. Exactly one of
+        ``prepared`` and ``error`` is set for every file.
+    """
+    if not named_files:
+        return
+
+    thread_count = _pages_per_file(len(named_files))
+
+    # A single file is not worth the IPC round trip
+    if len(named_files) == 1 or INGEST_MAX_WORKERS <= 1:
+        for file_name, pdf_bytes in named_files:
+            yield _ingest_inline(file_name, pdf_bytes, extraction_mode, thread_count)
+        return
+
+    pool = _get_pool()
+    try:
+        futures = _submit_all(pool, named_files, extraction_mode, thread_count)
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        futures = _submit_all(_get_pool(), named_files, extraction_mode, thread_count)
+
+    for future in as_completed(futures):
+        yield from _future_outcomes(future, futures[future])
+
+
+def _extract_text_one(file_name, pdf_bytes):
+    """Worker entry point: read the text layer of a single PDF ("" when it has none)."""
+    return file_name, extract_text_layer(pdf_bytes)
+
+
+def extract_texts(named_files):
+    """
+    Reads the text layers of a batch of PDFs concurrently, without rendering pages.
+
+    Args:
+        named_files (list): (file_name, pdf_bytes) tuples
+
+    Yields:
+        tuple: (file_name, text) in completion order; text is "" for PDFs without
+        a usable text layer or that could not be read
+    """
+    if len(named_files) <= 1 or INGEST_MAX_WORKERS <= 1:
+        for file_name, pdf_bytes in named_files:
+            yield _extract_text_one(file_name, pdf_bytes)
+        return
+
+    pool = _get_pool()
+    try:
+        futures = [pool.submit(_extract_text_one, file_name, pdf_bytes) for file_name, pdf_bytes in named_files]
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        pool = _get_pool()
+        futures = [pool.submit(_extract_text_one, file_name, pdf_bytes) for file_name, pdf_bytes in named_files]
+
+    names = {future: file_name for future, (file_name, _) in zip(futures, named_files)}
+    for future in as_completed(futures):
+        try:
+            yield future.result()
+        except BrokenProcessPool:
+            _reset_pool(pool)
+            yield names[future], ""
+        except Exception:
+            yield names[future], ""
+
+
+def prepare_pdf(file_name, pdf_bytes, extraction_mode=None):
+    """
+    Prepares one PDF on the shared ingestion pool, blocking until it is done.
+
+    For callers that handle many independent requests concurrently (such as
+    the API server): however many threads call it, at most INGEST_MAX_WORKERS
+    PDFs are rasterized at a time and the rest wait their turn.
+
+    Returns:
+        tuple: (file_name, prepared, error) as yielded by ``ingest_pdfs``
+    """
+    if INGEST_MAX_WORKERS <= 1:
+        return _ingest_inline(file_name, pdf_bytes, extraction_mode, 1, slots=_inline_slots)
+
+    pool = _get_pool()
+    try:
+        future = _submit_coalesced(pool, pdf_bytes, extraction_mode, 1)
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        future = _submit_coalesced(_get_pool(), pdf_bytes, extraction_mode, 1)
+    return _future_outcomes(future, [file_name])[0]
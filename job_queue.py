@@ -0,0 +1,384 @@
+"""
+Background job subsystem.
+
+Long analyses run on a worker pool owned by the process instead of inside the
+Streamlit script thread, so reruns caused by widget interaction never block on
+or interrupt a batch. Job status, progress and per-item results are persisted
+in SQLite so any session (or a later process) can poll them by job ID; large
+intermediate artifacts such as rendered pages stay in memory until released.
+
+Several processes (Streamlit replicas, the API server) may share one job
+database. Every job records the manager that owns it, and owners refresh a
+heartbeat while their jobs are unfinished; only jobs whose owner has exited
+or stopped beating are flagged as interrupted.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+JOB_WORKERS = int(os.getenv("ATS_JOB_WORKERS", "2"))
+JOB_DB_PATH = os.getenv("ATS_JOB_DB_PATH", os.path.join(".cache", "jobs.sqlite3"))
+JOB_ARTIFACT_TTL = 3600  # Seconds unreleased artifacts of finished jobs are kept
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("ATS_JOB_HEARTBEAT_INTERVAL", "10"))  # Seconds between owner heartbeats
+JOB_HEARTBEAT_TIMEOUT = float(os.getenv("ATS_JOB_HEARTBEAT_TIMEOUT", "60"))  # Silence after which an owner is gone
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED, INTERRUPTED)
+
+# Identifies this process as a job owner; the nonce tells it apart from an
+# earlier process that had the same pid
+PROCESS_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function to stop after a cancellation request."""
+
+
+def _owner_exited(owner, current_owner):
+    """
+    True when ``owner`` names a process on this host that no longer runs.
+
+    Owners are "host:pid:nonce" (see PROCESS_OWNER); our own pid with another
+    nonce is an earlier process whose pid was reused (such as PID 1 after a
+    container restart).
+    """
+    try:
+        host, pid, _ = owner.split(":")
+        pid = int(pid)
+    except (AttributeError, ValueError):
+        return False
+    current_host, current_pid, _ = current_owner.split(":")
+    if host != current_host:
+        return False  # Only the heartbeat can tell for another host
+    if pid == int(current_pid):
+        return owner != current_owner
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False  # Exists but belongs to someone else
+    return False
+
+
+class JobStore:
+    """SQLite persistence for job state and per-item results."""
+
+    def __init__(self, path=JOB_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT NOT NULL DEFAULT '',
+                    error TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    owner TEXT,
+                    heartbeat_at REAL
+                )
+                """
+            )
+            # Databases created before jobs had owners
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_results (
+                    job_id TEXT NOT NULL,
+                    item TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    response TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, item, action)
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self, job_id, kind, owner=None):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, created_at, updated_at, owner, heartbeat_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, now, now, owner, now)
+            )
+
+    def update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def add_result(self, job_id, item, action, response, error):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_results (job_id, item, action, response, error, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, item, action or "", response, error, time.time())
+            )
+
+    def get(self, job_id):
+        """Return the job as a dict (with its results in insertion order) or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = dict(row)
+            job["results"] = [
+                dict(result) for result in conn.execute(
+                    "SELECT item, action, response, error FROM job_results "
+                    "WHERE job_id = ? ORDER BY created_at", (job_id,)
+                )
+            ]
+        return job
+
+    def cancel_requested(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def heartbeat(self, owner):
+        """Mark the unfinished jobs of ``owner`` as still alive."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status IN (?, ?)",
+                (time.time(), owner, QUEUED, RUNNING)
+            )
+
+    def mark_interrupted(self, current_owner, timeout=JOB_HEARTBEAT_TIMEOUT):
+        """
+        Flag unfinished jobs whose owner is gone: its process exited, or it
+        has not sent a heartbeat for ``timeout`` seconds.
+
+        Returns:
+            int: Number of jobs flagged
+        """
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, owner, COALESCE(heartbeat_at, updated_at) AS seen_at FROM jobs "
+                "WHERE status IN (?, ?) AND (owner IS NULL OR owner != ?)",
+                (QUEUED, RUNNING, current_owner)
+            ).fetchall()
+            orphaned = [
+                row["id"] for row in rows
+                if row["seen_at"] < now - timeout or _owner_exited(row["owner"], current_owner)
+            ]
+            for job_id in orphaned:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, message = 'Interrupted: its process stopped', updated_at = ? "
+                    "WHERE id = ? AND status IN (?, ?)",
+                    (INTERRUPTED, now, job_id, QUEUED, RUNNING)
+                )
+        return len(orphaned)
+
+
+class JobContext:
+    """Handle passed to a running job for reporting progress and results."""
+
+    def __init__(self, manager, job_id):
+        self._manager = manager
+        self.job_id = job_id
+
+    def is_cancelled(self):
+        return self._manager.is_cancelled(self.job_id)
+
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation was requested."""
+        if self.is_cancelled():
+            raise JobCancelled()
+
+    def set_progress(self, progress, message=""):
+        self._manager.store.update(self.job_id, progress=min(1.0, max(0.0, progress)), message=message)
+
+    def add_result(self, item, action, response, error=None):
+        self._manager.store.add_result(self.job_id, item, action, response, error)
+        self._manager.clear_partial(self.job_id, item, action)
+
+    def set_partial(self, item, action, text):
+        """Publish the text generated so far for an item that is still streaming."""
+        self._manager.set_partial(self.job_id, item, action, text)
+
+    def set_artifact(self, key, value):
+        self._manager.set_artifact(self.job_id, key, value)
+
+
+class JobManager:
+    """Runs jobs on a bounded thread pool and tracks their state in a JobStore."""
+
+    def __init__(self, store=None, workers=JOB_WORKERS, heartbeat_interval=JOB_HEARTBEAT_INTERVAL):
+        self.store = store or JobStore()
+        self.owner_id = PROCESS_OWNER
+        self.store.mark_interrupted(self.owner_id)
+        # Beats for this manager's jobs and sweeps up jobs of vanished owners;
+        # the thread holds no reference to the manager and stops with it
+        stop = threading.Event()
+        threading.Thread(
+            target=_heartbeat_loop, args=(self.store, self.owner_id, heartbeat_interval, stop),
+            name="ats-job-heartbeat", daemon=True
+        ).start()
+        weakref.finalize(self, stop.set)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ats-job")
+        self._lock = threading.Lock()
+        self._cancel_events = {}
+        self._artifacts = {}  # job_id -> (finished_at or None, {key: value})
+        self._partials = {}  # job_id -> {(item, action): text generated so far}
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """
+        Queue ``fn(ctx, *args, **kwargs)`` as a background job.
+
+        Returns:
+            str: The job ID
+        """
+        self._sweep_artifacts()
+        job_id = uuid.uuid4().hex
+        self.store.create(job_id, kind, owner=self.owner_id)
+        with self._lock:
+            self._cancel_events[job_id] = threading.Event()
+            self._artifacts[job_id] = (None, {})
+            self._partials[job_id] = {}
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, fn, args, kwargs):
+        ctx = JobContext(self, job_id)
+        try:
+            if self.is_cancelled(job_id):
+                raise JobCancelled()
+            self.store.update(job_id, status=RUNNING)
+            fn(ctx, *args, **kwargs)
+            status, error = (CANCELLED, None) if self.is_cancelled(job_id) else (COMPLETED, None)
+        except JobCancelled:
+            status, error = CANCELLED, None
+        except Exception as e:
+            status, error = FAILED, str(e)
+
+        fields = {"status": status, "error": error}
+        if status == COMPLETED:
+            fields["progress"] = 1.0
+        self.store.update(job_id, **fields)
+        with self._lock:
+            self._cancel_events.pop(job_id, None)
+            self._partials.pop(job_id, None)  # Unfinished streams are dropped
+            if job_id in self._artifacts:
+                self._artifacts[job_id] = (time.time(), self._artifacts[job_id][1])
+
+    def get(self, job_id):
+        """Return the persisted job state (see JobStore.get)."""
+        return self.store.get(job_id)
+
+    def cancel(self, job_id):
+        """Request cancellation; the job stops at its next checkpoint."""
+        self.store.update(job_id, cancel_requested=1)
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+        if event:
+            event.set()
+
+    def is_cancelled(self, job_id):
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+        if event and event.is_set():
+            return True
+        return self.store.cancel_requested(job_id)
+
+    def set_artifact(self, job_id, key, value):
+        with self._lock:
+            if job_id in self._artifacts:
+                self._artifacts[job_id][1][key] = value
+
+    def get_artifacts(self, job_id):
+        """Return a snapshot of the in-memory artifacts of a job."""
+        with self._lock:
+            _, artifacts = self._artifacts.get(job_id, (None, {}))
+            return dict(artifacts)
+
+    def set_partial(self, job_id, item, action, text):
+        with self._lock:
+            if job_id in self._partials:
+                self._partials[job_id][(item, action or "")] = text
+
+    def clear_partial(self, job_id, item, action):
+        with self._lock:
+            self._partials.get(job_id, {}).pop((item, action or ""), None)
+
+    def get_partials(self, job_id):
+        """
+        Return a snapshot of the in-progress (streaming) outputs of a running job.
+
+        Returns:
+            dict: {(item, action): text generated so far}; entries disappear once
+            the final result is recorded
+        """
+        with self._lock:
+            return dict(self._partials.get(job_id, {}))
+
+    def release(self, job_id):
+        """Free the in-memory artifacts of a job once they have been consumed."""
+        with self._lock:
+            self._artifacts.pop(job_id, None)
+
+    def _sweep_artifacts(self):
+        cutoff = time.time() - JOB_ARTIFACT_TTL
+        with self._lock:
+            for job_id, (finished_at, _) in list(self._artifacts.items()):
+                if finished_at is not None and finished_at < cutoff:
+                    del self._artifacts[job_id]
+
+
+def _heartbeat_loop(store, owner, interval, stop):
+    while not stop.wait(interval):
+        try:
+            store.heartbeat(owner)
+            store.mark_interrupted(owner)
+        except sqlite3.Error:
+            pass  # Try again on the next beat
+
+
+_default_manager = None
+_default_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Return the process-wide job manager (shared by every Streamlit session)."""
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is None:
+            _default_manager = JobManager()
+        return _default_manager
@@ -0,0 +1,209 @@
+"""
+Leaderboard report for large candidate pools.
+
+The report is a ranked summary table of every candidate followed by a
+per-candidate appendix with their analyses. ReportLab keeps every finished
+page uncompressed until the document is saved, so the report is laid out in
+segments of a bounded number of candidates: each segment is rendered to a
+temporary file from a generator of flowables (fed through a small sliding
+window, with the summary table split into fixed-size LongTable chunks) and the
+segments are then concatenated into the output file or stream. Peak layout
+memory therefore stays flat as the pool grows.
+"""
+import os
+import re
+import tempfile
+from datetime import datetime
+from itertools import islice
+
+from pypdf import PdfWriter
+
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, LongTable
+
+from markdown_parser import render_inline
+from pdf_generator import get_report_templates, render_markdown, DEFAULT_THEME
+
+LEADERBOARD_TABLE_ROWS = 100  # Rows per LongTable chunk of the summary table
+LEADERBOARD_SEGMENT_ROWS = 500  # Summary table rows laid out per segment
+LEADERBOARD_SEGMENT_APPENDICES = 50  # Candidate appendices laid out per segment
+LEADERBOARD_WINDOW = 64  # Flowables buffered ahead of the layout engine
+LEADERBOARD_TOP_GAPS = 3
+
+_MATCH_PATTERN = re.compile(r'match(?:\s+percentage)?\W{0,10}(\d{1,3})\s*%', re.IGNORECASE)
+
+
+def extract_match_percentage(analyses):
+    """
+    Find the match percentage reported in a candidate's analyses.
+
+    Args:
+        analyses (dict): {analysis title: response}
+
+    Returns:
+        int: The first percentage stated as a match, or None
+    """
+    for response in analyses.values():
+        match = _MATCH_PATTERN.search(response or "")
+        if match and int(match.group(1)) <= 100:
+            return int(match.group(1))
+    return None
+
+
+class _FlowableStream(list):
+    """
+    List facade over a flowable generator for ``doc.build``.
+
+    ReportLab consumes the story from the front; the list is topped up to
+    ``window`` items whenever its length is checked, so only a small window of
+    flowables exists at any time.
+    """
+
+    def __init__(self, flowables, window=LEADERBOARD_WINDOW):
+        super().__init__()
+        self._source = iter(flowables)
+        self._window = window
+        self._fill()
+
+    def _fill(self):
+        size = super().__len__()
+        if self._source is not None and size < self._window:
+            chunk = list(islice(self._source, self._window - size))
+            if len(chunk) < self._window - size:
+                self._source = None
+            self.extend(chunk)
+
+    def __len__(self):
+        self._fill()
+        return super().__len__()
+
+
+def _summary_tables(ranked, first, last, templates):
+    styles = templates.styles
+    header = [Paragraph(text, styles['table_header'])
+              for text in ('#', 'Candidate', 'AI Match', 'Keyword Score', 'Top Gaps')]
+    col_widths = [0.5 * inch, 2.3 * inch, 0.8 * inch, 0.9 * inch, 2.2 * inch]
+
+    for start in range(first, last, LEADERBOARD_TABLE_ROWS):
+        rows = [header]
+        end = min(start + LEADERBOARD_TABLE_ROWS, last)
+        for position, candidate in enumerate(ranked[start:end], start + 1):
+            match = candidate.get('match')
+            prescore = candidate.get('prescore')
+            rows.append([
+                Paragraph(str(position), styles['table_cell']),
+                Paragraph(render_inline(candidate['name']), styles['table_cell']),
+                Paragraph(f"{match:g}%" if match is not None else "–", styles['table_cell']),
+                Paragraph(f"{prescore:g}" if prescore is not None else "–", styles['table_cell']),
+                Paragraph(render_inline(", ".join(candidate.get('gaps', [])[:LEADERBOARD_TOP_GAPS])),
+                          styles['table_cell']),
+            ])
+        table = LongTable(rows, colWidths=col_widths, repeatRows=1, hAlign='LEFT')
+        table.setStyle(templates.table_styles['markdown_table'])
+        table.setStyle(templates.table_styles['markdown_table_header'])
+        yield table
+
+
+def _summary_segment(ranked, first, last, templates, title):
+    styles = templates.styles
+    if first == 0:
+        yield Paragraph(render_inline(title), styles['title'])
+        yield Paragraph(
+            f"{len(ranked)} candidate(s) ranked on {datetime.now().strftime('%B %d, %Y')}",
+            styles['caption']
+        )
+        yield Paragraph(
+            "AI Match is the match percentage of the AI analysis. Keyword Score is the local "
+            "pre-screening score (0-100) and is not on the same scale; candidates without an "
+            "AI analysis are ranked after those with one, by keyword score.",
+            styles['caption']
+        )
+        yield Spacer(1, 20)
+    yield from _summary_tables(ranked, first, last, templates)
+
+
+def _appendix_segment(ranked, first, last, analyses_for, templates, on_candidate):
+    styles = templates.styles
+    for position in range(first + 1, last + 1):
+        candidate = ranked[position - 1]
+        if on_candidate:
+            on_candidate(position, candidate)
+        analyses = analyses_for(candidate['name']) if analyses_for else None
+        if not analyses:
+            continue
+        yield PageBreak()
+        yield Paragraph(f"#{position}: {render_inline(candidate['name'])}", styles['subtitle'])
+        for analysis_title, response in analyses.items():
+            yield Paragraph(render_inline(analysis_title), styles['heading1'])
+            yield from render_markdown(response, templates)
+
+
+def _leaderboard_segments(ranked, analyses_for, templates, title, on_candidate):
+    """Yield one flowable generator per segment of the report."""
+    for first in range(0, max(len(ranked), 1), LEADERBOARD_SEGMENT_ROWS):
+        yield _summary_segment(ranked, first, min(first + LEADERBOARD_SEGMENT_ROWS, len(ranked)), templates, title)
+    for first in range(0, len(ranked), LEADERBOARD_SEGMENT_APPENDICES):
+        yield _appendix_segment(
+            ranked, first, min(first + LEADERBOARD_SEGMENT_APPENDICES, len(ranked)),
+            analyses_for, templates, on_candidate
+        )
+
+
+def _render_segment(flowables, path, templates):
+    """Lay out one segment into a temporary PDF; returns False if it had no content."""
+    stream = _FlowableStream(flowables)
+    if not len(stream):
+        return False
+    # Appendix segments start with a page break that would leave a blank first page
+    if isinstance(stream[0], PageBreak):
+        del stream[0]
+    doc = SimpleDocTemplate(path, pageCompression=1, **templates.page_layout)
+    doc.build(stream)
+    return True
+
+
+def build_leaderboard_pdf(candidates, output, analyses_for=None, theme=DEFAULT_THEME,
+                          title="Candidate Leaderboard", on_candidate=None):
+    """
+    Renders a ranked leaderboard PDF into ``output``.
+
+    Args:
+        candidates (list): Dicts with name, match (AI match 0-100 or None), prescore
+            (keyword score 0-100 or None) and gaps (list of str)
+        output: File path or writable binary stream
+        analyses_for (callable): Returns {analysis title: response} for a candidate
+            name, loaded lazily for its appendix; None or empty skips the appendix
+        theme (str): Name of a registered PDF theme
+        title (str): Report title
+        on_candidate (callable): Called as ``on_candidate(position, candidate)``
+            while appendices are rendered (progress and cancellation checks)
+
+    Returns:
+        int: Number of candidates in the report
+    """
+    templates = get_report_templates(theme)
+    # AI-scored candidates first, then the rest by keyword score, then unscored ones
+    ranked = sorted(
+        candidates,
+        key=lambda candidate: (
+            candidate.get('match') is None,
+            -(candidate.get('match') or 0),
+            candidate.get('prescore') is None,
+            -(candidate.get('prescore') or 0),
+            candidate['name'],
+        )
+    )
+
+    writer = PdfWriter()
+    with tempfile.TemporaryDirectory(prefix="ats-leaderboard-") as segment_dir:
+        for index, segment in enumerate(_leaderboard_segments(ranked, analyses_for, templates, title, on_candidate)):
+            path = os.path.join(segment_dir, f"segment_{index:05d}.pdf")
+            if _render_segment(segment, path, templates):
+                writer.append(path)
+        writer.add_metadata({
+            "/Title": f"ATS Resume Expert - {title}",
+            "/Author": "ATS Resume Expert",
+            "/Subject": "Candidate Leaderboard",
+        })
+        writer.write(output)
+    return len(ranked)
@@ -0,0 +1,325 @@
+"""
+Pluggable LLM backends.
+
+Every model call goes through a backend with two methods: ``generate`` returns
+the full response text and ``stream`` yields text chunks. Backends:
+
+- ``gemini``: the Google Gemini API through the shared gemini_client
+- ``mock``: an in-process fake with configurable latency, errors and 429s
+- ``http``: a client for ``mock_llm_server.py`` (or any server speaking its protocol)
+
+The backend is chosen with ``ATS_LLM_BACKEND``; the mock backends let the
+pipeline be load-tested offline, measuring everything except the model itself.
+``ATS_LLM_CASSETTE_MODE`` records or replays real traffic (see llm_cassette).
+"""
+import base64
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+
+LLM_BACKEND = os.getenv("ATS_LLM_BACKEND", "gemini")
+LLM_BACKEND_URL = os.getenv("ATS_LLM_BACKEND_URL", "http://127.0.0.1:8765")
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+class LLMBackend:
+    """Interface of a model backend."""
+
+    name = "base"
+
+    def generate(self, parts, model_name, generation_config=None, timeout=None):
+        """
+        Run one request.
+
+        Args:
+            parts (list): Content parts (strings and/or {"mime_type", "data"} dicts)
+            model_name (str): Model to use
+            generation_config (dict): Optional generation settings
+            timeout (float): Seconds the request may take
+
+        Returns:
+            str: The response text
+        """
+        raise NotImplementedError
+
+    def stream(self, parts, model_name, generation_config=None, timeout=None):
+        """Run one request, yielding the response text in chunks."""
+        yield self.generate(parts, model_name, generation_config, timeout)
+
+
+class GeminiBackend(LLMBackend):
+    """The Google Gemini API."""
+
+    name = "gemini"
+
+    def generate(self, parts, model_name, generation_config=None, timeout=None):
+        import gemini_client
+        response = gemini_client.generate_content(
+            parts, model_name=model_name, generation_config=generation_config,
+            request_options={"timeout": timeout} if timeout else None
+        )
+        return response.text
+
+    def stream(self, parts, model_name, generation_config=None, timeout=None):
+        import gemini_client
+        response = gemini_client.generate_content(
+            parts, model_name=model_name, generation_config=generation_config, stream=True,
+            request_options={"timeout": timeout} if timeout else None
+        )
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class MockUpstreamError(Exception):
+    """HTTP-style failure raised by the mock backend (``code`` holds the status)."""
+
+    def __init__(self, message, code, retry_after=None):
+        super().__init__(message)
+        self.code = code
+        self.headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+
+
+class MockConfig:
+    """
+    Behavior of the mock backend.
+
+    Args:
+        latency_median_ms (float): Median total response latency
+        latency_p99_ms (float): 99th percentile latency (log-normal distribution)
+        first_chunk_ratio (float): Share of the latency spent before the first streamed chunk
+        error_rate (float): Probability of a 503 response
+        rate_limit_rate (float): Probability of a random 429 response
+        rpm_limit (int): Requests per minute before every further request gets a 429 (0 disables)
+        retry_after (float): Retry-After seconds sent with 429 responses
+        chunk_count (int): Chunks per streamed response
+        seed (int): Seed for reproducible runs
+    """
+
+    def __init__(self, latency_median_ms=800, latency_p99_ms=3000, first_chunk_ratio=0.2, error_rate=0.0,
+                 rate_limit_rate=0.0, rpm_limit=0, retry_after=1.0, chunk_count=8, seed=None):
+        self.latency_median_ms = latency_median_ms
+        self.latency_p99_ms = max(latency_p99_ms, latency_median_ms)
+        self.first_chunk_ratio = first_chunk_ratio
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rpm_limit = rpm_limit
+        self.retry_after = retry_after
+        self.chunk_count = max(1, chunk_count)
+        self.seed = seed
+
+    @classmethod
+    def from_env(cls):
+        """Build a config from ``ATS_MOCK_*`` environment variables."""
+        seed = os.getenv("ATS_MOCK_SEED")
+        return cls(
+            latency_median_ms=float(os.getenv("ATS_MOCK_LATENCY_MEDIAN_MS", "800")),
+            latency_p99_ms=float(os.getenv("ATS_MOCK_LATENCY_P99_MS", "3000")),
+            error_rate=float(os.getenv("ATS_MOCK_ERROR_RATE", "0")),
+            rate_limit_rate=float(os.getenv("ATS_MOCK_RATE_LIMIT_RATE", "0")),
+            rpm_limit=int(os.getenv("ATS_MOCK_RPM_LIMIT", "0")),
+            retry_after=float(os.getenv("ATS_MOCK_RETRY_AFTER", "1")),
+            seed=int(seed) if seed else None,
+        )
+
+
+class MockBackend(LLMBackend):
+    """In-process fake model with configurable latency, error and 429 behavior."""
+
+    name = "mock"
+
+    def __init__(self, config=None, sleep=time.sleep, clock=time.monotonic):
+        self.config = config or MockConfig()
+        self._sleep = sleep
+        self._clock = clock
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._recent = deque()  # Request times within the last minute
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0}
+
+    def _sample_latency(self):
+        """Latency in seconds from a log-normal with the configured median and p99."""
+        mu = math.log(max(self.config.latency_median_ms, 0.001))
+        sigma = max(0.0, (math.log(max(self.config.latency_p99_ms, 0.001)) - mu) / 2.326)
+        with self._lock:
+            return self._random.lognormvariate(mu, sigma) / 1000.0
+
+    def _admit(self):
+        """Apply the configured failure behavior; raises MockUpstreamError."""
+        config = self.config
+        with self._lock:
+            self.stats["requests"] += 1
+            now = self._clock()
+            while self._recent and self._recent[0] <= now - 60:
+                self._recent.popleft()
+            over_limit = config.rpm_limit and len(self._recent) >= config.rpm_limit
+            if not over_limit:
+                self._recent.append(now)
+            roll = self._random.random()
+            if over_limit or roll < config.rate_limit_rate:
+                self.stats["rate_limited"] += 1
+                raise MockUpstreamError("429 Resource has been exhausted (e.g. check quota).", 429, config.retry_after)
+            if roll < config.rate_limit_rate + config.error_rate:
+                self.stats["errors"] += 1
+                raise MockUpstreamError("503 The service is currently unavailable.", 503)
+
+    def _wait(self, seconds, timeout):
+        if timeout is not None and seconds > timeout:
+            self._sleep(timeout)
+            raise TimeoutError(f"Mock request timed out after {timeout:.1f} seconds")
+        self._sleep(seconds)
+
+    def generate(self, parts, model_name, generation_config=None, timeout=None):
+        self._admit()
+        self._wait(self._sample_latency(), timeout)
+        return mock_response_text(parts, generation_config)
+
+    def stream(self, parts, model_name, generation_config=None, timeout=None):
+        self._admit()
+        latency = self._sample_latency()
+        text = mock_response_text(parts, generation_config)
+        chunk_size = max(1, math.ceil(len(text) / self.config.chunk_count))
+        chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        first_wait = latency * self.config.first_chunk_ratio
+        self._wait(first_wait, timeout)
+        for index, chunk in enumerate(chunks):
+            if index:
+                self._sleep((latency - first_wait) / max(1, len(chunks) - 1))
+            yield chunk
+
+
+def mock_response_text(parts, generation_config=None):
+    """
+    Deterministic fake answer for a request: the same parts always produce the
+    same text, JSON when a JSON response was requested.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, dict):
+            digest.update(part.get("data", b"") if isinstance(part.get("data"), bytes) else str(part).encode())
+        else:
+            digest.update(str(part).encode("utf-8"))
+    seed = int(digest.hexdigest()[:8], 16)
+    match = 40 + seed % 56
+
+    if (generation_config or {}).get("response_mime_type") == "application/json":
+        from prompts import COMBINED_ANALYSIS_SCHEMA
+        analysis = {}
+        for field, description in COMBINED_ANALYSIS_SCHEMA.items():
+            if description.startswith("integer"):
+                analysis[field] = match
+            elif description.startswith("list"):
+                analysis[field] = [f"Mock {field.replace('_', ' ')} {i}" for i in range(1, 4)]
+            else:
+                analysis[field] = f"Mock {field.replace('_', ' ')}."
+        return json.dumps(analysis)
+
+    return (
+        f"**Match Percentage: {match}%**\n\n"
+        "### Strengths\n"
+        "- Strong Python and SQL experience\n"
+        "- Relevant project work with measurable results\n\n"
+        "### Gaps\n"
+        "- Missing cloud certification\n"
+        "- Limited leadership examples\n\n"
+        f"This is a mock response (request {seed:08x})."
+    )
+
+
+def _encode_parts(parts):
+    encoded = []
+    for part in parts:
+        if isinstance(part, dict):
+            data = part.get("data", b"")
+            encoded.append({
+                "mime_type": part.get("mime_type"),
+                "data": base64.b64encode(data).decode("ascii") if isinstance(data, bytes) else data,
+            })
+        else:
+            encoded.append(part)
+    return encoded
+
+
+class HTTPBackend(LLMBackend):
+    """Client for ``mock_llm_server.py`` (POST /generate, newline-delimited JSON when streaming)."""
+
+    name = "http"
+
+    def __init__(self, base_url=LLM_BACKEND_URL):
+        self.base_url = base_url.rstrip("/")
+
+    def _post(self, payload, timeout):
+        request = urllib.request.Request(
+            f"{self.base_url}/generate",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            return urllib.request.urlopen(request, timeout=timeout)
+        except urllib.error.HTTPError:
+            raise  # Carries the status code and Retry-After header
+        except urllib.error.URLError as e:
+            raise ConnectionError(f"Cannot reach the LLM backend at {self.base_url}: {e.reason}")
+
+    def generate(self, parts, model_name, generation_config=None, timeout=None):
+        payload = {"parts": _encode_parts(parts), "model": model_name, "generation_config": generation_config}
+        with self._post(payload, timeout) as response:
+            return json.loads(response.read())["text"]
+
+    def stream(self, parts, model_name, generation_config=None, timeout=None):
+        payload = {
+            "parts": _encode_parts(parts), "model": model_name,
+            "generation_config": generation_config, "stream": True,
+        }
+        with self._post(payload, timeout) as response:
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)["text"]
+
+
+def create_backend(name=None):
+    """Create a backend by name (defaults to ``ATS_LLM_BACKEND``)."""
+    name = name or LLM_BACKEND
+    if name == "gemini":
+        return GeminiBackend()
+    if name == "mock":
+        return MockBackend(MockConfig.from_env())
+    if name == "http":
+        return HTTPBackend()
+    raise ValueError(f"Unknown LLM backend: {name}")
+
+
+def create_configured_backend():
+    """Create the backend selected by the environment, wrapped in a cassette if one is enabled."""
+    from llm_cassette import CASSETTE_MODE, CassetteBackend
+    if CASSETTE_MODE == "replay":
+        return CassetteBackend("replay")
+    if CASSETTE_MODE == "record":
+        return CassetteBackend("record", create_backend())
+    return create_backend()
+
+
+def get_backend():
+    """Return the process-wide backend."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_configured_backend()
+        return _backend
+
+
+def set_backend(backend):
+    """Replace the process-wide backend (benchmarks and tests); returns the previous one."""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+        return previous
@@ -0,0 +1,132 @@
+"""
+Record/replay cassettes of model traffic.
+
+In ``record`` mode every successful request sent to the model backend is
+appended to a cassette file (JSON lines) together with its response chunks and
+their timing. In ``replay`` mode the cassette answers requests locally, at the
+recorded latency or instantly, so the whole app can be benchmarked or demoed
+with real-shaped responses and no API calls. Requests are keyed by the content
+hashes of their parts, the model name and the generation config.
+
+Recording happens at the backend, behind the response cache: use an empty
+``ATS_RESPONSE_CACHE_PATH`` when recording (and replaying, if cache hits should
+not short-circuit the cassette).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from llm_backends import LLMBackend
+from response_cache import hash_resume_content
+
+CASSETTE_MODE = os.getenv("ATS_LLM_CASSETTE_MODE", "")  # "", "record" or "replay"
+CASSETTE_PATH = os.getenv("ATS_LLM_CASSETTE_PATH", os.path.join(".cache", "cassette.jsonl"))
+CASSETTE_LATENCY = os.getenv("ATS_LLM_CASSETTE_LATENCY", "recorded")  # "recorded" or "zero"
+
+
+class CassetteMissError(LookupError):
+    """A replayed request was never recorded."""
+
+
+def cassette_key(parts, model_name, generation_config=None):
+    """Key of a request: hashes of its parts plus the model and generation config."""
+    return hashlib.sha256(json.dumps([
+        [hash_resume_content([part]) for part in parts],
+        model_name,
+        sorted((generation_config or {}).items()),
+    ]).encode("utf-8")).hexdigest()
+
+
+def load_cassette(path):
+    """
+    Read a cassette file.
+
+    Returns:
+        dict: {key: [[offset seconds, chunk text], ...]}; the latest recording of a key wins
+    """
+    recordings = {}
+    if not os.path.exists(path):
+        return recordings
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                recordings[entry["key"]] = entry["chunks"]
+            except (ValueError, KeyError):
+                continue  # A partially written last line from an interrupted run
+    return recordings
+
+
+class CassetteBackend(LLMBackend):
+    """
+    Backend that records traffic of an inner backend or replays a cassette.
+
+    Args:
+        mode (str): "record" or "replay"
+        inner (LLMBackend): Backend that answers requests while recording
+        path (str): Cassette file
+        latency (str): "recorded" replays the recorded timing, "zero" answers immediately
+    """
+
+    def __init__(self, mode, inner=None, path=CASSETTE_PATH, latency=CASSETTE_LATENCY,
+                 sleep=time.sleep, clock=time.monotonic):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if mode == "record" and inner is None:
+            raise ValueError("Recording needs a backend to record")
+        self.mode = mode
+        self.inner = inner
+        self.path = path
+        self.latency = latency
+        self.name = inner.name if mode == "record" else "cassette"
+        self._sleep = sleep
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._recordings = load_cassette(path) if mode == "replay" else {}
+
+    def _append(self, key, model_name, chunks):
+        entry = json.dumps({"key": key, "model": model_name, "recorded_at": time.time(), "chunks": chunks})
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(entry + "\n")
+
+    def _record(self, key, model_name, stream):
+        started = self._clock()
+        chunks = []
+        for chunk in stream:
+            chunks.append([round(self._clock() - started, 4), chunk])
+            yield chunk
+        # Only complete, successful responses are recorded
+        self._append(key, model_name, chunks)
+
+    def _replay(self, key, timeout):
+        chunks = self._recordings.get(key)
+        if chunks is None:
+            raise CassetteMissError(f"No recorded response for this request in {self.path}")
+        previous = 0.0
+        for offset, chunk in chunks:
+            if self.latency == "recorded":
+                if timeout is not None and offset > timeout:
+                    self._sleep(max(0.0, timeout - previous))
+                    raise TimeoutError(f"Replayed request timed out after {timeout:.1f} seconds")
+                self._sleep(max(0.0, offset - previous))
+                previous = offset
+            yield chunk
+
+    def generate(self, parts, model_name, generation_config=None, timeout=None):
+        key = cassette_key(parts, model_name, generation_config)
+        if self.mode == "replay":
+            return "".join(self._replay(key, timeout))
+        started = self._clock()
+        text = self.inner.generate(parts, model_name, generation_config, timeout)
+        self._append(key, model_name, [[round(self._clock() - started, 4), text]])
+        return text
+
+    def stream(self, parts, model_name, generation_config=None, timeout=None):
+        key = cassette_key(parts, model_name, generation_config)
+        if self.mode == "replay":
+            return self._replay(key, timeout)
+        return self._record(key, model_name, self.inner.stream(parts, model_name, generation_config, timeout))
@@ -1,60 +1,225 @@
-import google.generativeai as genai
+import itertools
+import json
 import os
+import re
+import threading
 import time
-from dotenv import load_dotenv
+from gemini_client import DEFAULT_MODEL_NAME
+from llm_backends import get_backend
+from rate_limiter import create_backend, window_bucket
+from resilience import MODEL_DEADLINE, CircuitBreaker, ModelCallError, call_with_resilience, classify_error
+from response_cache import get_response_cache, make_response_key
 
-# Rate limiting variables
-last_request_time = 0
-request_count = 0
-RATE_LIMIT = 14  # Stay under 15 requests per minute
+MODEL_NAME = DEFAULT_MODEL_NAME
+
+# Rate limiting settings
+RATE_LIMIT = int(os.getenv("ATS_RATE_LIMIT_RPM", "14"))  # Stay under 15 requests per minute
 RATE_WINDOW = 60  # 60 seconds
+RATE_LIMIT_BURST = int(os.getenv("ATS_RATE_LIMIT_BURST", "2"))  # Back-to-back requests; taken out of RATE_LIMIT
+RATE_LIMIT_MAX_WAIT = float(os.getenv("ATS_RATE_LIMIT_MAX_WAIT", "90"))  # Longest a request waits for a slot
+
+# Markdown fence some models wrap JSON replies in despite the JSON response type
+_JSON_FENCE_PATTERN = re.compile(r"^\s*```(?:json)?\s*\n?(.*?)\n?\s*```\s*$", re.DOTALL | re.IGNORECASE)
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+_circuit_breaker = CircuitBreaker()
+
+def get_rate_limiter():
+    """Return the shared token bucket (never more than RATE_LIMIT requests in any RATE_WINDOW)"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = window_bucket(
+                RATE_LIMIT, RATE_WINDOW, RATE_LIMIT_BURST,
+                name=MODEL_NAME,
+                backend=create_backend()
+            )
+        return _rate_limiter
+
+def rate_limit_check(timeout=RATE_LIMIT_MAX_WAIT):
+    """Wait for a request slot; return an error message only if none frees up before the deadline"""
+    if get_rate_limiter().acquire(timeout=timeout):
+        return None
+    return f"Rate limit reached. No request slot became available within {timeout:.0f} seconds."
+
+def get_circuit_breaker():
+    """Return the process-wide circuit breaker guarding model calls"""
+    return _circuit_breaker
+
+class RateLimitWaitExceeded(ModelCallError):
+    """Raised when no rate limit slot frees up before the request deadline."""
+
+def _acquire_slot(timeout):
+    """Wait for a rate limit slot, at most until the request deadline"""
+    rate_limit_error = rate_limit_check(min(RATE_LIMIT_MAX_WAIT, timeout))
+    if rate_limit_error:
+        raise RateLimitWaitExceeded(rate_limit_error)
+
+def _time_left(expires_at):
+    """Seconds left before a request deadline (``time.monotonic()`` based)"""
+    return max(0.0, expires_at - time.monotonic())
+
+def _cache_model(generation_config):
+    # Responses produced under a generation config or by a non-Gemini backend are cached separately
+    backend_name = get_backend().name
+    cache_model = MODEL_NAME if backend_name == "gemini" else f"{backend_name}:{MODEL_NAME}"
+    return cache_model if generation_config is None else f"{cache_model}|{sorted(generation_config.items())}"
+
+def _generate_cached(input_text, pdf_content, prompt, generation_config=None, validate=None):
+    """
+    Shared request path: response cache, then the model call through the
+    resilient call layer (circuit breaker, rate limiter, retries, deadline).
+    Identical requests in flight at the same time, from any session or
+    process, share a single model call. Waiting on an identical request in
+    another process counts against the MODEL_DEADLINE of this one.
+
+    Args:
+        validate (callable): Optional ``validate(text)`` run on a fresh response
+            before it is cached; returns the text to cache, or raises ValueError
+            so an unusable response is never cached
+
+    Returns:
+        str: The model's response text
+
+    Raises:
+        ModelCallError: A typed error once the request cannot succeed
+        ValueError: If ``validate`` rejects the response
+    """
+    expires_at = time.monotonic() + MODEL_DEADLINE
+    cache_model = _cache_model(generation_config)
+
+    # Answer repeated questions from the cache (does not count against the rate limit)
+    cache = get_response_cache()
+    cache_key = make_response_key(input_text, pdf_content, prompt, cache_model)
+
+    def attempt(timeout):
+        _acquire_slot(timeout)
+        return get_backend().generate(
+            [input_text, *pdf_content, prompt],
+            MODEL_NAME,
+            generation_config=generation_config,
+            timeout=timeout
+        )
+
+    def compute():
+        text = call_with_resilience(attempt, breaker=get_circuit_breaker(), deadline=_time_left(expires_at))
+        return validate(text) if validate else text
+
+    return cache.get_or_compute(cache_key, compute, cache_model, wait_timeout=_time_left(expires_at))
 
-def rate_limit_check():
-    """Check and enforce rate limiting"""
-    global last_request_time, request_count
-    
-    current_time = time.time()
-    
-    # Reset counter if a minute has passed
-    if current_time - last_request_time >= RATE_WINDOW:
-        request_count = 0
-        last_request_time = current_time
-    
-    # If we've hit the limit, wait
-    if request_count >= RATE_LIMIT:
-        wait_time = RATE_WINDOW - (current_time - last_request_time)
-        if wait_time > 0:
-            return f"Rate limit reached. Please wait {wait_time:.1f} seconds before trying again."
-    
-    request_count += 1
-    return None
-
-def get_gemini_response(input_text, pdf_content, prompt):
-    """
-    Sends the input text, PDF content, and prompt to the Gemini generative AI model.
+def stream_gemini_response(input_text, pdf_content, prompt):
     """
+    Streaming variant of the shared request path: yields response text chunks as
+    the model produces them. A cached response is yielded as a single chunk, and
+    the complete text is cached only once the stream finishes. Opening the stream
+    (up to the first chunk) is retried; a failure after text was yielded is not.
+    While an identical request is in flight elsewhere, its complete response is
+    awaited and yielded as a single chunk instead of calling the model again;
+    that wait counts against the MODEL_DEADLINE of this request.
+
+    Raises:
+        ModelCallError: A typed error once the request cannot succeed
+    """
+    expires_at = time.monotonic() + MODEL_DEADLINE
+    cache_model = _cache_model(None)
+    cache = get_response_cache()
+    cache_key = make_response_key(input_text, pdf_content, prompt, cache_model)
+    cached_response = cache.get(cache_key)
+    if cached_response is not None:
+        yield cached_response
+        return
+
+    def open_stream(timeout):
+        _acquire_slot(timeout)
+        stream = iter(get_backend().stream(
+            [input_text, *pdf_content, prompt],
+            MODEL_NAME,
+            timeout=timeout
+        ))
+        return next(stream, None), stream
+
+    with cache.coalesce(cache_key, cache_model, wait_timeout=_time_left(expires_at)) as flight:
+        if flight.cached is not None:
+            yield flight.cached
+            return
+
+        first_chunk, stream = call_with_resilience(
+            open_stream, breaker=get_circuit_breaker(), deadline=_time_left(expires_at)
+        )
+
+        chunks = []
+        try:
+            for chunk in itertools.chain([first_chunk] if first_chunk is not None else [], stream):
+                if chunk:
+                    chunks.append(chunk)
+                    yield chunk
+        except Exception as e:
+            raise classify_error(e) from e
+        flight.set("".join(chunks))
+
+def get_gemini_response(input_text, pdf_content, prompt, on_partial=None):
+    """
+    Sends the input text, PDF content, and prompt to the model through the
+    configured backend (see llm_backends).
+    Identical requests are answered from the persistent response cache without an API call.
+
+    Args:
+        on_partial (callable): When given, the response is streamed and
+            ``on_partial(text_so_far)`` is called as each chunk arrives
+
+    Returns:
+        str: The complete response
+
+    Raises:
+        ModelCallError: Typed failure (rate limited, transient, permanent, deadline
+            exceeded or circuit open); ``str(error)`` is a user-facing message
+    """
+    if on_partial is None:
+        return _generate_cached(input_text, pdf_content, prompt)
+    text = ""
+    for chunk in stream_gemini_response(input_text, pdf_content, prompt):
+        text += chunk
+        on_partial(text)
+    return text
+
+def _parse_analysis_json(text):
+    """Parse a combined analysis reply, tolerating a Markdown code fence around the JSON."""
+    fenced = _JSON_FENCE_PATTERN.match(text)
+    if fenced:
+        text = fenced.group(1)
     try:
-        # Check rate limiting first
-        rate_limit_error = rate_limit_check()
-        if rate_limit_error:
-            return rate_limit_error
-        
-        # Ensure environment variables are loaded
-        load_dotenv()
-        api_key = os.getenv("key")
-        
-        if not api_key:
-            return "Error: API key not found in environment variables."
-        
-        # Remove any quotes and configure
-        api_key = api_key.strip('"').strip("'")
-        genai.configure(api_key=api_key)
-        
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        response = model.generate_content([input_text, pdf_content[0], prompt])
-        return response.text
-    except Exception as e:
-        error_msg = str(e)
-        if "429" in error_msg or "quota" in error_msg.lower():
-            return "⚠️ Rate limit exceeded. Please wait a moment and try again. Consider upgrading to a paid plan for higher limits."
-        return f"Error generating response: {e}"
+        analysis = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Model returned invalid JSON: {e}")
+    if not isinstance(analysis, dict):
+        raise ValueError("Model returned JSON that is not an object")
+    return analysis
+
+def _validate_analysis_json(text):
+    """Cache only replies that parse to a JSON object, stored without any code fence."""
+    return json.dumps(_parse_analysis_json(text), ensure_ascii=False)
+
+def get_combined_analysis(input_text, pdf_content, prompt):
+    """
+    Runs every analysis for a resume in one request that returns structured JSON.
+
+    Args:
+        input_text (str): The job description
+        pdf_content (list): Resume content parts
+        prompt (str): Prompt from prompts.get_combined_prompt
+
+    Returns:
+        dict: Parsed analysis following prompts.COMBINED_ANALYSIS_SCHEMA
+
+    Raises:
+        ModelCallError: If the request fails
+        ValueError: If the model does not return a JSON object (such replies are
+            not cached, so the next call asks the model again)
+    """
+    text = _generate_cached(
+        input_text, pdf_content, prompt,
+        generation_config={"response_mime_type": "application/json"},
+        validate=_validate_analysis_json
+    )
+    return _parse_analysis_json(text)
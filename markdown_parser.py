@@ -0,0 +1,250 @@
+"""
+Single-pass markdown parser for AI responses.
+
+Responses are parsed line by line into a small block AST (headings, paragraphs,
+nested lists, tables, code and spacers) that the PDF renderer turns into
+flowables. Every line is classified with precompiled patterns only: one regex
+for block syntax, one alternation of all tone keywords and one regex for inline
+bold/italic/code and typography, so each line is scanned a constant number of
+times regardless of how many keywords or rules there are.
+
+Block nodes are plain dicts:
+    {'type': 'heading', 'level': int, 'text': str}      (1-6, or the bold/italic-only line levels)
+    {'type': 'paragraph', 'tone': str, 'text': str}     (body/success/warning/metric/quote)
+    {'type': 'list', 'ordered': bool, 'items': [{'marker', 'text', 'tone', 'children'}]}
+    {'type': 'table', 'header': list or None, 'rows': [list]}
+    {'type': 'code', 'text': str}
+    {'type': 'spacer'}
+Text fields hold the raw markdown of the line; use render_inline() to convert
+it into ReportLab paragraph markup.
+"""
+import re
+from xml.sax.saxutils import escape
+
+SUCCESS_KEYWORDS = ('excellent', 'strong', 'good match', 'well-suited', 'perfect', 'outstanding')
+WARNING_KEYWORDS = ('missing', 'lacks', 'needs improvement', 'consider adding', 'weak', 'insufficient')
+
+TAB_WIDTH = 4
+
+# Heading levels given to lines that are entirely bold or entirely italic
+STRONG_LINE_LEVEL = 0
+EMPHASIS_LINE_LEVEL = 7
+
+_BLOCK_PATTERN = re.compile(r"""
+    (?P<fence>```|~~~)
+  | (?P<heading>\#{1,6})[ \t]+(?P<heading_text>.*?)(?:[ \t]+\#+)?[ \t]*$
+  | (?P<rule>(?:-[ \t]*){3,}|(?:\*[ \t]*){3,}|(?:_[ \t]*){3,})$
+  | (?P<marker>[-*+•→▸]|\d{1,3}[.)])[ \t]+(?P<item>.*)
+  | \|(?P<table>.*)
+  | >[ \t]?(?P<quote>.*)
+  | \*\*\*?(?P<strong>[^*\s][^*]*?)\*\*\*?:?$
+  | __(?P<strong_alt>[^_\s][^_]*?)__:?$
+  | \*(?P<emphasis>[^*\s][^*]*?)\*:?$
+""", re.VERBOSE)
+
+# One alternation of every tone keyword; success keywords win over warnings
+_TONE_PATTERN = re.compile(
+    '|'.join(
+        [f'(?P<success{i}>{re.escape(k)})' for i, k in enumerate(SUCCESS_KEYWORDS)]
+        + [f'(?P<warning{i}>{re.escape(k)})' for i, k in enumerate(WARNING_KEYWORDS)]
+    ),
+    re.IGNORECASE
+)
+_METRIC_PATTERN = re.compile(r'\d+%')
+_QUOTE_PATTERN = re.compile(r'^["“]|recommend', re.IGNORECASE)
+_TABLE_SEPARATOR_PATTERN = re.compile(r'^[\s|:\-]+$')
+
+_INLINE_PATTERN = re.compile(r"""
+    \*\*\*(?P<bold_italic>[^*]+?)\*\*\*
+  | \*\*(?P<bold>.+?)\*\*
+  | __(?P<bold_alt>.+?)__
+  | (?<![\w*])\*(?P<italic>[^\s*](?:.*?[^\s*])?)\*(?![\w*])
+  | (?<![\w_])_(?P<italic_alt>[^\s_](?:.*?[^\s_])?)_(?![\w_])
+  | `(?P<code>[^`]+)`
+  | (?P<dash>--)
+  | (?P<ellipsis>\.\.\.)
+  | (?P<space_before_punct>[ \t]+)(?=[,!?;:]|\.(?!\.))
+""", re.VERBOSE)
+
+
+def classify_tone(text):
+    """
+    Classify a line of prose by its wording.
+
+    Returns:
+        str: 'success', 'warning', 'metric', 'quote' or 'body'
+    """
+    warning = False
+    for match in _TONE_PATTERN.finditer(text):
+        if match.lastgroup.startswith('success'):
+            return 'success'
+        warning = True
+    if warning:
+        return 'warning'
+    if _METRIC_PATTERN.search(text):
+        return 'metric'
+    if _QUOTE_PATTERN.search(text):
+        return 'quote'
+    return 'body'
+
+
+def _format_inline(escaped):
+    def replace(match):
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'bold_italic':
+            return f'<b><i>{_format_inline(value)}</i></b>'
+        if kind in ('bold', 'bold_alt'):
+            return f'<b>{_format_inline(value)}</b>'
+        if kind in ('italic', 'italic_alt'):
+            return f'<i>{_format_inline(value)}</i>'
+        if kind == 'code':
+            return f'<font face="Courier">{value}</font>'
+        if kind == 'dash':
+            return '—'
+        if kind == 'ellipsis':
+            return '…'
+        return ''  # Whitespace before punctuation
+    return _INLINE_PATTERN.sub(replace, escaped)
+
+
+def render_inline(text):
+    """
+    Convert inline markdown (bold, italic, code) into ReportLab paragraph markup,
+    escaping XML special characters and applying typography fixes in the same pass.
+
+    Args:
+        text (str): Raw markdown text of a single block
+
+    Returns:
+        str: Markup safe to pass to ``Paragraph``
+    """
+    return _format_inline(escape(text)).strip()
+
+
+def _split_table_row(row):
+    row = row.strip()
+    if row.endswith('|'):
+        row = row[:-1]
+    return [cell.strip() for cell in row.split('|')]
+
+
+def _indent_width(line):
+    width = 0
+    for char in line:
+        if char == ' ':
+            width += 1
+        elif char == '\t':
+            width += TAB_WIDTH - width % TAB_WIDTH
+        else:
+            break
+    return width
+
+
+def parse_markdown(text):
+    """
+    Parse markdown into a list of block nodes in a single pass over the lines.
+
+    Args:
+        text (str): The raw response content
+
+    Returns:
+        list: Block nodes (see the module docstring)
+    """
+    blocks = []
+    list_stack = []  # (indent, list node) of the open lists, outermost first
+    table = None
+    code_lines = None
+
+    def close_open_blocks():
+        nonlocal table
+        list_stack.clear()
+        table = None
+
+    for raw_line in (text or '').split('\n'):
+        line = raw_line.strip()
+
+        if code_lines is not None:
+            if line.startswith(('```', '~~~')):
+                blocks.append({'type': 'code', 'text': '\n'.join(code_lines)})
+                code_lines = None
+            else:
+                code_lines.append(raw_line.rstrip())
+            continue
+
+        if not line:
+            close_open_blocks()
+            if blocks and blocks[-1]['type'] != 'spacer':
+                blocks.append({'type': 'spacer'})
+            continue
+
+        match = _BLOCK_PATTERN.match(line)
+        kind = match.lastgroup if match else None
+        if kind == 'heading_text':
+            kind = 'heading'
+        elif kind == 'item':
+            kind = 'marker'
+
+        if kind == 'marker':
+            table = None
+            indent = _indent_width(raw_line)
+            while list_stack and list_stack[-1][0] > indent:
+                list_stack.pop()
+            marker = match.group('marker')
+            ordered = marker[0].isdigit()
+            item_text = match.group('item')
+            item = {'marker': marker, 'text': item_text, 'tone': classify_tone(item_text), 'children': []}
+            if list_stack and list_stack[-1][0] == indent and list_stack[-1][1]['ordered'] != ordered:
+                list_stack.pop()  # Switching between bullets and numbers starts a new list
+            if list_stack and list_stack[-1][0] == indent:
+                list_stack[-1][1]['items'].append(item)
+            else:
+                node = {'type': 'list', 'ordered': ordered, 'items': [item]}
+                if list_stack and list_stack[-1][1]['items']:
+                    list_stack[-1][1]['items'][-1]['children'].append(node)
+                else:
+                    blocks.append(node)
+                list_stack.append((indent, node))
+            continue
+
+        # An indented plain line continues the current list item
+        if list_stack and kind is None and _indent_width(raw_line) > list_stack[0][0]:
+            last_item = list_stack[-1][1]['items'][-1]
+            last_item['text'] = f"{last_item['text']} {line}"
+            continue
+
+        list_stack.clear()
+
+        if kind == 'table':
+            if _TABLE_SEPARATOR_PATTERN.match(line):
+                # The row above the separator is the header
+                if table is not None and table['header'] is None and len(table['rows']) == 1:
+                    table['header'] = table['rows'].pop()
+                continue
+            if table is None:
+                table = {'type': 'table', 'header': None, 'rows': []}
+                blocks.append(table)
+            table['rows'].append(_split_table_row(match.group('table')))
+            continue
+        table = None
+
+        if kind == 'fence':
+            code_lines = []
+        elif kind == 'heading':
+            blocks.append({'type': 'heading', 'level': len(match.group('heading')),
+                           'text': match.group('heading_text')})
+        elif kind == 'rule':
+            if blocks and blocks[-1]['type'] != 'spacer':
+                blocks.append({'type': 'spacer'})
+        elif kind in ('strong', 'strong_alt'):
+            blocks.append({'type': 'heading', 'level': STRONG_LINE_LEVEL, 'text': match.group(kind)})
+        elif kind == 'emphasis':
+            blocks.append({'type': 'heading', 'level': EMPHASIS_LINE_LEVEL, 'text': match.group(kind)})
+        elif kind == 'quote':
+            blocks.append({'type': 'paragraph', 'tone': 'quote', 'text': match.group('quote')})
+        else:
+            blocks.append({'type': 'paragraph', 'tone': classify_tone(line), 'text': line})
+
+    if code_lines is not None:
+        blocks.append({'type': 'code', 'text': '\n'.join(code_lines)})
+    return blocks
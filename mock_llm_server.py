@@ -0,0 +1,138 @@
+"""
+Local HTTP mock of the LLM for offline load tests and benchmarks.
+
+Serves ``POST /generate`` with the behavior of ``llm_backends.MockBackend``
+(latency distribution, random 503s, random or RPM-based 429s with Retry-After)
+and ``GET /stats`` with request counters. Point the app at it with:
+
+    python mock_llm_server.py --port 8765 --latency-median-ms 800 --rpm-limit 60
+    ATS_LLM_BACKEND=http ATS_LLM_BACKEND_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+import argparse
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_backends import MockBackend, MockConfig, MockUpstreamError
+
+
+def _decode_parts(parts):
+    decoded = []
+    for part in parts:
+        if isinstance(part, dict) and isinstance(part.get("data"), str):
+            decoded.append({"mime_type": part.get("mime_type"), "data": base64.b64decode(part["data"])})
+        else:
+            decoded.append(part)
+    return decoded
+
+
+class MockLLMRequestHandler(BaseHTTPRequestHandler):
+    """Request handler; the server's ``backend`` attribute holds the MockBackend."""
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, dict(self.server.backend.stats))
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/generate":
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            parts = _decode_parts(request["parts"])
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {"error": f"Invalid request: {e}"})
+            return
+
+        backend = self.server.backend
+        model = request.get("model", "")
+        generation_config = request.get("generation_config")
+        try:
+            if not request.get("stream"):
+                self._send_json(200, {"text": backend.generate(parts, model, generation_config)})
+                return
+            chunks = backend.stream(parts, model, generation_config)
+            first_chunk = next(chunks, "")
+        except MockUpstreamError as e:
+            self._send_json(e.code, {"error": str(e)}, headers=e.headers)
+            return
+
+        # Newline-delimited JSON chunks, flushed as they are produced
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for chunk in [first_chunk, *chunks] if first_chunk else chunks:
+            self.wfile.write(json.dumps({"text": chunk}).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def create_server(host="127.0.0.1", port=8765, config=None, verbose=False):
+    """
+    Create (but do not start) a mock LLM server.
+
+    Returns:
+        ThreadingHTTPServer: Call ``serve_forever()``; ``server_address`` holds the bound port
+    """
+    server = ThreadingHTTPServer((host, port), MockLLMRequestHandler)
+    server.daemon_threads = True
+    server.backend = MockBackend(config or MockConfig())
+    server.verbose = verbose
+    return server
+
+
+def start_background_server(host="127.0.0.1", port=0, config=None):
+    """Start a mock server on a daemon thread (port 0 picks a free port); returns the server."""
+    server = create_server(host, port, config)
+    threading.Thread(target=server.serve_forever, daemon=True, name="mock-llm-server").start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock LLM server for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-median-ms", type=float, default=800)
+    parser.add_argument("--latency-p99-ms", type=float, default=3000)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a 503 response")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Probability of a random 429 response")
+    parser.add_argument("--rpm-limit", type=int, default=0, help="Requests per minute before 429s (0 disables)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--chunks", type=int, default=8, help="Chunks per streamed response")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_median_ms=args.latency_median_ms, latency_p99_ms=args.latency_p99_ms,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, rpm_limit=args.rpm_limit,
+        retry_after=args.retry_after, chunk_count=args.chunks, seed=args.seed,
+    )
+    server = create_server(args.host, args.port, config, args.verbose)
+    print(f"Mock LLM server listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
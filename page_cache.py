@@ -0,0 +1,168 @@
+"""
+Content-addressed, disk-backed cache for rasterized resume pages.
+
+Pages are stored as encoded image bytes under a key derived from the SHA-256
+of the PDF bytes plus the render parameters, so identical resumes uploaded by
+different sessions (or worker processes) share a single rendering.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+
+# Cache location and size bound (can be overridden through the environment)
+PAGE_CACHE_DIR = os.getenv("ATS_PAGE_CACHE_DIR", os.path.join(".cache", "pages"))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("ATS_PAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Only run an eviction sweep after this many bytes have been written
+_EVICTION_CHECK_BYTES = 8 * 1024 * 1024
+
+
+def compute_content_hash(pdf_bytes):
+    """Return the SHA-256 hex digest identifying a PDF's content."""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def make_page_key(content_hash, page_number, dpi, quality, fmt="JPEG"):
+    """
+    Build the cache key for a single rendered page.
+
+    Args:
+        content_hash (str): SHA-256 of the PDF bytes
+        page_number (int): 1-based page number
+        dpi (int): Render resolution
+        quality (int): Encoder quality setting
+        fmt (str): Image format of the stored bytes
+
+    Returns:
+        str: Hex key that is safe to use as a file name
+    """
+    raw = f"{content_hash}|p{page_number}|dpi{dpi}|q{quality}|{fmt.lower()}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def make_range_key(content_hash, first_page, last_page, dpi, quality):
+    """Build the cache key recording how many pages a render range produced."""
+    raw = f"{content_hash}|range{first_page}-{last_page}|dpi{dpi}|q{quality}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def make_thumbnail_key(content_hash, page_number, width, quality, fmt="WEBP"):
+    """Build the cache key for a preview thumbnail of a rendered page."""
+    raw = f"{content_hash}|p{page_number}|thumb{width}|q{quality}|{fmt.lower()}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PageCache:
+    """
+    Size-bounded LRU cache of encoded page images kept on the local disk.
+
+    Entries are written atomically (temp file + rename) so the cache can be
+    shared safely by Streamlit sessions and by separate processes. Recency is
+    tracked through file modification times, which are refreshed on every hit.
+    """
+
+    def __init__(self, cache_dir=PAGE_CACHE_DIR, max_bytes=PAGE_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._bytes_since_check = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key):
+        """Return the cached bytes for ``key`` or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        try:
+            os.utime(path, None)  # Mark as recently used
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, data):
+        """Store ``data`` under ``key`` and evict old entries if over budget."""
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self._bytes_since_check += len(data)
+            should_evict = self._bytes_since_check >= _EVICTION_CHECK_BYTES
+            if should_evict:
+                self._bytes_since_check = 0
+
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its budget."""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                # Another process may have evicted it already
+                continue
+
+    def clear(self):
+        """Remove every cached entry."""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                try:
+                    os.remove(os.path.join(root, name))
+                except OSError:
+                    pass
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_page_cache():
+    """Return the process-wide page cache instance."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = PageCache()
+    return _default_cache
@@ -0,0 +1,171 @@
+"""
+Token-budgeted shaping of page images sent to the model.
+
+Image input is billed per 768x768 tile, so a 200 DPI letter page costs nine
+tiles while most of it is margin. The shaper crops each rendered page to its
+content, then spreads a token budget over all pages: every page first gets the
+fewest tiles that keep it readable, and the remaining budget upgrades pages in
+reading order, each page scaled to fill its tile grid as fully as possible.
+Only the pages that are actually sent are re-encoded, and the encoded payload
+is kept under a byte budget by lowering JPEG quality, then resolution.
+"""
+import base64
+import io
+import math
+import os
+
+from PIL import Image, ImageChops
+
+# Default budget: the cost of the single full-resolution page sent before shaping
+PAYLOAD_TOKEN_BUDGET = int(os.getenv("ATS_PAYLOAD_TOKEN_BUDGET", "2322"))
+PAYLOAD_MAX_BYTES = int(os.getenv("ATS_PAYLOAD_MAX_BYTES", str(4 * 1024 * 1024)))  # Encoded size of all parts
+
+TILE_SIZE = 768
+TOKENS_PER_TILE = 258
+SMALL_IMAGE_SIZE = 384  # Images within this size cost a single tile
+MIN_PAGE_WIDTH = 768  # Narrower renders make small print unreadable
+CROP_THRESHOLD = 24  # Difference from white that counts as content
+CROP_PADDING = 16
+SHAPED_JPEG_QUALITIES = (85, 70, 55)
+
+
+def estimate_image_tokens(width, height):
+    """Approximate input tokens of an image of the given size."""
+    if width <= SMALL_IMAGE_SIZE and height <= SMALL_IMAGE_SIZE:
+        return TOKENS_PER_TILE
+    return TOKENS_PER_TILE * math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE)
+
+
+def crop_margins(image):
+    """Crop the blank margins around a page's content (keeps the page if it is blank)."""
+    background = Image.new(image.mode, image.size, "white")
+    mask = ImageChops.difference(image, background).convert("L").point(lambda p: 255 if p > CROP_THRESHOLD else 0)
+    bbox = mask.getbbox()
+    if not bbox:
+        return image
+    left, top, right, bottom = bbox
+    return image.crop((
+        max(0, left - CROP_PADDING), max(0, top - CROP_PADDING),
+        min(image.width, right + CROP_PADDING), min(image.height, bottom + CROP_PADDING),
+    ))
+
+
+def _fit_scale(width, height, tiles):
+    """Largest downscale factor (at most 1) fitting the image in a grid of ``tiles`` tiles."""
+    best = 0.0
+    for cols in range(1, tiles + 1):
+        rows = tiles // cols
+        best = max(best, min(cols * TILE_SIZE / width, rows * TILE_SIZE / height))
+    return min(best, 1.0)
+
+
+def _min_tiles(width, height):
+    target = min(1.0, MIN_PAGE_WIDTH / width)
+    tiles = 1
+    while _fit_scale(width, height, tiles) < target:
+        tiles += 1
+    return tiles
+
+
+def _next_tiles(width, height, tiles, max_tiles):
+    """Smallest tile count above ``tiles`` that improves the page's resolution, or None."""
+    scale = _fit_scale(width, height, tiles)
+    if scale >= 1.0:
+        return None
+    for candidate in range(tiles + 1, max_tiles + 1):
+        if _fit_scale(width, height, candidate) > scale:
+            return candidate
+    return None
+
+
+def plan_pages(sizes, token_budget=PAYLOAD_TOKEN_BUDGET):
+    """
+    Decide which pages to send and at what scale.
+
+    Args:
+        sizes (list): (width, height) of each cropped page, in reading order
+        token_budget (int): Image tokens the request may spend
+
+    Returns:
+        list: Scale factor per page, None for pages left out to stay within the budget
+    """
+    max_tiles = max(1, token_budget // TOKENS_PER_TILE)
+    tiles = []
+    for width, height in sizes:
+        needed = _min_tiles(width, height)
+        if sum(tiles) + needed > max_tiles:
+            break
+        tiles.append(needed)
+    if not tiles and sizes:
+        tiles.append(max_tiles)  # Always send the first page, shrunk to the budget
+
+    upgraded = True
+    while upgraded:
+        upgraded = False
+        for index, (width, height) in enumerate(sizes[:len(tiles)]):
+            candidate = _next_tiles(width, height, tiles[index], max_tiles)
+            if candidate and sum(tiles) - tiles[index] + candidate <= max_tiles:
+                tiles[index] = candidate
+                upgraded = True
+
+    scales = [_fit_scale(width, height, count) for (width, height), count in zip(sizes, tiles)]
+    return scales + [None] * (len(sizes) - len(tiles))
+
+
+def _encode(images, quality):
+    return [
+        {"mime_type": "image/jpeg", "data": base64.b64encode(_jpeg_bytes(image, quality)).decode()}
+        for image in images
+    ]
+
+
+def _jpeg_bytes(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def shape_page_parts(page_bytes, token_budget=PAYLOAD_TOKEN_BUDGET, max_bytes=PAYLOAD_MAX_BYTES):
+    """
+    Turn rendered pages into the image parts of a model request.
+
+    Args:
+        page_bytes (list): Encoded page renders in reading order
+        token_budget (int): Image tokens the request may spend
+        max_bytes (int): Upper bound on the base64 size of all parts
+
+    Returns:
+        tuple: (content parts, stats dict with pages_sent, pages_omitted,
+        estimated_tokens and payload_bytes)
+    """
+    pages = [crop_margins(Image.open(io.BytesIO(data)).convert("RGB")) for data in page_bytes]
+    scales = plan_pages([page.size for page in pages], token_budget)
+
+    shaped = []
+    for page, scale in zip(pages, scales):
+        if scale is None:
+            break
+        size = (max(1, int(page.width * scale)), max(1, int(page.height * scale)))
+        shaped.append(page if size == page.size else page.resize(size, Image.LANCZOS))
+
+    while True:
+        for quality in SHAPED_JPEG_QUALITIES:
+            parts = _encode(shaped, quality)
+            payload_bytes = sum(len(part["data"]) for part in parts)
+            if payload_bytes <= max_bytes:
+                break
+        if payload_bytes <= max_bytes or all(min(image.size) <= SMALL_IMAGE_SIZE for image in shaped):
+            break
+        factor = math.sqrt(max_bytes / payload_bytes) * 0.9
+        shaped = [
+            image.resize((max(1, int(image.width * factor)), max(1, int(image.height * factor))), Image.LANCZOS)
+            for image in shaped
+        ]
+
+    stats = {
+        "pages_sent": len(shaped),
+        "pages_omitted": len(pages) - len(shaped),
+        "estimated_tokens": sum(estimate_image_tokens(*image.size) for image in shaped),
+        "payload_bytes": payload_bytes,
+    }
+    return parts, stats
@@ -7,12 +7,21 @@ from datetime import datetime
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, cm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle, KeepTogether
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle, KeepTogether, Preformatted
 from reportlab.lib.colors import HexColor, Color
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT, TA_JUSTIFY
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
 import re
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+from xml.sax.saxutils import escape
+
+from markdown_parser import parse_markdown, render_inline, STRONG_LINE_LEVEL, EMPHASIS_LINE_LEVEL
+
+# Bump whenever the report layout changes so cached renders are invalidated
+REPORT_TEMPLATE_VERSION = "2"
 
 class ProfessionalPDFStyles:
     """Professional color schemes and typography for PDF generation"""
@@ -44,49 +53,84 @@ class ProfessionalPDFStyles:
         'caption_size': 9,
         'line_height_multiplier': 1.4,
     }
+    
+    # Page layout shared by every report of the theme
+    PAGE_LAYOUT = {
+        'pagesize': A4,
+        'rightMargin': 2*cm,
+        'leftMargin': 2*cm,
+        'topMargin': 2.5*cm,
+        'bottomMargin': 2*cm,
+    }
+    
+    # Registry identity (bump the version whenever the theme changes)
+    THEME_NAME = 'professional'
+    THEME_VERSION = 1
+
+class MonochromePDFStyles(ProfessionalPDFStyles):
+    """Print-friendly grayscale variant of the professional theme"""
+    
+    COLORS = dict(
+        ProfessionalPDFStyles.COLORS,
+        primary_dark=HexColor('#111111'),
+        primary_medium=HexColor('#333333'),
+        primary_light=HexColor('#555555'),
+        secondary=HexColor('#333333'),
+        accent=HexColor('#000000'),
+        success=HexColor('#222222'),
+        warning=HexColor('#444444'),
+    )
+    
+    THEME_NAME = 'monochrome'
+    THEME_VERSION = 1
+
+DEFAULT_THEME = ProfessionalPDFStyles.THEME_NAME
 
-def create_professional_styles():
-    """Create professional paragraph styles for PDF generation"""
+MAX_LIST_DEPTH = 4  # Deeper list levels share the indentation of the last one
+LIST_BULLETS = ('•', '–', '·')
+
+def _build_paragraph_styles(theme):
+    """Build the paragraph styles of a theme (called once per theme by the registry)"""
     styles = getSampleStyleSheet()
     
     # Main Title Style
     title_style = ParagraphStyle(
         'ProfessionalTitle',
         parent=styles['Heading1'],
-        fontSize=ProfessionalPDFStyles.FONTS['title_size'],
-        textColor=ProfessionalPDFStyles.COLORS['primary_dark'],
+        fontSize=theme.FONTS['title_size'],
+        textColor=theme.COLORS['primary_dark'],
         spaceAfter=30,
         spaceBefore=20,
         alignment=TA_CENTER,
         fontName='Helvetica-Bold',
-        leading=ProfessionalPDFStyles.FONTS['title_size'] * ProfessionalPDFStyles.FONTS['line_height_multiplier']
+        leading=theme.FONTS['title_size'] * theme.FONTS['line_height_multiplier']
     )
     
     # Subtitle Style
     subtitle_style = ParagraphStyle(
         'ProfessionalSubtitle',
         parent=styles['Heading2'],
-        fontSize=ProfessionalPDFStyles.FONTS['subtitle_size'],
-        textColor=ProfessionalPDFStyles.COLORS['primary_medium'],
+        fontSize=theme.FONTS['subtitle_size'],
+        textColor=theme.COLORS['primary_medium'],
         spaceAfter=20,
         spaceBefore=15,
         alignment=TA_CENTER,
         fontName='Helvetica-Bold',
-        leading=ProfessionalPDFStyles.FONTS['subtitle_size'] * ProfessionalPDFStyles.FONTS['line_height_multiplier']
+        leading=theme.FONTS['subtitle_size'] * theme.FONTS['line_height_multiplier']
     )
     
     # Section Heading Style
     heading1_style = ParagraphStyle(
         'ProfessionalHeading1',
         parent=styles['Heading1'],
-        fontSize=ProfessionalPDFStyles.FONTS['heading1_size'],
-        textColor=ProfessionalPDFStyles.COLORS['primary_dark'],
+        fontSize=theme.FONTS['heading1_size'],
+        textColor=theme.COLORS['primary_dark'],
         spaceAfter=15,
         spaceBefore=25,
         fontName='Helvetica-Bold',
-        leading=ProfessionalPDFStyles.FONTS['heading1_size'] * ProfessionalPDFStyles.FONTS['line_height_multiplier'],
+        leading=theme.FONTS['heading1_size'] * theme.FONTS['line_height_multiplier'],
         borderWidth=0,
-        borderColor=ProfessionalPDFStyles.COLORS['border'],
+        borderColor=theme.COLORS['border'],
         borderPadding=5
     )
     
@@ -94,24 +138,24 @@ def create_professional_styles():
     heading2_style = ParagraphStyle(
         'ProfessionalHeading2',
         parent=styles['Heading2'],
-        fontSize=ProfessionalPDFStyles.FONTS['heading2_size'],
-        textColor=ProfessionalPDFStyles.COLORS['secondary'],
+        fontSize=theme.FONTS['heading2_size'],
+        textColor=theme.COLORS['secondary'],
         spaceAfter=12,
         spaceBefore=18,
         fontName='Helvetica-Bold',
-        leading=ProfessionalPDFStyles.FONTS['heading2_size'] * ProfessionalPDFStyles.FONTS['line_height_multiplier']
+        leading=theme.FONTS['heading2_size'] * theme.FONTS['line_height_multiplier']
     )
     
     # Body Text Style
     body_style = ParagraphStyle(
         'ProfessionalBody',
         parent=styles['Normal'],
-        fontSize=ProfessionalPDFStyles.FONTS['body_size'],
-        textColor=ProfessionalPDFStyles.COLORS['text_primary'],
+        fontSize=theme.FONTS['body_size'],
+        textColor=theme.COLORS['text_primary'],
         spaceAfter=12,
         alignment=TA_JUSTIFY,
         fontName='Helvetica',
-        leading=ProfessionalPDFStyles.FONTS['body_size'] * ProfessionalPDFStyles.FONTS['line_height_multiplier'],
+        leading=theme.FONTS['body_size'] * theme.FONTS['line_height_multiplier'],
         firstLineIndent=0
     )
     
@@ -119,12 +163,12 @@ def create_professional_styles():
     highlight_style = ParagraphStyle(
         'ProfessionalHighlight',
         parent=styles['Normal'],
-        fontSize=ProfessionalPDFStyles.FONTS['body_size'],
-        textColor=ProfessionalPDFStyles.COLORS['primary_medium'],
+        fontSize=theme.FONTS['body_size'],
+        textColor=theme.COLORS['primary_medium'],
         spaceAfter=10,
         leftIndent=20,
         fontName='Helvetica',
-        leading=ProfessionalPDFStyles.FONTS['body_size'] * ProfessionalPDFStyles.FONTS['line_height_multiplier'],
+        leading=theme.FONTS['body_size'] * theme.FONTS['line_height_multiplier'],
         bulletIndent=15
     )
     
@@ -132,55 +176,83 @@ def create_professional_styles():
     success_style = ParagraphStyle(
         'ProfessionalSuccess',
         parent=styles['Normal'],
-        fontSize=ProfessionalPDFStyles.FONTS['body_size'],
-        textColor=ProfessionalPDFStyles.COLORS['success'],
+        fontSize=theme.FONTS['body_size'],
+        textColor=theme.COLORS['success'],
         spaceAfter=10,
         leftIndent=20,
         fontName='Helvetica-Bold',
-        leading=ProfessionalPDFStyles.FONTS['body_size'] * ProfessionalPDFStyles.FONTS['line_height_multiplier']
+        leading=theme.FONTS['body_size'] * theme.FONTS['line_height_multiplier']
     )
     
     # Warning/Attention Style
     warning_style = ParagraphStyle(
         'ProfessionalWarning',
         parent=styles['Normal'],
-        fontSize=ProfessionalPDFStyles.FONTS['body_size'],
-        textColor=ProfessionalPDFStyles.COLORS['warning'],
+        fontSize=theme.FONTS['body_size'],
+        textColor=theme.COLORS['warning'],
         spaceAfter=10,
         leftIndent=20,
         fontName='Helvetica-Bold',
-        leading=ProfessionalPDFStyles.FONTS['body_size'] * ProfessionalPDFStyles.FONTS['line_height_multiplier']
+        leading=theme.FONTS['body_size'] * theme.FONTS['line_height_multiplier']
     )
     
     # Caption/Footer Style
     caption_style = ParagraphStyle(
         'ProfessionalCaption',
         parent=styles['Normal'],
-        fontSize=ProfessionalPDFStyles.FONTS['caption_size'],
-        textColor=ProfessionalPDFStyles.COLORS['text_muted'],
+        fontSize=theme.FONTS['caption_size'],
+        textColor=theme.COLORS['text_muted'],
         spaceAfter=8,
         alignment=TA_CENTER,
         fontName='Helvetica',
-        leading=ProfessionalPDFStyles.FONTS['caption_size'] * ProfessionalPDFStyles.FONTS['line_height_multiplier']
+        leading=theme.FONTS['caption_size'] * theme.FONTS['line_height_multiplier']
     )
     
     # Quote Style
     quote_style = ParagraphStyle(
         'ProfessionalQuote',
         parent=styles['Normal'],
-        fontSize=ProfessionalPDFStyles.FONTS['body_size'],
-        textColor=ProfessionalPDFStyles.COLORS['text_secondary'],
+        fontSize=theme.FONTS['body_size'],
+        textColor=theme.COLORS['text_secondary'],
         spaceAfter=15,
         spaceBefore=15,
         leftIndent=30,
         rightIndent=30,
         fontName='Helvetica-Oblique',
-        leading=ProfessionalPDFStyles.FONTS['body_size'] * ProfessionalPDFStyles.FONTS['line_height_multiplier'],
+        leading=theme.FONTS['body_size'] * theme.FONTS['line_height_multiplier'],
         borderWidth=1,
-        borderColor=ProfessionalPDFStyles.COLORS['border'],
+        borderColor=theme.COLORS['border'],
         borderPadding=10
     )
     
+    # Code Block Style
+    code_style = ParagraphStyle(
+        'ProfessionalCode',
+        parent=styles['Code'],
+        fontSize=theme.FONTS['caption_size'],
+        textColor=theme.COLORS['text_primary'],
+        backColor=theme.COLORS['background'],
+        spaceAfter=12,
+        leftIndent=20,
+        borderPadding=6
+    )
+    
+    # Table Cell Styles
+    table_cell_style = ParagraphStyle(
+        'ProfessionalTableCell',
+        parent=styles['Normal'],
+        fontSize=theme.FONTS['caption_size'] + 1,
+        textColor=theme.COLORS['text_primary'],
+        fontName='Helvetica',
+        leading=(theme.FONTS['caption_size'] + 1) * theme.FONTS['line_height_multiplier']
+    )
+    table_header_style = ParagraphStyle(
+        'ProfessionalTableHeader',
+        parent=table_cell_style,
+        textColor=theme.COLORS['primary_dark'],
+        fontName='Helvetica-Bold'
+    )
+    
     return {
         'title': title_style,
         'subtitle': subtitle_style,
@@ -191,9 +263,171 @@ def create_professional_styles():
         'success': success_style,
         'warning': warning_style,
         'caption': caption_style,
-        'quote': quote_style
+        'quote': quote_style,
+        'code': code_style,
+        'table_cell': table_cell_style,
+        'table_header': table_header_style
+    }
+
+def _build_list_styles(paragraph_styles):
+    """Build indented list item styles by (style name, nesting depth)"""
+    list_styles = {}
+    for name in ('highlight', 'success', 'warning'):
+        for depth in range(MAX_LIST_DEPTH):
+            list_styles[(name, depth)] = ParagraphStyle(
+                f'ProfessionalList_{name}_{depth}',
+                parent=paragraph_styles[name],
+                leftIndent=20 + 18 * depth,
+                bulletIndent=6 + 18 * depth,
+                spaceAfter=6
+            )
+    return list_styles
+
+def _build_table_styles(theme):
+    """Build the table styles of a theme (called once per theme by the registry)"""
+    colors_ = theme.COLORS
+    return {
+        'header': TableStyle([
+            ('FONTNAME', (0, 0), (0, 1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (0, 0), 16),
+            ('FONTSIZE', (0, 1), (0, 1), 14),
+            ('FONTSIZE', (1, 0), (1, 1), 10),
+            ('TEXTCOLOR', (0, 0), (0, 1), colors_['primary_dark']),
+            ('TEXTCOLOR', (1, 0), (1, 1), colors_['text_secondary']),
+            ('ALIGN', (1, 0), (1, 1), 'RIGHT'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ]),
+        'separator': TableStyle([
+            ('FONTSIZE', (0, 0), (0, 0), 8),
+            ('TEXTCOLOR', (0, 0), (0, 0), colors_['border']),
+            ('ALIGN', (0, 0), (0, 0), 'CENTER'),
+        ]),
+        'footer': TableStyle([
+            ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (0, 2), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (0, 0), 10),
+            ('FONTSIZE', (0, 1), (0, 2), 8),
+            ('TEXTCOLOR', (0, 0), (0, 0), colors_['primary_medium']),
+            ('TEXTCOLOR', (0, 1), (0, 2), colors_['text_muted']),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('TOPPADDING', (0, 0), (-1, -1), 5),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+        ]),
+        'metadata': TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('TEXTCOLOR', (0, 0), (0, -1), colors_['text_secondary']),
+            ('TEXTCOLOR', (1, 0), (1, -1), colors_['text_primary']),
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+        ]),
+        'toc': TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors_['text_primary']),
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+            ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('LEFTPADDING', (0, 0), (-1, -1), 5),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors_['border']),
+            ('BACKGROUND', (0, 0), (-1, 0), colors_['background']),
+        ]),
+        'final_footer': TableStyle([
+            ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (0, 3), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (0, 0), 12),
+            ('FONTSIZE', (0, 1), (0, 2), 10),
+            ('FONTSIZE', (0, 3), (0, 3), 8),
+            ('TEXTCOLOR', (0, 0), (0, 0), colors_['primary_dark']),
+            ('TEXTCOLOR', (0, 1), (0, 2), colors_['primary_medium']),
+            ('TEXTCOLOR', (0, 3), (0, 3), colors_['text_muted']),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('TOPPADDING', (0, 0), (-1, -1), 5),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+        ]),
+        'markdown_table': TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors_['border']),
+            ('TOPPADDING', (0, 0), (-1, -1), 4),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ]),
+        'markdown_table_header': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors_['background']),
+            ('LINEBELOW', (0, 0), (-1, 0), 1, colors_['primary_light']),
+        ]),
     }
-def create_pdf_response(title, response, filename_prefix="ATS_Analysis"):
+
+class ReportTemplates(namedtuple('ReportTemplates', ['theme', 'styles', 'list_styles', 'table_styles', 'page_layout'])):
+    """
+    Precompiled, read-only templates of a theme, shared across renders and threads.
+    
+    Attributes:
+        theme: The ProfessionalPDFStyles subclass the templates were built from
+        styles (Mapping): Paragraph styles by name
+        list_styles (Mapping): List item styles by (style name, nesting depth)
+        table_styles (Mapping): Table styles by name
+        page_layout (Mapping): SimpleDocTemplate page size and margins
+    """
+    __slots__ = ()
+
+_THEMES = {}
+_templates = {}
+_templates_lock = threading.Lock()
+
+def register_theme(theme):
+    """
+    Register a theme class derived from ProfessionalPDFStyles under its THEME_NAME.
+    Changing a theme requires bumping its THEME_VERSION so a fresh template set is built.
+    """
+    _THEMES[theme.THEME_NAME] = theme
+    return theme
+
+register_theme(ProfessionalPDFStyles)
+register_theme(MonochromePDFStyles)
+
+def get_report_templates(theme_name=DEFAULT_THEME):
+    """
+    Return the precompiled templates for a theme, building them once per process.
+    
+    Args:
+        theme_name (str): Name of a registered theme
+    
+    Returns:
+        ReportTemplates: Shared templates; callers must not modify them
+    """
+    theme = _THEMES.get(theme_name)
+    if theme is None:
+        raise ValueError(f"Unknown PDF theme: {theme_name}")
+    key = (theme.THEME_NAME, theme.THEME_VERSION)
+    templates = _templates.get(key)
+    if templates is None:
+        with _templates_lock:
+            templates = _templates.get(key)
+            if templates is None:
+                styles = _build_paragraph_styles(theme)
+                templates = ReportTemplates(
+                    theme=theme,
+                    styles=MappingProxyType(styles),
+                    list_styles=MappingProxyType(_build_list_styles(styles)),
+                    table_styles=MappingProxyType(_build_table_styles(theme)),
+                    page_layout=MappingProxyType(dict(theme.PAGE_LAYOUT)),
+                )
+                _templates[key] = templates
+    return templates
+
+def create_professional_styles(theme_name=DEFAULT_THEME):
+    """Return the shared, precompiled paragraph styles for PDF generation"""
+    return get_report_templates(theme_name).styles
+
+def create_pdf_response(title, response, filename_prefix="ATS_Analysis", theme=DEFAULT_THEME):
     """
     Creates a professionally formatted PDF from the AI response with enhanced typography and colors.
     
@@ -201,30 +435,27 @@ def create_pdf_response(title, response, filename_prefix="ATS_Analysis"):
         title (str): The title of the analysis
         response (str): The AI-generated response content
         filename_prefix (str): Prefix for the filename
+        theme (str): Name of a registered PDF theme
     
     Returns:
         tuple: (pdf_bytes, filename)
     """
     
+    # Shared, precompiled styles and page layout
+    templates = get_report_templates(theme)
+    
     # Create a BytesIO buffer to hold the PDF
     buffer = io.BytesIO()
     
     # Create the PDF document with professional margins
     doc = SimpleDocTemplate(
         buffer,
-        pagesize=A4,
-        rightMargin=2*cm,
-        leftMargin=2*cm,
-        topMargin=2.5*cm,
-        bottomMargin=2*cm,
         title=f"ATS Resume Expert - {title}",
         author="ATS Resume Expert",
-        subject="Resume Analysis Report"
+        subject="Resume Analysis Report",
+        **templates.page_layout
     )
     
-    # Get professional styles
-    pro_styles = create_professional_styles()
-    
     # Build the PDF content
     story = []
     
@@ -235,70 +466,19 @@ def create_pdf_response(title, response, filename_prefix="ATS_Analysis"):
     ]
     
     header_table = Table(header_table_data, colWidths=[4*inch, 2*inch])
-    header_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, 1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (0, 0), 16),
-        ('FONTSIZE', (0, 1), (0, 1), 14),
-        ('FONTSIZE', (1, 0), (1, 1), 10),
-        ('TEXTCOLOR', (0, 0), (0, 1), ProfessionalPDFStyles.COLORS['primary_dark']),
-        ('TEXTCOLOR', (1, 0), (1, 1), ProfessionalPDFStyles.COLORS['text_secondary']),
-        ('ALIGN', (1, 0), (1, 1), 'RIGHT'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-    ]))
+    header_table.setStyle(templates.table_styles['header'])
     
     story.append(header_table)
     story.append(Spacer(1, 20))
     
     # Add a professional separator line
     separator_table = Table([['─' * 80]], colWidths=[6*inch])
-    separator_table.setStyle(TableStyle([
-        ('FONTSIZE', (0, 0), (0, 0), 8),
-        ('TEXTCOLOR', (0, 0), (0, 0), ProfessionalPDFStyles.COLORS['border']),
-        ('ALIGN', (0, 0), (0, 0), 'CENTER'),
-    ]))
+    separator_table.setStyle(templates.table_styles['separator'])
     story.append(separator_table)
     story.append(Spacer(1, 20))
     
-    # Process the response content with enhanced parsing
-    content_parts = _parse_response_content_enhanced(response)
-    
-    for part in content_parts:
-        try:
-            if part['type'] == 'title':
-                story.append(KeepTogether([
-                    Paragraph(part['content'], pro_styles['title']),
-                    Spacer(1, 10)
-                ]))
-            elif part['type'] == 'heading1':
-                story.append(KeepTogether([
-                    Paragraph(f"▸ {part['content']}", pro_styles['heading1']),
-                    Spacer(1, 5)
-                ]))
-            elif part['type'] == 'heading2':
-                story.append(KeepTogether([
-                    Paragraph(f"• {part['content']}", pro_styles['heading2']),
-                    Spacer(1, 3)
-                ]))
-            elif part['type'] == 'success':
-                story.append(Paragraph(f"✓ {part['content']}", pro_styles['success']))
-            elif part['type'] == 'warning':
-                story.append(Paragraph(f"⚠ {part['content']}", pro_styles['warning']))
-            elif part['type'] == 'highlight':
-                story.append(Paragraph(f"→ {part['content']}", pro_styles['highlight']))
-            elif part['type'] == 'quote':
-                story.append(Paragraph(f'"{part["content"]}"', pro_styles['quote']))
-            elif part['type'] == 'body':
-                # Handle line breaks and formatting
-                formatted_content = part['content'].replace('\n', '<br/>')
-                # Add smart typography
-                formatted_content = _enhance_typography(formatted_content)
-                story.append(Paragraph(formatted_content, pro_styles['body']))
-            elif part['type'] == 'spacer':
-                story.append(Spacer(1, 15))
-        except Exception as e:
-            # Fallback for any parsing issues
-            story.append(Paragraph(part['content'], pro_styles['body']))
+    # Process the response content
+    story.extend(render_markdown(response, templates))
     
     # Professional Footer Section
     story.append(Spacer(1, 40))
@@ -309,17 +489,7 @@ def create_pdf_response(title, response, filename_prefix="ATS_Analysis"):
         [f'Report ID: {filename_prefix}_{datetime.now().strftime("%Y%m%d_%H%M%S")}']
     ], colWidths=[6*inch])
     
-    footer_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 1), (0, 2), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (0, 0), 10),
-        ('FONTSIZE', (0, 1), (0, 2), 8),
-        ('TEXTCOLOR', (0, 0), (0, 0), ProfessionalPDFStyles.COLORS['primary_medium']),
-        ('TEXTCOLOR', (0, 1), (0, 2), ProfessionalPDFStyles.COLORS['text_muted']),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-    ]))
+    footer_table.setStyle(templates.table_styles['footer'])
     
     story.append(footer_table)
     
@@ -337,163 +507,131 @@ def create_pdf_response(title, response, filename_prefix="ATS_Analysis"):
     
     return pdf_data, filename
 
-def _enhance_typography(text):
-    """
-    Enhance text with professional typography improvements.
-    
-    Args:
-        text (str): Input text to enhance
-    
-    Returns:
-        str: Enhanced text with typography improvements
-    """
-    # Replace straight quotes with smart quotes
-    text = text.replace('"', '"').replace('"', '"')
-    text = text.replace("'", ''').replace("'", ''')
-    
-    # Replace double hyphens with em dashes
-    text = text.replace('--', '—')
-    
-    # Replace triple dots with ellipsis
-    text = text.replace('...', '…')
-    
-    # Improve spacing around punctuation
-    text = re.sub(r'\s+([,.!?;:])', r'\1', text)  # Remove spaces before punctuation
-    text = re.sub(r'([,.!?;:])\s*', r'\1 ', text)  # Ensure single space after punctuation
-    
-    # Clean up multiple spaces
-    text = re.sub(r'\s+', ' ', text)
-    
-    return text.strip()
+def _content_width(templates):
+    layout = templates.page_layout
+    return layout['pagesize'][0] - layout['leftMargin'] - layout['rightMargin']
 
-def _parse_response_content_enhanced(response):
-    """
-    Enhanced parsing of AI response content into structured parts for professional PDF formatting.
-    
-    Args:
-        response (str): The raw response content
-    
-    Returns:
-        list: List of content parts with enhanced type classification and content
-    """
-    parts = []
-    lines = response.split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        
-        if not line:
-            parts.append({'type': 'spacer', 'content': ''})
-            continue
-        
-        # Check for main headings (multiple # or ** formatting)
-        if line.startswith('####') or (line.startswith('***') and line.endswith('***')):
-            heading_text = line.replace('#', '').replace('*', '').strip()
-            parts.append({'type': 'title', 'content': heading_text})
-        
-        # Check for section headings (### or ** formatting)
-        elif line.startswith('###') or (line.startswith('**') and line.endswith('**')):
-            heading_text = line.replace('#', '').replace('*', '').strip()
-            parts.append({'type': 'heading1', 'content': heading_text})
-        
-        # Check for subsection headings (## or single *)
-        elif line.startswith('##') or (line.startswith('*') and line.endswith('*') and not line.startswith('**')):
-            heading_text = line.replace('#', '').replace('*', '').strip()
-            parts.append({'type': 'heading2', 'content': heading_text})
-        
-        # Check for success indicators
-        elif any(keyword in line.lower() for keyword in ['excellent', 'strong', 'good match', 'well-suited', 'perfect', 'outstanding']):
-            parts.append({'type': 'success', 'content': line})
-        
-        # Check for warning indicators
-        elif any(keyword in line.lower() for keyword in ['missing', 'lacks', 'needs improvement', 'consider adding', 'weak', 'insufficient']):
-            parts.append({'type': 'warning', 'content': line})
-        
-        # Check for percentage matches (important metrics)
-        elif re.search(r'\d+%', line):
-            parts.append({'type': 'highlight', 'content': f"📊 {line}"})
-        
-        # Check for bullet points or numbered lists
-        elif line.startswith(('•', '-', '*', '→', '▸')) or re.match(r'^\d+\.', line):
-            parts.append({'type': 'highlight', 'content': line})
-        
-        # Check for quotes or recommendations
-        elif line.startswith(('"', '"')) or 'recommend' in line.lower():
-            parts.append({'type': 'quote', 'content': line})
-        
-        # Regular content
-        else:
-            parts.append({'type': 'body', 'content': line})
-    
-    return parts
+def _heading_flowable(block, base_level, templates):
+    level = block['level']
+    if level == STRONG_LINE_LEVEL or (level != EMPHASIS_LINE_LEVEL and level <= base_level):
+        return KeepTogether([
+            Paragraph(f"▸ {render_inline(block['text'])}", templates.styles['heading1']),
+            Spacer(1, 5)
+        ])
+    return KeepTogether([
+        Paragraph(f"• {render_inline(block['text'])}", templates.styles['heading2']),
+        Spacer(1, 3)
+    ])
+
+def _paragraph_flowable(block, templates):
+    styles = templates.styles
+    text = render_inline(block['text'])
+    tone = block['tone']
+    if tone == 'success':
+        return Paragraph(f"✓ {text}", styles['success'])
+    if tone == 'warning':
+        return Paragraph(f"⚠ {text}", styles['warning'])
+    if tone == 'metric':
+        return Paragraph(f"→ 📊 {text}", styles['highlight'])
+    if tone == 'quote':
+        return Paragraph(f'“{text.strip(chr(34) + "“”")}”', styles['quote'])
+    return Paragraph(text, styles['body'])
+
+def _list_flowables(block, templates, depth=0):
+    flowables = []
+    level = min(depth, MAX_LIST_DEPTH - 1)
+    for item in block['items']:
+        name = item['tone'] if item['tone'] in ('success', 'warning') else 'highlight'
+        bullet = item['marker'] if block['ordered'] else LIST_BULLETS[depth % len(LIST_BULLETS)]
+        flowables.append(Paragraph(render_inline(item['text']), templates.list_styles[(name, level)], bulletText=bullet))
+        for child in item['children']:
+            flowables.extend(_list_flowables(child, templates, depth + 1))
+    return flowables
 
-def _parse_response_content(response):
+def _table_flowable(block, templates):
+    styles = templates.styles
+    rows = ([block['header']] if block['header'] else []) + block['rows']
+    column_count = max(len(row) for row in rows)
+    data = []
+    for index, row in enumerate(rows):
+        style = styles['table_header'] if block['header'] and index == 0 else styles['table_cell']
+        cells = list(row) + [''] * (column_count - len(row))
+        data.append([Paragraph(render_inline(cell), style) for cell in cells])
+    
+    table = Table(data, colWidths=[_content_width(templates) / column_count] * column_count,
+                  repeatRows=1 if block['header'] else 0, hAlign='LEFT')
+    table.setStyle(templates.table_styles['markdown_table'])
+    if block['header']:
+        table.setStyle(templates.table_styles['markdown_table_header'])
+    return table
+
+def render_markdown(response, templates):
     """
-    Parses the AI response content into structured parts for PDF formatting.
+    Convert an AI response into flowables with the given report templates.
+    
+    The response is parsed once into a block AST (see markdown_parser) and each
+    block is rendered by a single shared renderer, used by every report type.
     
     Args:
         response (str): The raw response content
+        templates (ReportTemplates): Templates from get_report_templates()
     
     Returns:
-        list: List of content parts with type and content
+        list: Flowables to append to the story
     """
-    parts = []
-    lines = response.split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        
-        if not line:
-            parts.append({'type': 'spacer', 'content': ''})
-            continue
-        
-        # Check for headings (lines with ### or ** formatting)
-        if line.startswith('###') or (line.startswith('**') and line.endswith('**')):
-            heading_text = line.replace('###', '').replace('**', '').strip()
-            parts.append({'type': 'heading', 'content': heading_text})
-        
-        # Check for bullet points or numbered lists
-        elif line.startswith(('•', '-', '*')) or re.match(r'^\d+\.', line):
-            parts.append({'type': 'highlight', 'content': line})
-        
-        # Check for percentage matches
-        elif re.search(r'\d+%', line):
-            parts.append({'type': 'highlight', 'content': f"🎯 {line}"})
-        
-        # Regular content
-        else:
-            parts.append({'type': 'body', 'content': line})
+    blocks = parse_markdown(response)
+    heading_levels = [
+        block['level'] for block in blocks
+        if block['type'] == 'heading' and block['level'] not in (STRONG_LINE_LEVEL, EMPHASIS_LINE_LEVEL)
+    ]
+    base_level = min(heading_levels, default=1)
     
-    return parts
+    flowables = []
+    for block in blocks:
+        try:
+            if block['type'] == 'heading':
+                flowables.append(_heading_flowable(block, base_level, templates))
+            elif block['type'] == 'paragraph':
+                flowables.append(_paragraph_flowable(block, templates))
+            elif block['type'] == 'list':
+                flowables.extend(_list_flowables(block, templates))
+            elif block['type'] == 'table':
+                flowables.append(_table_flowable(block, templates))
+            elif block['type'] == 'code':
+                flowables.append(Preformatted(block['text'], templates.styles['code']))
+            elif block['type'] == 'spacer':
+                flowables.append(Spacer(1, 15))
+        except Exception:
+            # Fallback for any markup issues
+            flowables.append(Paragraph(escape(block.get('text', '')), templates.styles['body']))
+    return flowables
 
-def create_multi_analysis_pdf(analyses, filename_prefix="ATS_Complete_Analysis"):
+def create_multi_analysis_pdf(analyses, filename_prefix="ATS_Complete_Analysis", theme=DEFAULT_THEME):
     """
     Creates a comprehensive PDF with multiple analysis results using professional styling.
     
     Args:
         analyses (dict): Dictionary of analysis titles and responses
         filename_prefix (str): Prefix for the filename
+        theme (str): Name of a registered PDF theme
     
     Returns:
         tuple: (pdf_bytes, filename)
     """
+    # Shared, precompiled styles and page layout
+    templates = get_report_templates(theme)
+    pro_styles = templates.styles
+    
     buffer = io.BytesIO()
     
     doc = SimpleDocTemplate(
         buffer,
-        pagesize=A4,
-        rightMargin=2*cm,
-        leftMargin=2*cm,
-        topMargin=2.5*cm,
-        bottomMargin=2*cm,
         title="ATS Resume Expert - Complete Analysis",
         author="ATS Resume Expert",
-        subject="Comprehensive Resume Analysis Report"
+        subject="Comprehensive Resume Analysis Report",
+        **templates.page_layout
     )
     
-    # Get professional styles
-    pro_styles = create_professional_styles()
-    
     story = []
     
     # Professional Cover Page
@@ -512,18 +650,7 @@ def create_multi_analysis_pdf(analyses, filename_prefix="ATS_Complete_Analysis")
     ]
     
     metadata_table = Table(metadata_data, colWidths=[2*inch, 3*inch])
-    metadata_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('TEXTCOLOR', (0, 0), (0, -1), ProfessionalPDFStyles.COLORS['text_secondary']),
-        ('TEXTCOLOR', (1, 0), (1, -1), ProfessionalPDFStyles.COLORS['text_primary']),
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('LEFTPADDING', (0, 0), (-1, -1), 10),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    metadata_table.setStyle(templates.table_styles['metadata'])
     
     story.append(metadata_table)
     story.append(Spacer(1, 60))
@@ -537,20 +664,7 @@ def create_multi_analysis_pdf(analyses, filename_prefix="ATS_Complete_Analysis")
         toc_data.append([f"{i}.", title, f"Page {i + 1}"])
     
     toc_table = Table(toc_data, colWidths=[0.5*inch, 4*inch, 1*inch])
-    toc_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('TEXTCOLOR', (0, 0), (-1, -1), ProfessionalPDFStyles.COLORS['text_primary']),
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('LEFTPADDING', (0, 0), (-1, -1), 5),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-        ('GRID', (0, 0), (-1, -1), 0.5, ProfessionalPDFStyles.COLORS['border']),
-        ('BACKGROUND', (0, 0), (-1, 0), ProfessionalPDFStyles.COLORS['background']),
-    ]))
+    toc_table.setStyle(templates.table_styles['toc'])
     
     story.append(toc_table)
     story.append(PageBreak())
@@ -564,43 +678,8 @@ def create_multi_analysis_pdf(analyses, filename_prefix="ATS_Complete_Analysis")
         story.append(Paragraph(f"Analysis {i}: {title}", pro_styles['title']))
         story.append(Spacer(1, 25))
         
-        # Process content with enhanced parsing
-        content_parts = _parse_response_content_enhanced(response)
-        
-        for part in content_parts:
-            try:
-                if part['type'] == 'title':
-                    story.append(KeepTogether([
-                        Paragraph(part['content'], pro_styles['subtitle']),
-                        Spacer(1, 10)
-                    ]))
-                elif part['type'] == 'heading1':
-                    story.append(KeepTogether([
-                        Paragraph(f"▸ {part['content']}", pro_styles['heading1']),
-                        Spacer(1, 5)
-                    ]))
-                elif part['type'] == 'heading2':
-                    story.append(KeepTogether([
-                        Paragraph(f"• {part['content']}", pro_styles['heading2']),
-                        Spacer(1, 3)
-                    ]))
-                elif part['type'] == 'success':
-                    story.append(Paragraph(f"✓ {part['content']}", pro_styles['success']))
-                elif part['type'] == 'warning':
-                    story.append(Paragraph(f"⚠ {part['content']}", pro_styles['warning']))
-                elif part['type'] == 'highlight':
-                    story.append(Paragraph(f"→ {part['content']}", pro_styles['highlight']))
-                elif part['type'] == 'quote':
-                    story.append(Paragraph(f'"{part["content"]}"', pro_styles['quote']))
-                elif part['type'] == 'body':
-                    formatted_content = part['content'].replace('\n', '<br/>')
-                    formatted_content = _enhance_typography(formatted_content)
-                    story.append(Paragraph(formatted_content, pro_styles['body']))
-                elif part['type'] == 'spacer':
-                    story.append(Spacer(1, 15))
-            except Exception as e:
-                # Fallback for any parsing issues
-                story.append(Paragraph(part['content'], pro_styles['body']))
+        # Process the response content
+        story.extend(render_markdown(response, templates))
         
         # Add section separator (except for last section)
         if i < len(analyses):
@@ -615,19 +694,7 @@ def create_multi_analysis_pdf(analyses, filename_prefix="ATS_Complete_Analysis")
         [f'Report ID: {filename_prefix}_{datetime.now().strftime("%Y%m%d_%H%M%S")}']
     ], colWidths=[6*inch])
     
-    final_footer_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 1), (0, 3), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (0, 0), 12),
-        ('FONTSIZE', (0, 1), (0, 2), 10),
-        ('FONTSIZE', (0, 3), (0, 3), 8),
-        ('TEXTCOLOR', (0, 0), (0, 0), ProfessionalPDFStyles.COLORS['primary_dark']),
-        ('TEXTCOLOR', (0, 1), (0, 2), ProfessionalPDFStyles.COLORS['primary_medium']),
-        ('TEXTCOLOR', (0, 3), (0, 3), ProfessionalPDFStyles.COLORS['text_muted']),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-    ]))
+    final_footer_table.setStyle(templates.table_styles['final_footer'])
     
     story.append(final_footer_table)
     
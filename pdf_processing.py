@@ -1,60 +1,308 @@
-import base64
 import io
+import os
+import re
 import pdf2image
 import streamlit as st
+from PIL import Image
+from pypdf import PdfReader
+from page_cache import compute_content_hash, make_page_key, make_range_key, make_thumbnail_key, get_page_cache
+from payload_shaper import shape_page_parts
 
-def process_uploaded_pdf(uploaded_file):
+# Rendering parameters (part of the page cache key)
+RENDER_DPI = 200  # Higher DPI for better quality
+MAX_RENDER_PAGES = int(os.getenv("ATS_MAX_RENDER_PAGES", "3"))  # Limit to the first pages for performance
+JPEG_QUALITY = 85
+
+# Preview thumbnails shown in the sidebar (WebP, cached with the page renders)
+THUMBNAIL_WIDTH = int(os.getenv("ATS_PREVIEW_THUMBNAIL_WIDTH", "400"))
+THUMBNAIL_QUALITY = int(os.getenv("ATS_PREVIEW_THUMBNAIL_QUALITY", "70"))
+
+# Text-layer extraction settings
+# "auto" sends the text layer when it is usable, "text"/"image" force a mode
+EXTRACTION_MODE = os.getenv("ATS_PDF_EXTRACTION_MODE", "auto").lower()
+PREVIEW_DPI = 100  # Pages are only rendered for the preview in text mode
+MAX_TEXT_CHARS = 20000
+MIN_TEXT_CHARS = 200
+MAX_BAD_GLYPH_RATIO = 0.05
+
+# Replacement chars, private-use glyphs, stray control chars and unmapped CIDs
+_BAD_GLYPH_PATTERN = re.compile(r"\ufffd|[\ue000-\uf8ff]|[\x00-\x08\x0b\x0c\x0e-\x1f]|\(cid:\d+\)")
+
+def _read_pdf_bytes(uploaded_file):
+    """Return the raw bytes of an uploaded file without consuming its stream."""
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    uploaded_file.seek(0)
+    return uploaded_file.read()
+
+def render_pdf_pages(pdf_bytes, dpi=RENDER_DPI, first_page=1, last_page=MAX_RENDER_PAGES,
+                     quality=JPEG_QUALITY, content_hash=None, thread_count=1):
     """
-    Converts uploaded PDF into base64-encoded image parts for generative AI processing.
-    Supports multi-page PDFs and provides better error handling.
+    Rasterizes a page range of a PDF into JPEG bytes, reusing cached renders.
+
+    Args:
+        pdf_bytes (bytes): Raw PDF content
+        dpi (int): Render resolution
+        first_page (int): First page to render (1-based)
+        last_page (int): Last page to render (inclusive)
+        quality (int): JPEG quality
+        content_hash (str): Precomputed SHA-256 of ``pdf_bytes``
+        thread_count (int): Number of poppler processes rendering pages in parallel
+
+    Returns:
+        list: Encoded JPEG bytes, one entry per rendered page
     """
-    if not uploaded_file:
-        raise FileNotFoundError("No file uploaded.")
-    
+    cache = get_page_cache()
+    content_hash = content_hash or compute_content_hash(pdf_bytes)
+
+    # The range entry records how many pages the range produced
+    range_key = make_range_key(content_hash, first_page, last_page, dpi, quality)
+    cached_count = cache.get(range_key)
+    if cached_count is not None:
+        pages = []
+        for page_number in range(first_page, first_page + int(cached_count)):
+            data = cache.get(make_page_key(content_hash, page_number, dpi, quality))
+            if data is None:
+                break
+            pages.append(data)
+        else:
+            return pages
+
+    images = pdf2image.convert_from_bytes(
+        pdf_bytes,
+        dpi=dpi,
+        first_page=first_page,
+        last_page=last_page,
+        thread_count=thread_count
+    )
+
+    pages = []
+    for page_number, img in enumerate(images, start=first_page):
+        img_bytes = io.BytesIO()
+        img.convert("RGB").save(img_bytes, format="JPEG", quality=quality)
+        data = img_bytes.getvalue()
+        cache.put(make_page_key(content_hash, page_number, dpi, quality), data)
+        pages.append(data)
+
+    cache.put(range_key, str(len(pages)).encode("ascii"))
+    return pages
+
+def make_thumbnail(page_bytes, width=THUMBNAIL_WIDTH, quality=THUMBNAIL_QUALITY):
+    """
+    Downscales an encoded page render into a small WebP thumbnail.
+
+    Returns:
+        bytes: Encoded WebP thumbnail (never wider than the source page)
+    """
+    with Image.open(io.BytesIO(page_bytes)) as img:
+        if img.width > width:
+            img.draft("RGB", (width, img.height * width // img.width))  # Cheap JPEG DCT downscale
+        img = img.convert("RGB")
+        if img.width > width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        thumbnail = io.BytesIO()
+        img.save(thumbnail, format="WEBP", quality=quality, method=4)
+    return thumbnail.getvalue()
+
+def get_thumbnail(content_hash, page_number, load_page, width=THUMBNAIL_WIDTH, quality=THUMBNAIL_QUALITY):
+    """
+    Returns the preview thumbnail of a page, making it only on a cache miss.
+
+    Args:
+        content_hash (str): SHA-256 of the PDF bytes
+        page_number (int): 1-based page number
+        load_page (callable): Returns the encoded page render; only called on a miss
+        width (int): Thumbnail width in pixels
+        quality (int): WebP quality
+
+    Returns:
+        bytes: Encoded WebP thumbnail
+    """
+    cache = get_page_cache()
+    key = make_thumbnail_key(content_hash, page_number, width, quality)
+    thumbnail = cache.get(key)
+    if thumbnail is None:
+        thumbnail = make_thumbnail(load_page(), width, quality)
+        cache.put(key, thumbnail)
+    return thumbnail
+
+def extract_text_layer(pdf_bytes, max_chars=MAX_TEXT_CHARS):
+    """
+    Extracts the embedded text layer of a born-digital PDF with pypdf.
+
+    Returns:
+        str: Extracted text (empty when the PDF has no usable text layer)
+    """
+    try:
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        chunks = []
+        total = 0
+        for page in reader.pages:
+            page_text = page.extract_text() or ""
+            chunks.append(page_text)
+            total += len(page_text)
+            if total >= max_chars:
+                break
+        return "\n".join(chunks)[:max_chars].strip()
+    except Exception:
+        return ""
+
+def count_pdf_pages(pdf_bytes):
+    """Returns the number of pages of a PDF (0 when it cannot be read)."""
     try:
-        # Show progress for large files
-        with st.spinner("Processing PDF..."):
-            # Convert PDF to images
-            images = pdf2image.convert_from_bytes(
-                uploaded_file.read(),
-                dpi=200,  # Higher DPI for better quality
-                first_page=1,
-                last_page=3  # Limit to first 3 pages for performance
-            )
-            
-            if not images:
-                raise ValueError("Could not extract any pages from the PDF")
-            
-            first_page = images[0]
-            
-            # Convert the first page to a base64-encoded JPEG
-            img_byte_arr = io.BytesIO()
-            first_page.save(img_byte_arr, format="JPEG", quality=85)
-            img_byte_arr = img_byte_arr.getvalue()
-            
-            # Process all pages for content analysis
-            content_parts = []
-            for i, img in enumerate(images[:2]):  # Limit to first 2 pages
-                img_bytes = io.BytesIO()
-                img.save(img_bytes, format="JPEG", quality=85)
-                content_parts.append({
-                    "mime_type": "image/jpeg",
-                    "data": base64.b64encode(img_bytes.getvalue()).decode()
-                })
-
-            return {
-                "images": images,
-                "first_page": first_page,
-                "content": content_parts,
-                "page_count": len(images),
-                "file_size": len(uploaded_file.getvalue()) if hasattr(uploaded_file, 'getvalue') else "Unknown"
-            }
-            
+        return len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+    except Exception:
+        return 0
+
+def render_preview_page(pdf_bytes, page_number, content_hash=None):
+    """
+    Renders one page of a text-mode PDF for the preview, on demand.
+
+    Args:
+        pdf_bytes (bytes): Raw PDF content
+        page_number (int): 1-based page number
+        content_hash (str): Precomputed SHA-256 of ``pdf_bytes``
+
+    Returns:
+        bytes: Encoded JPEG of the page (served from the page cache after the first call)
+    """
+    pages = render_pdf_pages(pdf_bytes, dpi=PREVIEW_DPI, first_page=page_number, last_page=page_number,
+                             content_hash=content_hash)
+    if not pages:
+        raise ValueError(f"Could not render page {page_number} of the PDF")
+    return pages[0]
+
+def assess_text_quality(text):
+    """
+    Judges whether an extracted text layer is good enough to replace page images.
+
+    Returns:
+        tuple: (is_usable, stats) where stats holds the character count and bad glyph ratio
+    """
+    visible_chars = len(re.sub(r"\s", "", text))
+    bad_glyphs = sum(len(match) for match in _BAD_GLYPH_PATTERN.findall(text))
+    bad_ratio = bad_glyphs / visible_chars if visible_chars else 1.0
+
+    stats = {"char_count": visible_chars, "bad_glyph_ratio": round(bad_ratio, 4)}
+    is_usable = visible_chars >= MIN_TEXT_CHARS and bad_ratio <= MAX_BAD_GLYPH_RATIO
+    return is_usable, stats
+
+def prepare_pdf_bytes(pdf_bytes, extraction_mode=None, thread_count=1):
+    """
+    Extracts model content and encoded page renders from raw PDF bytes.
+
+    This is the Streamlit-free core of ``process_uploaded_pdf``. It only returns
+    plain, picklable data (encoded bytes and strings), so it can run inside
+    worker processes; ``build_pdf_data`` turns the result into the session form.
+
+    Args:
+        pdf_bytes (bytes): Raw PDF content
+        extraction_mode (str): "auto", "text" or "image" (defaults to ATS_PDF_EXTRACTION_MODE)
+        thread_count (int): Number of poppler processes used to render pages in parallel
+
+    Returns:
+        dict: Prepared PDF data with "page_bytes" holding the encoded page renders.
+        Text-mode PDFs are not rasterized: "page_bytes" is empty and "pdf_bytes"
+        holds the PDF, from which preview pages are rendered on demand
+        (``render_preview_page``).
+    """
+    extraction_mode = (extraction_mode or EXTRACTION_MODE).lower()
+
+    try:
+        content_hash = compute_content_hash(pdf_bytes)
+
+        # Prefer the text layer for born-digital PDFs
+        text = ""
+        text_stats = None
+        use_text = False
+        if extraction_mode != "image":
+            text = extract_text_layer(pdf_bytes)
+            is_usable, text_stats = assess_text_quality(text)
+            use_text = bool(text) and (is_usable or extraction_mode == "text")
+
+        prepared = {
+            "content_hash": content_hash,
+            "extraction_mode": "text" if use_text else "image",
+            "text": text,
+            "text_stats": text_stats,
+            "payload_stats": None,
+            "file_size": len(pdf_bytes)
+        }
+
+        if use_text:
+            # The model never sees page images in text mode, so pages are only
+            # rendered when the preview shows them
+            prepared.update({
+                "page_bytes": [],
+                "pdf_bytes": pdf_bytes,
+                "content": [f"Resume text (extracted from the PDF):\n{text}"],
+                "page_count": min(count_pdf_pages(pdf_bytes), MAX_RENDER_PAGES),
+            })
+            return prepared
+
+        # Convert PDF to images (served from the page cache when possible)
+        page_bytes = render_pdf_pages(
+            pdf_bytes, dpi=RENDER_DPI, content_hash=content_hash, thread_count=thread_count
+        )
+
+        if not page_bytes:
+            raise ValueError("Could not extract any pages from the PDF")
+
+        # Every rendered page, cropped and scaled to the token budget
+        content_parts, payload_stats = shape_page_parts(page_bytes)
+        prepared.update({
+            "page_bytes": page_bytes,
+            "content": content_parts,
+            "payload_stats": payload_stats,
+            "page_count": len(page_bytes),
+        })
+        return prepared
+
     except pdf2image.exceptions.PDFInfoNotInstalledError:
         raise ValueError("PDF processing tools not properly installed. Please contact support.")
     except Exception as e:
         raise ValueError(f"Error processing PDF: {str(e)}")
 
+def build_pdf_data(prepared):
+    """
+    Turns the output of ``prepare_pdf_bytes`` into the session result form,
+    decoding the page renders into PIL images for the preview. This form holds
+    decoded images, so the preview pages of a text-mode PDF are rendered here.
+    """
+    pdf_data = dict(prepared)
+    page_bytes = pdf_data.pop("page_bytes")
+    pdf_bytes = pdf_data.pop("pdf_bytes", None)
+    if pdf_bytes is not None:
+        page_bytes = [
+            render_preview_page(pdf_bytes, page_number, pdf_data.get("content_hash"))
+            for page_number in range(1, pdf_data["page_count"] + 1)
+        ]
+    images = [Image.open(io.BytesIO(data)) for data in page_bytes]
+    pdf_data["images"] = images
+    pdf_data["first_page"] = images[0]
+    return pdf_data
+
+def process_uploaded_pdf(uploaded_file, extraction_mode=None):
+    """
+    Converts uploaded PDF into base64-encoded image parts for generative AI processing.
+    Supports multi-page PDFs and provides better error handling.
+    Rendered pages are cached on disk by content hash, so re-uploads skip rasterization.
+
+    Born-digital PDFs with a usable text layer are sent to the model as text
+    ("auto" mode); scanned or image-only PDFs fall back to page images.
+
+    Args:
+        uploaded_file: Streamlit UploadedFile (or any object exposing the PDF bytes)
+        extraction_mode (str): "auto", "text" or "image" (defaults to ATS_PDF_EXTRACTION_MODE)
+    """
+    if not uploaded_file:
+        raise FileNotFoundError("No file uploaded.")
+
+    # Show progress for large files
+    with st.spinner("Processing PDF..."):
+        prepared = prepare_pdf_bytes(_read_pdf_bytes(uploaded_file), extraction_mode)
+        return build_pdf_data(prepared)
+
 def validate_pdf_file(uploaded_file):
     """
     Validates the uploaded PDF file.
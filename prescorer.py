@@ -0,0 +1,146 @@
+"""
+Local, deterministic pre-scoring of resumes against a job description.
+
+Resumes are ranked with BM25 over a sparse term matrix built from their
+extracted text, blended with the share of JD keywords each resume covers.
+Scoring a resume takes well under a millisecond, so a large pool can be
+triaged before any model call and only the top candidates sent to the LLM.
+"""
+import math
+import re
+from collections import Counter
+
+# Keeps tech tokens such as "c++", "c#", "node.js" and "ci/cd" intact
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+# Compound tokens are also indexed by their parts ("python/django" -> "python", "django")
+_COMPOUND_SEPARATORS = re.compile(r"[./]")
+
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being but by can could do does
+for from has have having he her his how i if in into is it its job may more most must no
+not of on or our out over per role she should so such than that the their them then there
+these they this those through to under up us we were what when where which while who will
+with within work would year years you your able ability strong plus including etc using
+experience responsibilities requirements required preferred candidate team skills knowledge
+""".split())
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+COVERAGE_WEIGHT = 0.6  # Blend of keyword coverage vs. relative BM25 in the final score
+
+
+def _is_term(token):
+    if len(token) > 1:
+        return token not in STOPWORDS
+    return token in ("c", "r")  # Single-letter languages
+
+
+def tokenize(text):
+    """
+    Lowercase and split text into terms, dropping stopwords and trailing punctuation.
+
+    Tokens joined with "/" or "." are kept whole and also split into their parts,
+    so "Python/Django" matches a JD asking for Python and "ci/cd" still matches "ci/cd".
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall((text or "").lower()):
+        token = token.rstrip(".-/")
+        if _is_term(token):
+            terms.append(token)
+        parts = _COMPOUND_SEPARATORS.split(token)
+        if len(parts) > 1:
+            terms.extend(part.strip("-") for part in parts if _is_term(part.strip("-")))
+    return terms
+
+
+def build_term_matrix(documents):
+    """
+    Build a sparse document-term matrix.
+
+    Args:
+        documents (dict): {name: text}
+
+    Returns:
+        tuple: ({name: Counter of term frequencies}, {name: document length}, Counter of document frequencies)
+    """
+    matrix = {}
+    lengths = {}
+    document_frequency = Counter()
+    for name, text in documents.items():
+        counts = Counter(tokenize(text))
+        matrix[name] = counts
+        lengths[name] = sum(counts.values())
+        document_frequency.update(counts.keys())
+    return matrix, lengths, document_frequency
+
+
+def bm25_scores(query_terms, matrix, lengths, document_frequency, k1=BM25_K1, b=BM25_B):
+    """Return {name: BM25 score} of every document for the given query terms."""
+    doc_count = len(matrix)
+    if not doc_count:
+        return {}
+    average_length = (sum(lengths.values()) / doc_count) or 1.0
+
+    idf = {
+        term: math.log((doc_count - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5) + 1.0)
+        for term in query_terms
+    }
+
+    scores = {}
+    for name, counts in matrix.items():
+        norm = k1 * (1 - b + b * lengths[name] / average_length)
+        score = 0.0
+        for term in query_terms:
+            tf = counts.get(term)
+            if tf:
+                score += idf[term] * tf * (k1 + 1) / (tf + norm)
+        scores[name] = score
+    return scores
+
+
+def score_resumes(job_description, resume_texts):
+    """
+    Rank resumes against a job description.
+
+    Args:
+        job_description (str): The JD text
+        resume_texts (dict): {resume name: extracted text}; empty text marks a resume as unscored
+
+    Returns:
+        list: Dicts with name, score (0-100 or None), bm25, keyword_coverage, matched_terms and
+        missing_terms, best first; unscored resumes come last
+    """
+    query_terms = sorted(set(tokenize(job_description)))
+    scoreable = {name: text for name, text in resume_texts.items() if text and text.strip()}
+
+    matrix, lengths, document_frequency = build_term_matrix(scoreable)
+    bm25 = bm25_scores(query_terms, matrix, lengths, document_frequency)
+    best_bm25 = max(bm25.values(), default=0.0) or 1.0
+
+    ranked = []
+    for name, counts in matrix.items():
+        matched = [term for term in query_terms if term in counts]
+        coverage = len(matched) / len(query_terms) if query_terms else 0.0
+        relative_bm25 = bm25[name] / best_bm25
+        ranked.append({
+            "name": name,
+            "score": round(100 * (COVERAGE_WEIGHT * coverage + (1 - COVERAGE_WEIGHT) * relative_bm25), 1),
+            "bm25": round(bm25[name], 3),
+            "keyword_coverage": round(coverage, 3),
+            "matched_terms": matched,
+            "missing_terms": [term for term in query_terms if term not in counts],
+        })
+    ranked.sort(key=lambda item: (-item["score"], item["name"]))
+
+    for name in resume_texts:
+        if name not in scoreable:
+            ranked.append({
+                "name": name, "score": None, "bm25": None, "keyword_coverage": None,
+                "matched_terms": [], "missing_terms": query_terms,
+            })
+    return ranked
+
+
+def select_top_candidates(ranked, top_k):
+    """Return the names of the ``top_k`` best scored resumes (unscored ones fill remaining slots)."""
+    return [item["name"] for item in ranked[:max(0, top_k)]]
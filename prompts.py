@@ -58,3 +58,75 @@ def get_prompts(user_mode):
             Tailor the tone to be both professional and approachable.
             """
         }
+
+# Fields of the structured response used by the combined (single-call) analysis
+COMBINED_ANALYSIS_SCHEMA = {
+    "match_percentage": "integer from 0 to 100, strict ATS match between the resume and the job description",
+    "summary": "string, two or three sentence professional assessment",
+    "strengths": "list of strings, key strengths and qualifications relevant to the role",
+    "gaps": "list of strings, gaps or weaknesses against the job requirements",
+    "missing_keywords": "list of strings, critical keywords or skills missing from the resume",
+    "improvement_advice": "list of strings, actionable skills, certifications, projects or resume changes",
+    "cold_email": "string, concise professional cold email from the candidate about this job (empty for recruiters)",
+}
+
+def get_combined_prompt(user_mode):
+    """
+    Return a prompt that asks for every analysis of the given mode in one structured JSON response.
+    """
+    audience = (
+        "a seasoned Technical Human Resource Manager screening candidates"
+        if user_mode == "Recruiter"
+        else "a career coach and ATS expert advising a student or recent graduate"
+    )
+    fields = "\n    ".join(f'- "{name}": {description}' for name, description in COMBINED_ANALYSIS_SCHEMA.items())
+    return f"""
+    Act as {audience}. Strictly compare the resume against the job description and
+    respond with a single JSON object (no markdown fences) containing exactly these fields:
+    {fields}
+    Be extremely strict and precise in the match percentage. Keep every list item short and specific.
+    """
+
+def _bullets(items):
+    # Models sometimes answer a list field with a single string
+    if isinstance(items, str):
+        items = [items] if items.strip() else []
+    return "\n".join(f"- {item}" for item in items or []) or "- None identified"
+
+def split_combined_analysis(analysis, user_mode):
+    """
+    Turn a combined JSON analysis into the per-action responses used by the UI.
+
+    Args:
+        analysis (dict): Parsed JSON following COMBINED_ANALYSIS_SCHEMA
+        user_mode (str): "Recruiter" or "Student"
+
+    Returns:
+        dict: {action: response text} for every action returned by get_prompts(user_mode)
+    """
+    match = f"**Match Percentage: {analysis.get('match_percentage', 'N/A')}%**"
+    summary = analysis.get("summary", "")
+    strengths = _bullets(analysis.get("strengths"))
+    gaps = _bullets(analysis.get("gaps"))
+    missing_keywords = _bullets(analysis.get("missing_keywords"))
+    advice = _bullets(analysis.get("improvement_advice"))
+
+    about = f"### Key Strengths\n{strengths}\n\n### Gaps and Areas for Improvement\n{gaps}\n\n{summary}".strip()
+
+    if user_mode == "Recruiter":
+        responses = {
+            "Percentage Match ": f"{match}\n\n### Where the Resume Aligns\n{strengths}\n\n### Where It Falls Short\n{gaps}",
+            "Tell Me About the Resume": about,
+        }
+    else:
+        responses = {
+            "About the Resume": about,
+            "How Can I Improve My Skills": f"### Recommendations\n{advice}",
+            "Percentage Match Resume vs Job Descripition": (
+                f"{match}\n\n### Missing Keywords and Skills\n{missing_keywords}\n\n### Recommendations\n{advice}"
+            ),
+            "Generate Cold Email": analysis.get("cold_email") or "No cold email was generated.",
+        }
+
+    # Keep the action keys in sync with get_prompts
+    return {action: responses[action] for action in get_prompts(user_mode)}
@@ -0,0 +1,172 @@
+"""
+Token-bucket rate limiting for model requests.
+
+The bucket refills at ``rate`` tokens per second up to ``capacity`` tokens.
+Callers block (or await) until a token is available instead of failing, and
+give up only when their deadline would be exceeded. Bucket state lives either
+in memory (per process) or in a SQLite file shared by every worker process on
+the host.
+
+A bucket admits at most ``capacity + rate * window`` requests in any window,
+so limits expressed per window use ``window_bucket`` to split the quota
+between the burst and the refill instead of granting both in full.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+RATE_LIMIT_BACKEND = os.getenv("ATS_RATE_LIMIT_BACKEND", "sqlite").lower()
+RATE_LIMIT_PATH = os.getenv("ATS_RATE_LIMIT_PATH", os.path.join(".cache", "rate_limit.sqlite3"))
+
+
+class MemoryBucketBackend:
+    """Process-local bucket state guarded by a lock."""
+
+    def __init__(self, clock=time.time):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._clock = clock
+
+    def take(self, name, rate, capacity, tokens):
+        """
+        Try to remove ``tokens`` from the bucket.
+
+        Returns:
+            float: 0 when the tokens were taken, otherwise the seconds until they will be available
+        """
+        with self._lock:
+            now = self._clock()
+            available, updated_at = self._buckets.get(name, (capacity, now))
+            available = min(capacity, available + (now - updated_at) * rate)
+            if available >= tokens:
+                self._buckets[name] = (available - tokens, now)
+                return 0.0
+            self._buckets[name] = (available, now)
+            return (tokens - available) / rate
+
+
+class SQLiteBucketBackend:
+    """Bucket state stored in SQLite so that every process on the host shares one budget."""
+
+    def __init__(self, path=RATE_LIMIT_PATH, clock=time.time):
+        self.path = path
+        self._clock = clock
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def take(self, name, rate, capacity, tokens):
+        """Same contract as ``MemoryBucketBackend.take``, atomic across processes."""
+        with self._connect() as conn:
+            # BEGIN IMMEDIATE takes the write lock up front, serializing concurrent takers
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = self._clock()
+                row = conn.execute(
+                    "SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)
+                ).fetchone()
+                available, updated_at = row if row else (capacity, now)
+                available = min(capacity, available + max(0.0, now - updated_at) * rate)
+                if available >= tokens:
+                    wait = 0.0
+                    available -= tokens
+                else:
+                    wait = (tokens - available) / rate
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (name, available, now)
+                )
+                conn.execute("COMMIT")
+                return wait
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+
+class TokenBucket:
+    """
+    Token-bucket limiter with blocking and asyncio acquisition.
+
+    Args:
+        rate (float): Tokens added per second
+        capacity (float): Maximum burst size
+        name (str): Bucket name (buckets with the same name share state in the backend)
+        backend: ``MemoryBucketBackend`` or ``SQLiteBucketBackend``
+    """
+
+    def __init__(self, rate, capacity, name="default", backend=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.name = name
+        self.backend = backend or MemoryBucketBackend()
+
+    def try_acquire(self, tokens=1):
+        """Take tokens without waiting. Returns the wait time (0 on success)."""
+        return self.backend.take(self.name, self.rate, self.capacity, tokens)
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        Block until ``tokens`` are available.
+
+        Returns:
+            bool: True once acquired, False if it cannot happen before ``timeout`` seconds
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1, timeout=None):
+        """Asyncio counterpart of ``acquire`` that yields to the event loop while waiting."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, tokens)
+            if wait <= 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+
+def window_bucket(limit, window, burst, name="default", backend=None):
+    """
+    Build a bucket that never admits more than ``limit`` requests in any ``window`` seconds.
+
+    Args:
+        limit (int): Requests allowed per window (at least 2)
+        window (float): Window length in seconds
+        burst (int): Requests allowed back to back; the rest of the quota refills over the window
+
+    Returns:
+        TokenBucket: Bucket with ``capacity + rate * window <= limit``
+    """
+    burst = max(1, min(burst, limit - 1))
+    return TokenBucket(rate=(limit - burst) / window, capacity=burst, name=name, backend=backend)
+
+
+def create_backend(kind=RATE_LIMIT_BACKEND, path=RATE_LIMIT_PATH):
+    """Create the configured bucket backend ("sqlite" or "memory")."""
+    if kind == "memory":
+        return MemoryBucketBackend()
+    return SQLiteBucketBackend(path)
@@ -0,0 +1,77 @@
+"""
+Cache of rendered PDF reports.
+
+Rendering a report with reportlab is expensive, and Streamlit reruns the script
+on every interaction, so rendered reports are memoized in a size-bounded LRU
+keyed by a hash of the report inputs and the template version.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from pdf_generator import create_pdf_response, create_multi_analysis_pdf, get_report_templates, DEFAULT_THEME, REPORT_TEMPLATE_VERSION
+
+REPORT_CACHE_MAX_BYTES = int(os.getenv("ATS_REPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def make_report_key(kind, *parts):
+    """Hash the report kind, its inputs and the template version into a cache key."""
+    payload = json.dumps([kind, REPORT_TEMPLATE_VERSION, *parts], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """Thread-safe LRU of (pdf_bytes, filename) tuples bounded by total PDF size."""
+
+    def __init__(self, max_bytes=REPORT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key)[0])
+            self._entries[key] = entry
+            self._size += len(entry[0])
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted[0])
+
+    def get_or_render(self, key, render):
+        """Return the cached report for ``key``, rendering it with ``render()`` on a miss."""
+        entry = self.get(key)
+        if entry is None:
+            entry = render()
+            self.put(key, entry)
+        return entry
+
+
+_default_cache = ReportCache()
+
+
+def _theme_id(theme):
+    templates = get_report_templates(theme)
+    return [templates.theme.THEME_NAME, templates.theme.THEME_VERSION]
+
+
+def get_pdf_response(title, response, filename_prefix="ATS_Analysis", theme=DEFAULT_THEME):
+    """Cached ``create_pdf_response``."""
+    key = make_report_key("single", _theme_id(theme), title, response, filename_prefix)
+    return _default_cache.get_or_render(key, lambda: create_pdf_response(title, response, filename_prefix, theme))
+
+
+def get_multi_analysis_pdf(analyses, filename_prefix="ATS_Complete_Analysis", theme=DEFAULT_THEME):
+    """Cached ``create_multi_analysis_pdf``."""
+    key = make_report_key("multi", _theme_id(theme), list(analyses.items()), filename_prefix)
+    return _default_cache.get_or_render(key, lambda: create_multi_analysis_pdf(analyses, filename_prefix, theme))
@@ -0,0 +1,251 @@
+"""
+Batch exports: per-candidate reports in a ZIP archive and the pool leaderboard.
+
+Reports are rendered by a bounded process pool so a large export scales with
+the number of cores, and each PDF is written to the archive as soon as it
+finishes, so only the reports still in flight are held in memory. Exports run
+as background jobs (see job_queue) and report progress through the job context.
+"""
+import multiprocessing
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from leaderboard_report import build_leaderboard_pdf, extract_match_percentage, LEADERBOARD_TOP_GAPS
+from pdf_generator import create_multi_analysis_pdf, DEFAULT_THEME
+
+# Upper bound on worker processes (defaults to the number of cores, capped at 8)
+EXPORT_MAX_WORKERS = int(os.getenv("ATS_EXPORT_MAX_WORKERS", str(min(8, os.cpu_count() or 1))))
+EXPORT_DIR = os.getenv("ATS_EXPORT_DIR", os.path.join(".cache", "exports"))
+EXPORT_TTL = 3600  # Seconds finished archives are kept on disk
+
+# Artifact key of the finished archive path
+EXPORT_ARTIFACT = "export_path"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Return the long-lived export pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # "spawn" avoids forking the multi-threaded Streamlit server process
+            _pool = ProcessPoolExecutor(
+                max_workers=EXPORT_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _reset_pool(broken):
+    """
+    Drop a broken pool so the next export starts with fresh workers. Does nothing
+    once ``broken`` was already replaced, so the other futures of the same broken
+    pool do not shut down its healthy successor.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not broken:
+            return
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _render_one(candidate, analyses, theme):
+    """Worker entry point: render one candidate's report, capturing errors as data."""
+    try:
+        pdf_bytes, _ = create_multi_analysis_pdf(analyses, f"{_safe_name(candidate)}_Complete_Analysis", theme)
+        return candidate, pdf_bytes, None
+    except Exception as e:
+        return candidate, None, str(e)
+
+
+def _safe_name(candidate):
+    name = re.sub(r'\.pdf$', '', candidate, flags=re.IGNORECASE)
+    name = re.sub(r'[^\w\s-]', '', name).strip()
+    return re.sub(r'[-\s]+', '_', name)[:60] or "candidate"
+
+
+def _entry_name(candidate, used_names):
+    """Return a unique archive entry name for a candidate."""
+    base = f"{_safe_name(candidate)}_report"
+    name, suffix = f"{base}.pdf", 2
+    while name in used_names:
+        name, suffix = f"{base}_{suffix}.pdf", suffix + 1
+    used_names.add(name)
+    return name
+
+
+def _sweep_exports():
+    """Remove archives of earlier exports once they are older than EXPORT_TTL."""
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    cutoff = time.time() - EXPORT_TTL
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _render_reports(candidates, theme, is_cancelled):
+    """
+    Yield (candidate, pdf_bytes, error) as reports finish, keeping at most two
+    reports per worker in flight.
+    """
+    items = iter(candidates.items())
+
+    if len(candidates) == 1 or EXPORT_MAX_WORKERS <= 1:
+        for candidate, analyses in items:
+            if is_cancelled():
+                return
+            yield _render_one(candidate, analyses, theme)
+        return
+
+    pool = _get_pool()
+    pending = {}
+
+    def submit_next():
+        for candidate, analyses in items:
+            pending[pool.submit(_render_one, candidate, analyses, theme)] = candidate, pool
+            return True
+        return False
+
+    try:
+        for _ in range(2 * EXPORT_MAX_WORKERS):
+            if not submit_next():
+                break
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                candidate, submitted_to = pending.pop(future)
+                try:
+                    yield future.result()
+                except BrokenProcessPool as e:
+                    _reset_pool(submitted_to)
+                    pool = _get_pool()
+                    yield candidate, None, f"Worker process failed ({e})"
+                except Exception as e:
+                    yield candidate, None, str(e)
+                if is_cancelled():
+                    return
+                submit_next()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def export_reports(ctx, candidates, theme=DEFAULT_THEME):
+    """
+    Renders a complete-analysis report per candidate into a ZIP archive.
+
+    Args:
+        ctx (JobContext): Job handle for progress, results and artifacts
+        candidates (dict): {candidate file name: {analysis title: response}}
+        theme (str): Name of a registered PDF theme
+
+    Each report is recorded as ``ctx.add_result(candidate, "report", entry_name, error)``
+    and the finished archive path is stored as the ``export_path`` artifact.
+    Reports that fail to render are listed in ``errors.txt`` inside the archive.
+    """
+    _sweep_exports()
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    zip_path = os.path.join(EXPORT_DIR, f"{ctx.job_id}.zip")
+    partial_path = f"{zip_path}.part"
+
+    used_names = set()
+    errors = []
+    try:
+        # PDFs are already compressed, so entries are stored rather than deflated
+        with zipfile.ZipFile(partial_path, "w", compression=zipfile.ZIP_STORED) as archive:
+            reports = _render_reports(candidates, theme, ctx.is_cancelled)
+            for done, (candidate, pdf_bytes, error) in enumerate(reports, start=1):
+                if error:
+                    errors.append(f"{candidate}: {error}")
+                    ctx.add_result(candidate, "report", None, error)
+                else:
+                    entry_name = _entry_name(candidate, used_names)
+                    archive.writestr(entry_name, pdf_bytes)
+                    ctx.add_result(candidate, "report", entry_name)
+                ctx.set_progress(done / len(candidates), f"Rendered {candidate} ({done}/{len(candidates)})")
+            if errors:
+                archive.writestr("errors.txt", "\n".join(errors) + "\n")
+        ctx.check_cancelled()
+        os.replace(partial_path, zip_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    ctx.set_artifact(EXPORT_ARTIFACT, zip_path)
+    return zip_path
+
+
+def collect_leaderboard_candidates(analyzed, prescores=None):
+    """
+    Builds the leaderboard rows of a candidate pool.
+
+    Args:
+        analyzed (dict): {candidate file name: {analysis title: response}}
+        prescores (list): Optional output of prescorer.score_resumes covering the whole pool
+
+    Returns:
+        list: Dicts with name, match, prescore and gaps. The match is the percentage
+        stated by the AI analysis (None when there is none) and the prescore is the
+        local keyword score; the two scales are not comparable, so they are kept
+        apart. Gaps are the top missing job description keywords.
+    """
+    rows = {}
+    for item in prescores or []:
+        rows[item["name"]] = {
+            "name": item["name"],
+            "match": None,
+            "prescore": item["score"],
+            "gaps": item["missing_terms"][:LEADERBOARD_TOP_GAPS],
+        }
+    for name, analyses in analyzed.items():
+        row = rows.setdefault(name, {"name": name, "match": None, "prescore": None, "gaps": []})
+        row["match"] = extract_match_percentage(analyses)
+    return list(rows.values())
+
+
+def export_leaderboard(ctx, candidates, analyzed, theme=DEFAULT_THEME):
+    """
+    Renders the leaderboard report of a candidate pool to a PDF file.
+
+    Args:
+        ctx (JobContext): Job handle for progress and artifacts
+        candidates (list): Rows from collect_leaderboard_candidates
+        analyzed (dict): {candidate file name: {analysis title: response}} for the appendices
+        theme (str): Name of a registered PDF theme
+
+    The finished PDF path is stored as the ``export_path`` artifact.
+    """
+    _sweep_exports()
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    pdf_path = os.path.join(EXPORT_DIR, f"{ctx.job_id}.pdf")
+    partial_path = f"{pdf_path}.part"
+
+    def on_candidate(position, candidate):
+        ctx.check_cancelled()
+        if position % 25 == 0 or position == len(candidates):
+            ctx.set_progress(position / len(candidates), f"Rendering appendix {position}/{len(candidates)}")
+
+    try:
+        with open(partial_path, "wb") as output:
+            build_leaderboard_pdf(candidates, output, analyzed.get, theme, on_candidate=on_candidate)
+        os.replace(partial_path, pdf_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    ctx.set_artifact(EXPORT_ARTIFACT, pdf_path)
+    return pdf_path
@@ -0,0 +1,240 @@
+"""
+Resilient call layer for model requests.
+
+Upstream failures are mapped to typed errors, retryable ones are retried with
+exponential backoff and full jitter (honoring retry-after hints) within a
+per-request deadline, and a circuit breaker sheds load while the upstream is
+degraded so a dead service fails fast instead of tying up workers.
+"""
+import os
+import random
+import re
+import threading
+import time
+
+MODEL_MAX_ATTEMPTS = int(os.getenv("ATS_MODEL_MAX_ATTEMPTS", "4"))
+MODEL_DEADLINE = float(os.getenv("ATS_MODEL_DEADLINE", "180"))  # Seconds per request, retries included
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("ATS_CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("ATS_CIRCUIT_RESET_TIMEOUT", "30"))
+
+_TRANSIENT_STATUS_CODES = frozenset((408, 500, 502, 503, 504))
+# Rate limiting named in a message without a status code (not any digits that happen to contain 429)
+_RATE_LIMIT_PATTERN = re.compile(r'\b429\b|resource[\s_]exhausted|\bquota\b', re.IGNORECASE)
+_RETRY_HINT_PATTERNS = (
+    re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)'),
+    re.compile(r'retry in (\d+(?:\.\d+)?)\s*s', re.IGNORECASE),
+)
+
+
+class ModelCallError(Exception):
+    """Base class of typed model call failures; ``str()`` is a user-facing message."""
+    retryable = False
+
+
+class RateLimitedError(ModelCallError):
+    """The upstream rejected the request for quota or rate reasons (HTTP 429)."""
+    retryable = True
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TransientModelError(ModelCallError):
+    """Timeouts, connection failures and 5xx responses."""
+    retryable = True
+
+
+class PermanentModelError(ModelCallError):
+    """Errors that will not succeed on retry (invalid request, permission, ...)."""
+
+
+class DeadlineExceededError(ModelCallError):
+    """The request ran out of time, including waits and retries."""
+
+
+class CircuitOpenError(ModelCallError):
+    """The circuit breaker is open; the request was not sent."""
+
+
+def _status_code(exc):
+    for attribute in ("code", "status_code"):
+        code = getattr(exc, attribute, None)
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def retry_after_hint(exc):
+    """Return the server's suggested retry delay in seconds, if the error carries one."""
+    # HTTP client errors carry headers directly (urllib) or on their response (requests)
+    headers = getattr(exc, "headers", None) or getattr(getattr(exc, "response", None), "headers", None)
+    if headers:
+        try:
+            return float(headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            pass
+    message = str(exc)
+    for pattern in _RETRY_HINT_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def classify_error(exc):
+    """
+    Map an exception raised by a model call to a typed ModelCallError.
+
+    Returns:
+        ModelCallError: ``exc`` itself if it is already typed
+    """
+    if isinstance(exc, ModelCallError):
+        return exc
+    code = _status_code(exc)
+    message = str(exc)
+    if code == 429 or (code is None and _RATE_LIMIT_PATTERN.search(message)):
+        return RateLimitedError(
+            "⚠️ Rate limit exceeded. Please wait a moment and try again. "
+            "Consider upgrading to a paid plan for higher limits.",
+            retry_after=retry_after_hint(exc)
+        )
+    if code in _TRANSIENT_STATUS_CODES or isinstance(exc, (TimeoutError, ConnectionError)):
+        return TransientModelError(f"The AI service is temporarily unavailable: {exc}")
+    return PermanentModelError(f"Error generating response: {exc}")
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by a number of attempts."""
+
+    def __init__(self, max_attempts=MODEL_MAX_ATTEMPTS, base_delay=BACKOFF_BASE, max_delay=BACKOFF_MAX):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, error=None):
+        """Seconds to wait before retry number ``attempt`` (1-based)."""
+        hint = getattr(error, "retry_after", None)
+        if hint is not None:
+            # Honor the server's hint, with a little jitter so clients do not align
+            return min(self.max_delay, hint) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+
+    After ``failure_threshold`` consecutive retryable failures the circuit opens
+    and calls fail immediately with CircuitOpenError. Rate limiting is not a
+    failure: a 429 shows the upstream is up and only asks callers to slow down. After ``reset_timeout``
+    seconds a single trial call is let through (half-open); its outcome closes
+    or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT,
+                 clock=time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call must be shed."""
+        with self._lock:
+            if self._state == self.OPEN:
+                remaining = self._opened_at + self.reset_timeout - self._clock()
+                if remaining > 0:
+                    raise CircuitOpenError(
+                        f"The AI service is failing repeatedly; requests are paused for {remaining:.0f} more seconds."
+                    )
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    raise CircuitOpenError("The AI service is recovering; waiting for a trial request to finish.")
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def release(self):
+        """End a call that neither proved nor disproved upstream health."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+def call_with_resilience(fn, breaker=None, policy=None, deadline=MODEL_DEADLINE,
+                         sleep=time.sleep, clock=time.monotonic):
+    """
+    Call ``fn(timeout)`` with typed errors, retries, a deadline and a circuit breaker.
+
+    Args:
+        fn (callable): Performs one attempt; receives the seconds left before the deadline
+        breaker (CircuitBreaker): Breaker guarding the upstream (None disables it)
+        policy (RetryPolicy): Retry policy (defaults to RetryPolicy())
+        deadline (float): Seconds the whole call, waits and retries included, may take
+
+    Returns:
+        The result of ``fn``
+
+    Raises:
+        ModelCallError: A typed error once retries are exhausted or not allowed
+    """
+    policy = policy or RetryPolicy()
+    expires_at = clock() + deadline
+    attempt = 0
+    while True:
+        attempt += 1
+        remaining = expires_at - clock()
+        if remaining <= 0:
+            raise DeadlineExceededError(f"The AI request did not complete within {deadline:.0f} seconds.")
+        if breaker:
+            breaker.before_call()
+        try:
+            result = fn(remaining)
+        except Exception as e:
+            error = classify_error(e)
+            if breaker:
+                if error.retryable and not isinstance(error, RateLimitedError):
+                    breaker.record_failure()
+                else:
+                    breaker.release()
+            if not error.retryable or attempt >= policy.max_attempts:
+                raise error from e
+            delay = policy.delay(attempt, error)
+            if clock() + delay >= expires_at:
+                raise DeadlineExceededError(
+                    f"The AI request did not complete within {deadline:.0f} seconds ({error})"
+                ) from e
+            sleep(delay)
+            continue
+        if breaker:
+            breaker.record_success()
+        return result
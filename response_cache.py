@@ -0,0 +1,326 @@
+"""
+Persistent cache of model responses.
+
+Responses are stored in a local SQLite database keyed by the hashes of the
+normalized job description, the resume content, the prompt text and the model
+name, so identical questions are answered from disk across sessions, browser
+tabs and processes. Entries expire after a TTL and the table is bounded in size.
+
+Identical requests that are in flight at the same time are coalesced: within a
+process through single-flight, across processes through a short-lived claim
+row, so only one of them calls the model and the others wait for its answer.
+The claiming process refreshes its claim while it computes, so a claim only
+outlives its process by at most RESPONSE_CLAIM_TTL seconds.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from single_flight import SingleFlight
+
+RESPONSE_CACHE_PATH = os.getenv("ATS_RESPONSE_CACHE_PATH", os.path.join(".cache", "responses.sqlite3"))
+RESPONSE_CACHE_TTL = int(os.getenv("ATS_RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))  # 7 days
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("ATS_RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+# Lifetime of an unrefreshed claim: how long other processes wait on a claim whose process died
+RESPONSE_CLAIM_TTL = float(os.getenv("ATS_RESPONSE_CLAIM_TTL", "30"))
+_CLAIM_POLL_INTERVAL = 0.5
+
+# Run an eviction sweep every N writes
+_EVICTION_INTERVAL = 50
+
+
+def _sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize_job_description(text):
+    """Collapse whitespace so trivially different pastes of a JD share a key."""
+    return " ".join((text or "").split())
+
+
+def hash_resume_content(pdf_content):
+    """
+    Hash the resume parts sent to the model (text parts or base64 image parts).
+    """
+    digest = hashlib.sha256()
+    for part in pdf_content or []:
+        if isinstance(part, dict):
+            digest.update(part.get("mime_type", "").encode("utf-8"))
+            digest.update(b"\0")
+            digest.update(str(part.get("data", "")).encode("utf-8"))
+        else:
+            digest.update(str(part).encode("utf-8"))
+        digest.update(b"\1")
+    return digest.hexdigest()
+
+
+def make_response_key(input_text, pdf_content, prompt, model_name):
+    """
+    Build the cache key for a (job description, resume, prompt, model) request.
+    """
+    return _sha256(json.dumps([
+        _sha256(normalize_job_description(input_text)),
+        hash_resume_content(pdf_content),
+        _sha256(prompt.strip()),
+        model_name,
+    ]))
+
+
+class _Flight:
+    """Handle of a coalesced computation (see ResponseCache.coalesce)."""
+
+    def __init__(self, cache, key, model_name, cached=None):
+        self._cache = cache
+        self._key = key
+        self._model_name = model_name
+        self.cached = cached  # Answer computed by another thread or process, if any
+        self.result = cached
+
+    def set(self, response):
+        """Record the computed response in the cache and hand it to the waiters."""
+        self.result = response
+        self._cache.put(self._key, response, self._model_name)
+
+
+class ResponseCache:
+    """SQLite-backed response cache with TTL and size-based (LRU) eviction."""
+
+    def __init__(self, path=RESPONSE_CACHE_PATH, ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                 claim_ttl=RESPONSE_CLAIM_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.claim_ttl = claim_ttl
+        # Retryable failures (see resilience.ModelCallError.retryable) are not
+        # shared: each waiter retries on its own instead of failing with the leader
+        self.flights = SingleFlight(share_error=lambda error: not getattr(error, "retryable", False))
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS claims (
+                    key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        # Short-lived connections keep the cache safe to use from any thread or process
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """Return the cached response for ``key`` or None if missing or expired."""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                response, created_at = row
+                if now - created_at > self.ttl:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    return None
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                return response
+        except sqlite3.Error:
+            return None
+
+    def put(self, key, response, model_name):
+        """Store a response, periodically evicting expired and least recently used entries."""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, model_name, response, now, now)
+                )
+        except sqlite3.Error:
+            return
+
+        with self._lock:
+            self._writes += 1
+            should_evict = self._writes % _EVICTION_INTERVAL == 1
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones above the size bound."""
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+            conn.execute("DELETE FROM claims")
+
+    def _try_claim(self, key, owner):
+        """Claim the computation of ``key`` for this process; False if another process holds it."""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM claims WHERE key = ? AND expires_at < ?", (key, now))
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO claims (key, owner, expires_at) VALUES (?, ?, ?)",
+                    (key, owner, now + self.claim_ttl)
+                )
+                return cursor.rowcount == 1
+        except sqlite3.Error:
+            return True  # Never block on a broken claim table; compute instead
+
+    def _refresh_claim(self, key, owner):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE claims SET expires_at = ? WHERE key = ? AND owner = ?",
+                    (time.time() + self.claim_ttl, key, owner)
+                )
+        except sqlite3.Error:
+            pass
+
+    def _hold_claim(self, key, owner, stop):
+        """Keep a claim alive until ``stop`` is set (runs on a daemon thread)."""
+        while not stop.wait(self.claim_ttl / 3):
+            self._refresh_claim(key, owner)
+
+    def _release_claim(self, key, owner):
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM claims WHERE key = ? AND owner = ?", (key, owner))
+        except sqlite3.Error:
+            pass
+
+    def _await_claim(self, key, owner, wait_timeout):
+        """
+        Wait until the response is cached or this process may compute it, for
+        at most ``wait_timeout`` seconds.
+
+        Returns:
+            tuple: (cached response or None, whether the claim is held)
+        """
+        deadline = time.monotonic() + wait_timeout
+        while True:
+            cached = self.get(key)
+            if cached is not None:
+                return cached, False
+            if self._try_claim(key, owner):
+                return None, True
+            if time.monotonic() >= deadline:
+                return None, False  # Stop waiting for a stuck process and compute anyway
+            time.sleep(_CLAIM_POLL_INTERVAL)
+
+    @contextmanager
+    def coalesce(self, key, model_name, wait_timeout=None):
+        """
+        Coordinate the computation of one response across threads and processes.
+
+        ``wait_timeout`` bounds the wait on another process's claim (callers pass
+        what is left of their request deadline); by default it is unbounded, and
+        only ends when the claim is released or expires.
+
+        Yields a flight handle. When ``flight.cached`` is set, another thread or
+        process already produced the response; otherwise the caller computes it
+        and records it with ``flight.set(response)``, while identical requests
+        wait. Permanent errors raised by the computing thread are shared with the
+        threads waiting on it; after a retryable one they compute on their own.
+        """
+        while True:
+            call, leader = self.flights.begin(key)
+            if leader:
+                break
+            result = self.flights.wait(call)
+            if result is not None:
+                yield _Flight(self, key, model_name, cached=result)
+                return
+
+        owner = uuid.uuid4().hex
+        claimed = False
+        keep_claim = threading.Event()
+        try:
+            cached, claimed = self._await_claim(key, owner, float("inf") if wait_timeout is None else wait_timeout)
+            if claimed:
+                threading.Thread(target=self._hold_claim, args=(key, owner, keep_claim), daemon=True).start()
+            flight = _Flight(self, key, model_name, cached=cached)
+            yield flight
+        except GeneratorExit:
+            self.flights.finish(key, call)  # Abandoned: waiters compute on their own
+            raise
+        except BaseException as e:
+            self.flights.finish(key, call, error=e)
+            raise
+        else:
+            self.flights.finish(key, call, result=flight.result)
+        finally:
+            keep_claim.set()
+            if claimed:
+                self._release_claim(key, owner)
+
+    def get_or_compute(self, key, compute, model_name, wait_timeout=None):
+        """
+        Return the cached response for ``key``, computing it with ``compute()``
+        on a miss; concurrent identical calls share one computation.
+        ``wait_timeout`` is passed to ``coalesce``.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        with self.coalesce(key, model_name, wait_timeout) as flight:
+            if flight.cached is None:
+                flight.set(compute())
+            return flight.result
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide response cache instance."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ResponseCache()
+    return _default_cache
@@ -1,24 +1,58 @@
 import streamlit as st
 import re
+from pdf_processing import get_thumbnail
 try:
-    from pdf_generator import create_pdf_response, create_multi_analysis_pdf
+    from report_cache import get_pdf_response, get_multi_analysis_pdf, make_report_key
     PDF_AVAILABLE = True
 except ImportError:
     PDF_AVAILABLE = False
 
-def display_response(title, response):
+def _lazy_pdf_download(label, state_key, render, help_text=None):
+    """
+    Offers a PDF download without rendering it on every rerun.
+    
+    The report is rendered (through the report cache) only after the user asks
+    for it, and the download button clears the request when clicked, so later
+    reruns show the prepare button again instead of re-sending the PDF.
+    """
+    ready_key = f"pdf_ready_{state_key}"
+    if not st.session_state.get(ready_key):
+        if not st.button(f"⚙️ Prepare {label}", key=f"prepare_{state_key}", help=help_text):
+            return
+        st.session_state[ready_key] = True
+    
+    with st.spinner("Rendering PDF..."):
+        pdf_data, pdf_filename = render()
+    st.download_button(
+        label=label,
+        data=pdf_data,
+        file_name=pdf_filename,
+        mime="application/pdf",
+        key=f"download_{state_key}",
+        help=help_text,
+        on_click=st.session_state.pop,
+        args=(ready_key, None)
+    )
+
+def display_response(title, response, streaming=False):
     """
     Displays the AI-generated response with enhanced formatting.
+    
+    Args:
+        title (str): Heading of the analysis
+        response (str): The response text
+        streaming (bool): The response is still being generated; render the
+            partial markdown without download options
     """
     st.markdown(f"### {title}")
     
-    if not response:
-        st.error("❌ No response received from the AI model.")
+    if streaming:
+        st.markdown(f"{response} ▌")
+        st.caption("✍️ Generating response...")
         return
     
-    # Check for rate limiting or error messages
-    if any(keyword in response.lower() for keyword in ["rate limit", "quota", "error", "wait"]):
-        st.warning(f"⚠️ {response}")
+    if not response:
+        st.error("❌ No response received from the AI model.")
         return
     
     # Format different types of responses
@@ -68,13 +102,10 @@ def display_response(title, response):
         # PDF Download (preferred)
         if PDF_AVAILABLE:
             try:
-                pdf_data, pdf_filename = create_pdf_response(title, response)
-                st.download_button(
-                    label="📄 Download as PDF",
-                    data=pdf_data,
-                    file_name=pdf_filename,
-                    mime="application/pdf",
-                    key=f"download_pdf_{title}"
+                _lazy_pdf_download(
+                    "📄 Download as PDF",
+                    make_report_key("single", title, response)[:16],
+                    lambda: get_pdf_response(title, response)
                 )
             except Exception as e:
                 st.error(f"PDF generation failed: {str(e)}")
@@ -106,6 +137,24 @@ def display_response(title, response):
                 key=f"download_txt_backup_{title}"
             )
 
+def _page_source(pdf_data, index):
+    """
+    A page for ``st.image``: the encoded JPEG when the session keeps it compact
+    (no decode and re-encode), otherwise the decoded image.
+    """
+    if hasattr(pdf_data, "page_bytes"):
+        return pdf_data.page_bytes(index)
+    return pdf_data["images"][index]
+
+def _thumbnail_source(pdf_data):
+    """
+    The sidebar thumbnail: a small cached WebP of the first page, so reruns do not
+    send the full render to the browser again.
+    """
+    if hasattr(pdf_data, "page_bytes") and pdf_data.get("content_hash"):
+        return get_thumbnail(pdf_data["content_hash"], 1, lambda: pdf_data.page_bytes(0))
+    return pdf_data["first_page"]
+
 def display_preview(pdf_data, selected_resume):
     """
     Enhanced resume preview with better navigation.
@@ -119,10 +168,12 @@ def display_preview(pdf_data, selected_resume):
             st.info(f"📑 Pages: {pdf_data['page_count']}")
         if "file_size" in pdf_data:
             st.info(f"📏 Size: {pdf_data['file_size']} bytes")
+        if pdf_data.get("extraction_mode") == "text":
+            st.info("🧾 Analyzed from the PDF text layer")
         
         # Thumbnail preview
         st.image(
-            pdf_data["first_page"], 
+            _thumbnail_source(pdf_data), 
             caption=f"Preview: {selected_resume}", 
             use_container_width=True
         )
@@ -140,19 +191,18 @@ def display_preview(pdf_data, selected_resume):
     if st.session_state.fullscreen_preview == selected_resume:
         st.markdown("### 🔍 Full-Screen Preview")
         
-        # Page navigation for multi-page PDFs
-        if len(pdf_data["images"]) > 1:
+        # Page navigation for multi-page PDFs; only the selected page is loaded and sent
+        page_total = len(pdf_data["images"])
+        page_num = 1
+        if page_total > 1:
             page_num = st.selectbox(
                 "Select page:",
-                range(1, len(pdf_data["images"]) + 1),
+                range(1, page_total + 1),
                 format_func=lambda x: f"Page {x}"
             )
-            selected_image = pdf_data["images"][page_num - 1]
-        else:
-            selected_image = pdf_data["first_page"]
             
         st.image(
-            selected_image,
+            _page_source(pdf_data, page_num - 1),
             caption=f"Full View: {selected_resume}",
             use_container_width=True
         )
@@ -182,6 +232,27 @@ def create_summary_dashboard(results):
     if error_count > 0:
         st.warning(f"⚠️ {error_count} resume(s) had processing errors. Check individual results for details.")
 
+def display_prescore_ranking(ranked, top_k):
+    """
+    Displays the local pre-scoring leaderboard.
+    
+    Args:
+        ranked (list): Output of prescorer.score_resumes
+        top_k (int): Number of candidates shortlisted for AI analysis
+    """
+    with st.expander(f"🔎 Local Pre-Score Ranking ({len(ranked)} resumes, top {top_k} sent to AI)"):
+        rows = []
+        for position, item in enumerate(ranked, 1):
+            rows.append({
+                "Rank": position,
+                "Resume": item["name"],
+                "Score": item["score"] if item["score"] is not None else "No text layer",
+                "Keyword Coverage": f"{item['keyword_coverage']:.0%}" if item["keyword_coverage"] is not None else "-",
+                "Top Missing Keywords": ", ".join(item["missing_terms"][:5]),
+                "AI Analysis": "✅" if position <= top_k else "",
+            })
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+
 def display_download_options(all_responses, resume_name="Resume"):
     """
     Displays enhanced download options for all analyses.
@@ -205,17 +276,12 @@ def display_download_options(all_responses, resume_name="Resume"):
                 valid_responses = {k: v for k, v in all_responses.items() if v and v.strip()}
                 
                 if valid_responses:
-                    pdf_data, pdf_filename = create_multi_analysis_pdf(
-                        valid_responses, 
-                        f"{resume_name}_Complete_Analysis"
-                    )
-                    st.download_button(
-                        label="📋 Download Complete Analysis (PDF)",
-                        data=pdf_data,
-                        file_name=pdf_filename,
-                        mime="application/pdf",
-                        key="download_complete_pdf",
-                        help="Download all analyses in a single, professionally formatted PDF"
+                    filename_prefix = f"{resume_name}_Complete_Analysis"
+                    _lazy_pdf_download(
+                        "📋 Download Complete Analysis (PDF)",
+                        make_report_key("multi", list(valid_responses.items()), filename_prefix)[:16],
+                        lambda: get_multi_analysis_pdf(valid_responses, filename_prefix),
+                        help_text="Download all analyses in a single, professionally formatted PDF"
                     )
                 else:
                     st.info("No completed analyses to download.")
@@ -0,0 +1,226 @@
+"""
+Compact, memory-bounded storage of per-session resume data.
+
+Sessions keep prepared PDFs as ``CompactPDFData``: metadata plus references
+to encoded blobs (the JPEG page renders, or the PDF itself for text-mode PDFs,
+and the model content parts) held in a process-wide ``BlobStore``. Analysis jobs already store their prepared PDFs
+in this form, charged to the submitting session, and the session adopts the
+same objects. Nothing is decoded until it is displayed, and
+decoded images are never retained. The store keeps blobs in memory within a
+per-session and a global budget, spilling the least recently used ones to a
+temporary directory, and frees a session's blobs as soon as its results are
+garbage collected (replaced, cleared or the session ends).
+"""
+import atexit
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+from collections import OrderedDict, defaultdict
+from collections.abc import Mapping, Sequence
+
+from PIL import Image
+
+from pdf_processing import render_preview_page
+
+SESSION_MEMORY_BUDGET = int(os.getenv("ATS_SESSION_MEMORY_BUDGET", str(16 * 1024 * 1024)))
+SESSION_MEMORY_GLOBAL_BUDGET = int(os.getenv("ATS_SESSION_MEMORY_GLOBAL_BUDGET", str(256 * 1024 * 1024)))
+SESSION_SPILL_DIR = os.getenv("ATS_SESSION_SPILL_DIR") or None  # Defaults to the system temp directory
+
+
+class BlobStore:
+    """
+    Thread-safe LRU store of byte blobs with per-owner and global memory budgets.
+
+    Blobs over budget are spilled to files in a private temporary directory and
+    read back (and promoted to memory again) on access.
+    """
+
+    def __init__(self, session_budget=SESSION_MEMORY_BUDGET, global_budget=SESSION_MEMORY_GLOBAL_BUDGET,
+                 spill_dir=SESSION_SPILL_DIR):
+        self.session_budget = session_budget
+        self.global_budget = global_budget
+        self._spill_root = spill_dir
+        self._spill_dir = None
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # ref -> data, least recently used first
+        self._owners = {}  # ref -> owner
+        self._paths = {}  # ref -> spill file, kept once written
+        self._owner_bytes = defaultdict(int)  # In-memory bytes per owner
+        self._memory_bytes = 0
+        self.stats = {"spilled": 0, "loaded": 0}
+
+    def put(self, owner, data):
+        """Store ``data`` for ``owner``; returns its reference."""
+        ref = uuid.uuid4().hex
+        with self._lock:
+            self._owners[ref] = owner
+            self._remember(ref, data)
+        return ref
+
+    def get(self, ref):
+        """Return the bytes of a blob, reading it back from disk if it was spilled."""
+        with self._lock:
+            data = self._memory.get(ref)
+            if data is not None:
+                self._memory.move_to_end(ref)
+                return data
+            path = self._paths.get(ref)
+        if path is None:
+            raise KeyError(ref)
+        with open(path, "rb") as f:
+            data = f.read()
+        with self._lock:
+            if ref in self._owners and ref not in self._memory:
+                self.stats["loaded"] += 1
+                self._remember(ref, data)
+        return data
+
+    def delete(self, refs):
+        """Drop blobs from memory and disk."""
+        with self._lock:
+            paths = []
+            for ref in refs:
+                owner = self._owners.pop(ref, None)
+                data = self._memory.pop(ref, None)
+                if data is not None:
+                    self._owner_bytes[owner] -= len(data)
+                    self._memory_bytes -= len(data)
+                    if not self._owner_bytes[owner]:
+                        del self._owner_bytes[owner]
+                if ref in self._paths:
+                    paths.append(self._paths.pop(ref))
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def usage(self, owner=None):
+        """In-memory bytes of one owner, or of the whole store."""
+        with self._lock:
+            return self._memory_bytes if owner is None else self._owner_bytes.get(owner, 0)
+
+    def _remember(self, ref, data):
+        """Keep a blob in memory as most recently used, then enforce the budgets (lock held)."""
+        owner = self._owners[ref]
+        self._memory[ref] = data
+        self._owner_bytes[owner] += len(data)
+        self._memory_bytes += len(data)
+
+        if self._owner_bytes[owner] > self.session_budget:
+            for candidate in [key for key in self._memory if self._owners[key] == owner]:
+                if self._owner_bytes[owner] <= self.session_budget:
+                    break
+                self._spill(candidate)
+        while self._memory_bytes > self.global_budget and self._memory:
+            self._spill(next(iter(self._memory)))
+
+    def _spill(self, ref):
+        """Move a blob out of memory (lock held); files are written once and reused."""
+        data = self._memory.pop(ref)
+        owner = self._owners[ref]
+        if ref not in self._paths:
+            if self._spill_dir is None:
+                self._spill_dir = tempfile.mkdtemp(prefix="ats-session-", dir=self._spill_root)
+                atexit.register(shutil.rmtree, self._spill_dir, True)
+            path = os.path.join(self._spill_dir, ref)
+            with open(path, "wb") as f:
+                f.write(data)
+            self._paths[ref] = path
+        self._owner_bytes[owner] -= len(data)
+        self._memory_bytes -= len(data)
+        self.stats["spilled"] += 1
+
+
+class _LazyPages(Sequence):
+    """Page images of a ``CompactPDFData``, each decoded only when indexed."""
+
+    def __init__(self, pdf_data):
+        self._pdf_data = pdf_data
+
+    def __len__(self):
+        return self._pdf_data.image_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._pdf_data.page_image(range(len(self))[index])
+
+
+class CompactPDFData(Mapping):
+    """
+    Session form of a prepared PDF (see ``pdf_processing.prepare_pdf_bytes``).
+
+    Reads like the dict built by ``build_pdf_data``; "content" is loaded from
+    the blob store on access and "images" is a sequence that decodes a page
+    only when it is indexed.
+    ``page_bytes(index)`` returns the encoded JPEG, which can be displayed
+    without decoding. Text-mode PDFs were never rasterized; their pages are
+    rendered from the stored PDF when first shown (and then served from the
+    page cache).
+    """
+
+    _LAZY_KEYS = ("content", "images", "first_page")
+
+    def __init__(self, prepared, owner, store=None):
+        self._store = store or get_blob_store()
+        fields = dict(prepared)
+        self._page_refs = [self._store.put(owner, data) for data in fields.pop("page_bytes")]
+        pdf_bytes = fields.pop("pdf_bytes", None)
+        self._pdf_ref = self._store.put(owner, pdf_bytes) if pdf_bytes is not None else None
+        self._content_ref = self._store.put(owner, json.dumps(fields.pop("content")).encode("utf-8"))
+        self._fields = fields
+        # Free the blobs once the session lets go of this object
+        refs = [*self._page_refs, self._content_ref]
+        if self._pdf_ref is not None:
+            refs.append(self._pdf_ref)
+        weakref.finalize(self, self._store.delete, refs)
+
+    @property
+    def image_count(self):
+        if self._pdf_ref is not None:
+            return self._fields.get("page_count", 0)
+        return len(self._page_refs)
+
+    def page_bytes(self, index):
+        if self._pdf_ref is None:
+            return self._store.get(self._page_refs[index])
+        index = range(self.image_count)[index]
+        return render_preview_page(self._store.get(self._pdf_ref), index + 1, self._fields.get("content_hash"))
+
+    def page_image(self, index):
+        return Image.open(io.BytesIO(self.page_bytes(index)))
+
+    def __getitem__(self, key):
+        if key == "content":
+            return json.loads(self._store.get(self._content_ref))
+        if key == "images":
+            return _LazyPages(self)
+        if key == "first_page":
+            return self.page_image(0)
+        return self._fields[key]
+
+    def __iter__(self):
+        yield from self._fields
+        yield from self._LAZY_KEYS
+
+    def __len__(self):
+        return len(self._fields) + len(self._LAZY_KEYS)
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_blob_store():
+    """Return the process-wide blob store shared by every session."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = BlobStore()
+        return _default_store
@@ -0,0 +1,112 @@
+"""
+Single-flight request coalescing.
+
+When several threads ask for the same expensive result at the same time, only
+the first (the leader) computes it; the others wait for the leader and share
+its result or its error. Keys are released as soon as the computation
+finishes, so nothing is cached here; pair it with a cache for reuse of
+finished results.
+"""
+import copy
+import threading
+
+
+def _copy_error(error):
+    """A fresh exception of the same type and attributes, without the traceback."""
+    try:
+        duplicate = copy.copy(error)
+    except Exception:
+        duplicate = None
+    if type(duplicate) is not type(error):
+        duplicate = RuntimeError(str(error))
+    duplicate.__traceback__ = None
+    return duplicate
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one computation.
+
+    ``do`` covers the common case; ``begin``/``wait``/``finish`` let a leader
+    compute incrementally (for example while streaming). A leader that finishes
+    without a result and without an error (it was abandoned) sends its waiters
+    back to compute on their own.
+
+    Args:
+        share_error (callable): Decides whether waiters receive a leader's error;
+            errors it rejects (transient ones worth retrying) send the waiters
+            back to compute, like an abandoned leader. All errors are shared by default.
+    """
+
+    def __init__(self, share_error=None):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._share_error = share_error or (lambda error: True)
+        self.stats = {"computed": 0, "coalesced": 0}
+
+    def begin(self, key):
+        """
+        Join the computation of ``key``.
+
+        Returns:
+            tuple: (call, is_leader); the leader must call ``finish``
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.stats["computed"] += 1
+                return call, True
+            self.stats["coalesced"] += 1
+            return call, False
+
+    def wait(self, call):
+        """
+        Wait for the leader; returns its result (None if abandoned) or raises its error.
+
+        Every waiter raises its own copy of the error, so concurrent waiters never
+        share (and overwrite) one exception's traceback.
+        """
+        call.done.wait()
+        if call.error is not None:
+            raise _copy_error(call.error) from call.error
+        return call.result
+
+    def finish(self, key, call, result=None, error=None):
+        """Publish the leader's outcome and release the key."""
+        call.result = result
+        call.error = error if error is not None and self._share_error(error) else None
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.done.set()
+
+    def do(self, key, fn):
+        """
+        Return ``fn()``, or the result of an identical call already in flight.
+
+        Raises:
+            Exception: Whatever the leader's ``fn`` raised
+        """
+        while True:
+            call, leader = self.begin(key)
+            if leader:
+                break
+            result = self.wait(call)
+            if result is not None:
+                return result
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result)
+        return result
@@ -0,0 +1,89 @@
+"""
+Test script for bounded-concurrency analysis dispatch
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from analysis_dispatcher import dispatch_analyses
+
+def _requests(count):
+    return [(f"resume_{i}.pdf", "evaluate", [f"content {i}"], "prompt") for i in range(count)]
+
+def test_concurrency_is_bounded():
+    """No more than ``concurrency`` requests run at once, and they do overlap"""
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def analyze(input_text, pdf_content, prompt):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.05)
+        with lock:
+            state["running"] -= 1
+        return f"analysis of {pdf_content[0]}"
+
+    reported = []
+    results = dispatch_analyses(_requests(8), "job description", concurrency=3, analyze_fn=analyze,
+                                on_result=lambda *args: reported.append(args))
+
+    assert state["peak"] == 3
+    assert len(results) == 8 and len(reported) == 8
+    assert results[("resume_5.pdf", "evaluate")] == ("analysis of content 5", None)
+
+def test_errors_are_isolated():
+    """A failing request reports its error without affecting the others"""
+    def analyze(input_text, pdf_content, prompt):
+        if pdf_content == ["content 1"]:
+            raise RuntimeError("model unavailable")
+        return "ok"
+
+    results = dispatch_analyses(_requests(3), "job description", concurrency=2, analyze_fn=analyze)
+
+    assert results[("resume_1.pdf", "evaluate")] == (None, "model unavailable")
+    assert results[("resume_0.pdf", "evaluate")] == ("ok", None)
+    assert results[("resume_2.pdf", "evaluate")] == ("ok", None)
+
+def test_cancellation_skips_requests_not_yet_started():
+    """Once cancelled, queued requests complete as "Cancelled" without calling the model"""
+    cancelled = threading.Event()
+    calls = []
+
+    def analyze(input_text, pdf_content, prompt):
+        calls.append(pdf_content)
+        cancelled.set()  # The user cancels while the first request is running
+        return "ok"
+
+    results = dispatch_analyses(_requests(5), "job description", concurrency=1, analyze_fn=analyze,
+                                is_cancelled=cancelled.is_set)
+
+    assert len(calls) == 1
+    assert len(results) == 5
+    assert sum(error == "Cancelled" for _, error in results.values()) == 4
+    assert results[("resume_0.pdf", "evaluate")] == ("ok", None)
+
+def test_partial_responses_are_forwarded():
+    """Streamed text reaches on_partial tagged with its request"""
+    partials = []
+
+    def analyze(input_text, pdf_content, prompt, on_partial=None):
+        on_partial("par")
+        on_partial("partial")
+        return "partial answer"
+
+    dispatch_analyses(_requests(1), "job description", analyze_fn=analyze,
+                      on_partial=lambda *args: partials.append(args))
+
+    assert partials == [("resume_0.pdf", "evaluate", "par"), ("resume_0.pdf", "evaluate", "partial")]
+    assert dispatch_analyses([], "job description", analyze_fn=analyze) == {}
+
+if __name__ == "__main__":
+    test_concurrency_is_bounded()
+    test_errors_are_isolated()
+    test_cancellation_skips_requests_not_yet_started()
+    test_partial_responses_are_forwarded()
+    print("✅ Analysis dispatcher tests passed")
@@ -0,0 +1,153 @@
+"""
+Test script for the HTTP API service
+"""
+import base64
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import analysis_pipeline
+import api_server
+import llm_integration
+import response_cache
+from api_server import AnalysisService, create_server
+from job_queue import COMPLETED, JobManager, JobStore
+from llm_backends import MockBackend, MockConfig, set_backend
+from rate_limiter import MemoryBucketBackend, TokenBucket
+from response_cache import ResponseCache
+
+PDF = b"%PDF-1.4 Python developer with SQL experience"
+
+def _prepare(file_name, pdf_bytes, extraction_mode=None):
+    return file_name, {"page_bytes": [], "content": [pdf_bytes.decode()], "text": pdf_bytes.decode(),
+                       "extraction_mode": "text"}, None
+
+INGEST_MODES = []
+
+def _ingest(named_files, extraction_mode=None):
+    INGEST_MODES.append(extraction_mode)
+    for file_name, pdf_bytes in named_files:
+        yield _prepare(file_name, pdf_bytes)
+
+def _request(base_url, method, path, payload=None, headers=None, body=None, content_type="application/json"):
+    if payload is not None:
+        body = json.dumps(payload).encode()
+    request = urllib.request.Request(f"{base_url}{path}", data=body, method=method, headers=headers or {})
+    if body is not None:
+        request.add_header("Content-Type", content_type)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read()), response.headers
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read()), e.headers
+
+def test_api_analyze_jobs_and_admission():
+    """Synchronous analyses, submit-and-poll jobs, auth and load shedding"""
+    previous_prepare, previous_ingest = api_server.prepare_pdf, analysis_pipeline.ingest_pdfs
+    previous_cache, previous_limiter = response_cache._default_cache, llm_integration._rate_limiter
+    with tempfile.TemporaryDirectory() as work_dir:
+        api_server.prepare_pdf = _prepare
+        analysis_pipeline.ingest_pdfs = _ingest
+        llm_integration._rate_limiter = TokenBucket(rate=1000, capacity=1000, backend=MemoryBucketBackend())
+        response_cache._default_cache = ResponseCache(os.path.join(work_dir, "responses.sqlite3"))
+        previous = set_backend(MockBackend(MockConfig(latency_median_ms=1, latency_p99_ms=2)))
+        try:
+            service = AnalysisService(job_manager=JobManager(JobStore(os.path.join(work_dir, "jobs.sqlite3"))))
+            _check_api(service)
+        finally:
+            set_backend(previous)
+            api_server.prepare_pdf, analysis_pipeline.ingest_pdfs = previous_prepare, previous_ingest
+            response_cache._default_cache, llm_integration._rate_limiter = previous_cache, previous_limiter
+
+def _run_job(base_url, auth, payload):
+    """Submit a job and poll it until it completes (or give up after ~5s)"""
+    status, body, _ = _request(base_url, "POST", "/v1/jobs", payload, auth)
+    assert status == 202
+    for _ in range(100):
+        status, job, _ = _request(base_url, "GET", body["status_url"], headers=auth)
+        if job["status"] == COMPLETED:
+            break
+        time.sleep(0.05)
+    return job
+
+def _check_api(service):
+    server = create_server("127.0.0.1", 0, service=service, token="secret", max_inflight=2)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    auth = {"Authorization": "Bearer secret"}
+    resume = {"file_name": "alice.pdf", "data": base64.b64encode(PDF).decode()}
+    try:
+        assert _request(base_url, "GET", "/health")[0] == 200
+        assert _request(base_url, "POST", "/v1/analyze", {"job_description": "Python", "resume": resume})[0] == 401
+
+        status, body, _ = _request(base_url, "POST", "/v1/analyze",
+                                   {"job_description": "Python", "resume": resume}, auth)
+        assert status == 200 and body["file_name"] == "alice.pdf"
+        assert body["results"][0]["match"] is not None
+
+        # Multipart upload with every analysis in one request
+        boundary = "test-boundary"
+        multipart = (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"job_description\"\r\n\r\nPython\r\n"
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"combined\"\r\n\r\ntrue\r\n"
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"resume\"; filename=\"bob.pdf\"\r\n"
+            "Content-Type: application/pdf\r\n\r\n"
+        ).encode() + PDF + f"\r\n--{boundary}--\r\n".encode()
+        status, body, _ = _request(base_url, "POST", "/v1/analyze", headers=auth, body=multipart,
+                                   content_type=f"multipart/form-data; boundary={boundary}")
+        assert status == 200 and body["file_name"] == "bob.pdf" and len(body["results"]) > 1
+
+        # A negative length must not turn into a read until EOF
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+        connection.putrequest("POST", "/v1/analyze")
+        connection.putheader("Authorization", "Bearer secret")
+        connection.putheader("Content-Length", "-1")
+        connection.endheaders()
+        assert connection.getresponse().status == 400
+        connection.close()
+
+        bad = {"job_description": "Python", "resume": {"data": base64.b64encode(b"not a pdf").decode()}}
+        assert _request(base_url, "POST", "/v1/analyze", bad, auth)[0] == 400
+        bad = {"job_description": "Python", "resume": resume, "extraction_mode": "ocr"}
+        assert _request(base_url, "POST", "/v1/analyze", bad, auth)[0] == 400
+
+        # Results are keyed by file name, so names must not collide
+        duplicates = {"job_description": "Python", "resumes": [resume, dict(resume)]}
+        status, body, _ = _request(base_url, "POST", "/v1/jobs", duplicates, auth)
+        assert status == 400 and "alice.pdf" in body["error"]
+
+        resumes = [{"file_name": f"candidate_{i}.pdf", "data": base64.b64encode(PDF + str(i).encode()).decode()}
+                   for i in range(3)]
+        job = _run_job(base_url, auth, {"job_description": "Python", "resumes": resumes, "extraction_mode": "text"})
+        assert job["status"] == COMPLETED and len(job["results"]) == 3
+        assert INGEST_MODES[-1] == "text"
+
+        # Unnamed resumes are named by position instead of overwriting each other
+        unnamed = [{"data": base64.b64encode(PDF + str(i).encode()).decode()} for i in range(3)]
+        job = _run_job(base_url, auth, {"job_description": "Python", "resumes": unnamed})
+        assert sorted(result["file_name"] for result in job["results"]) == ["resume_1.pdf", "resume_2.pdf", "resume_3.pdf"]
+        assert INGEST_MODES[-1] is None
+        assert _request(base_url, "GET", "/v1/jobs/" + "0" * 32, headers=auth)[0] == 404
+
+        # Requests beyond the in-flight limit are shed with Retry-After
+        server.inflight.acquire()
+        server.inflight.acquire()
+        status, _, headers = _request(base_url, "GET", "/v1/jobs/" + "0" * 32, headers=auth)
+        assert status == 503 and headers["Retry-After"]
+        server.inflight.release()
+        server.inflight.release()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    test_api_analyze_jobs_and_admission()
+    print("✅ API server tests passed")
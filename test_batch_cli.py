@@ -0,0 +1,84 @@
+"""
+Test script for the headless batch CLI
+"""
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import batch_cli
+import llm_integration
+from batch_cli import ResultWriter, find_resumes, load_completed, run_batch
+from prompts import get_prompts
+from llm_backends import MockBackend, MockConfig, set_backend
+import response_cache
+from rate_limiter import MemoryBucketBackend, TokenBucket
+from response_cache import ResponseCache
+
+def _prepared(file_name, pdf_bytes, extraction_mode=None):
+    return file_name, {"content": [f"Resume text:\n{pdf_bytes.decode()}"], "text": pdf_bytes.decode()}, None
+
+def _fake_ingest(named_files, extraction_mode=None):
+    for file_name, pdf_bytes in named_files:
+        if pdf_bytes.startswith(b"broken"):
+            yield file_name, None, "Could not extract any pages from the PDF"
+        else:
+            yield _prepared(file_name, pdf_bytes)
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+def test_batch_streams_results_and_resumes():
+    """Results are appended per resume and a re-run only retries what is missing or failed"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        resume_dir = os.path.join(work_dir, "resumes")
+        os.makedirs(os.path.join(resume_dir, "nested"))
+        for i in range(5):
+            _write(os.path.join(resume_dir, f"candidate_{i}.pdf"), f"Python developer {i}".encode())
+        _write(os.path.join(resume_dir, "nested", "broken.PDF"), b"broken")
+        _write(os.path.join(resume_dir, "notes.txt"), b"not a resume")
+
+        previous_ingest, previous_cache = batch_cli.ingest_pdfs, response_cache._default_cache
+        previous_limiter = llm_integration._rate_limiter
+        batch_cli.ingest_pdfs = _fake_ingest
+        llm_integration._rate_limiter = TokenBucket(rate=1000, capacity=1000, backend=MemoryBucketBackend())
+        response_cache._default_cache = ResponseCache(os.path.join(work_dir, "responses.sqlite3"))
+        previous = set_backend(MockBackend(MockConfig(latency_median_ms=1, latency_p99_ms=2)))
+        try:
+            _check_batch(work_dir, find_resumes([resume_dir]))
+        finally:
+            set_backend(previous)
+            batch_cli.ingest_pdfs, response_cache._default_cache = previous_ingest, previous_cache
+            llm_integration._rate_limiter = previous_limiter
+
+def _check_batch(work_dir, paths):
+    assert len(paths) == 6 and not any(path.endswith(".txt") for path in paths)
+
+    output = os.path.join(work_dir, "results.jsonl")
+    writer = ResultWriter(output, "jsonl")
+    analyzed, skipped = run_batch("Python developer", paths, writer, chunk_size=2, concurrency=3)
+    writer.close()
+    assert (analyzed, skipped) == (6, 0)
+    assert writer.errors == 1
+
+    rows = [json.loads(line) for line in open(output)]
+    assert len(rows) == 6
+    assert all(row["match"] is not None for row in rows if not row["error"])
+
+    writer = ResultWriter(output, "jsonl")
+    analyzed, skipped = run_batch("Python developer", paths, writer, completed=load_completed(output, "jsonl"))
+    writer.close()
+    assert (analyzed, skipped) == (1, 5)  # Only the failed resume is retried
+
+    csv_output = os.path.join(work_dir, "results.csv")
+    writer = ResultWriter(csv_output, "csv")
+    run_batch("Python developer", paths[:2], writer, combined=True)
+    writer.close()
+    assert len(load_completed(csv_output, "csv")) == 2 * len(get_prompts("Recruiter"))
+
+if __name__ == "__main__":
+    test_batch_streams_results_and_resumes()
+    print("✅ Batch CLI tests passed")
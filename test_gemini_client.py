@@ -0,0 +1,52 @@
+"""
+Test script for the shared Gemini client layer
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import gemini_client
+from gemini_client import configure, get_model
+
+def _with_fresh_client(test):
+    """Runs ``test`` against an empty model cache, restoring the client state afterwards"""
+    previous = (gemini_client._configured, dict(gemini_client._models))
+    gemini_client._models.clear()
+    try:
+        # Configuring the SDK does not contact the service
+        configure(api_key="test-key")
+        test()
+    finally:
+        gemini_client._configured = previous[0]
+        gemini_client._models.clear()
+        gemini_client._models.update(previous[1])
+
+def test_models_are_shared_per_name_and_config():
+    """Equal (model, generation config) pairs share one handle, whatever the key order"""
+    def check():
+        model = get_model("gemini-2.0-flash", {"temperature": 0.2, "max_output_tokens": 512})
+        assert get_model("gemini-2.0-flash", {"max_output_tokens": 512, "temperature": 0.2}) is model
+
+        assert get_model("gemini-2.0-flash", {"temperature": 0.7, "max_output_tokens": 512}) is not model
+        assert get_model("gemini-1.5-pro", {"temperature": 0.2, "max_output_tokens": 512}) is not model
+        assert get_model("gemini-2.0-flash") is get_model("gemini-2.0-flash", None)
+        assert get_model("gemini-2.0-flash") is not model
+        assert len(gemini_client._models) == 4
+    _with_fresh_client(check)
+
+def test_reconfiguring_drops_cached_models():
+    """Handles built under a previous API key are not reused"""
+    def check():
+        model = get_model()
+        configure()  # Already configured: the cache is kept
+        assert get_model() is model
+
+        configure(api_key="other-key")
+        assert get_model() is not model
+    _with_fresh_client(check)
+
+if __name__ == "__main__":
+    test_models_are_shared_per_name_and_config()
+    test_reconfiguring_drops_cached_models()
+    print("✅ Gemini client tests passed")
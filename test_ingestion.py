@@ -0,0 +1,109 @@
+"""
+Test script for parallel resume ingestion
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import ingestion
+from ingestion import ingest_pdfs
+
+def _fake_prepare(calls):
+    """Stands in for prepare_pdf_bytes: b"slow" takes a while and b"broken" fails"""
+    lock = threading.Lock()
+
+    def prepare(pdf_bytes, extraction_mode=None, thread_count=1):
+        with lock:
+            calls.append(pdf_bytes)
+        if pdf_bytes == b"slow":
+            time.sleep(0.3)
+        if pdf_bytes == b"broken":
+            raise ValueError("Error processing PDF: not a PDF")
+        return {"content": [pdf_bytes.decode()], "extraction_mode": extraction_mode}
+    return prepare
+
+def _ingest(named_files, max_workers):
+    """Runs ingest_pdfs with a thread pool standing in for the worker processes"""
+    calls = []
+    previous = (ingestion.prepare_pdf_bytes, ingestion.INGEST_MAX_WORKERS, ingestion._pool)
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    ingestion.prepare_pdf_bytes = _fake_prepare(calls)
+    ingestion.INGEST_MAX_WORKERS = max_workers
+    ingestion._pool = pool
+    try:
+        return list(ingest_pdfs(named_files, "auto")), calls
+    finally:
+        ingestion.prepare_pdf_bytes, ingestion.INGEST_MAX_WORKERS, ingestion._pool = previous
+        pool.shutdown()
+
+def test_results_arrive_in_completion_order():
+    """A slow file does not hold back the files that finish before it"""
+    results, calls = _ingest([("slow.pdf", b"slow"), ("fast.pdf", b"fast")], max_workers=2)
+
+    assert [name for name, _, _ in results] == ["fast.pdf", "slow.pdf"]
+    assert all(prepared is not None and error is None for _, prepared, error in results)
+
+def test_a_failure_does_not_abort_the_batch():
+    """Each file gets exactly one of a result or an error"""
+    files = [("a.pdf", b"first"), ("bad.pdf", b"broken"), ("b.pdf", b"second")]
+    for max_workers in (1, 3):
+        results, calls = _ingest(files, max_workers)
+        outcomes = {name: (prepared, error) for name, prepared, error in results}
+
+        assert set(outcomes) == {"a.pdf", "bad.pdf", "b.pdf"}
+        assert outcomes["bad.pdf"][0] is None and "not a PDF" in outcomes["bad.pdf"][1]
+        assert outcomes["a.pdf"] == ({"content": ["first"], "extraction_mode": "auto"}, None)
+        assert outcomes["b.pdf"][0]["content"] == ["second"] and outcomes["b.pdf"][1] is None
+
+def test_duplicate_uploads_share_one_preparation():
+    """Identical contents in one batch are prepared once and reported under every name"""
+    # The slow file is still in flight when its duplicate is submitted
+    results, calls = _ingest([("one.pdf", b"slow"), ("two.pdf", b"slow"), ("other.pdf", b"other")], max_workers=2)
+
+    assert sorted(calls) == [b"other", b"slow"]
+    outcomes = {name: prepared for name, prepared, _ in results}
+    assert set(outcomes) == {"one.pdf", "two.pdf", "other.pdf"}
+    assert outcomes["one.pdf"] == outcomes["two.pdf"]
+
+class _BrokenPool:
+    """Stands in for a pool whose worker died: every future fails with BrokenProcessPool"""
+
+    def __init__(self):
+        self.shutdowns = 0
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns += 1
+
+def test_broken_pool_is_replaced_once():
+    """Every file of a broken pool reports an error, and the pool is replaced only once"""
+    broken, replacement = _BrokenPool(), ThreadPoolExecutor(max_workers=2)
+    previous = (ingestion._pool, ingestion.INGEST_MAX_WORKERS)
+    ingestion._pool, ingestion.INGEST_MAX_WORKERS = broken, 2
+    try:
+        results = list(ingest_pdfs([(f"{i}.pdf", f"resume {i}".encode()) for i in range(3)]))
+        ingestion._pool = replacement  # As _get_pool would create it for the next batch
+        ingestion._reset_pool(broken)  # A late failure of the old pool
+        current = ingestion._pool
+    finally:
+        ingestion._pool, ingestion.INGEST_MAX_WORKERS = previous
+        replacement.shutdown()
+
+    assert broken.shutdowns == 1 and current is replacement
+    assert len(results) == 3 and all("worker process failed" in error for _, _, error in results)
+
+if __name__ == "__main__":
+    test_results_arrive_in_completion_order()
+    test_a_failure_does_not_abort_the_batch()
+    test_duplicate_uploads_share_one_preparation()
+    test_broken_pool_is_replaced_once()
+    print("✅ Ingestion tests passed")
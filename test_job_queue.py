@@ -0,0 +1,110 @@
+"""
+Test script for background jobs and streamed partial results
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from analysis_dispatcher import dispatch_analyses
+from job_queue import JobManager, JobStore, CANCELLED, COMPLETED, FINISHED_STATES, INTERRUPTED, RUNNING
+
+def _wait_for(manager, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in FINISHED_STATES:
+            return job
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+def test_streamed_partials_until_final_result():
+    """Partial text is visible while streaming and replaced by the final result"""
+    with tempfile.TemporaryDirectory() as db_dir:
+        _check_streamed_partials(JobManager(store=JobStore(os.path.join(db_dir, "jobs.sqlite3"))))
+
+def _check_streamed_partials(manager):
+    first_chunk_seen = threading.Event()
+    finish = threading.Event()
+
+    def streaming_analyze(input_text, pdf_content, prompt, on_partial=None):
+        text = ""
+        for chunk in ("Strong ", "Python ", "skills"):
+            text += chunk
+            on_partial(text)
+            first_chunk_seen.set()
+            finish.wait(5)
+        return text
+
+    def job(ctx):
+        def on_result(file_name, action, response, error):
+            ctx.add_result(file_name, action, response, error)
+        dispatch_analyses(
+            [("a.pdf", "About", ["resume"], "prompt")], "jd",
+            on_result=on_result, analyze_fn=streaming_analyze, on_partial=ctx.set_partial
+        )
+
+    job_id = manager.submit("analysis", job)
+    assert first_chunk_seen.wait(5)
+    assert manager.get_partials(job_id) == {("a.pdf", "About"): "Strong "}
+    assert manager.get(job_id)["results"] == []
+
+    finish.set()
+    final = _wait_for(manager, job_id)
+    assert final["status"] == COMPLETED
+    assert final["results"][0]["response"] == "Strong Python skills"
+    assert manager.get_partials(job_id) == {}
+
+def test_shared_database_cancellation_and_persistence():
+    """Managers sharing a database leave each other's live jobs alone, only flag orphaned ones,
+    and cancellation and results go through the database"""
+    with tempfile.TemporaryDirectory() as db_dir:
+        path = os.path.join(db_dir, "jobs.sqlite3")
+        first = JobManager(store=JobStore(path))
+
+        def wait_for_cancel(ctx):
+            ctx.add_result("a.pdf", "About", "partial answer")
+            while True:
+                ctx.check_cancelled()
+                time.sleep(0.01)
+
+        job_id = first.submit("analysis", wait_for_cancel)
+        deadline = time.time() + 5
+        while first.get(job_id)["status"] != RUNNING and time.time() < deadline:
+            time.sleep(0.01)
+
+        # A second process starting on the same database
+        second = JobManager(store=JobStore(path))
+        assert second.get(job_id)["status"] == RUNNING
+
+        # Jobs of an exited local process and of a silent remote one are orphaned
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        second.store.create("exited", "analysis", owner=f"{socket.gethostname()}:{exited.pid}:0")
+        second.store.create("silent", "analysis", owner="another-host:1:0")
+        second.store.update("silent", heartbeat_at=time.time() - 3600)
+        second.store.create("remote", "analysis", owner="another-host:2:0")
+        assert second.store.mark_interrupted(second.owner_id) == 2
+        assert second.get("exited")["status"] == second.get("silent")["status"] == INTERRUPTED
+        assert second.get("remote")["status"] != INTERRUPTED
+        assert second.get(job_id)["status"] == RUNNING
+
+        # Cancelled from the other manager, picked up by the owner
+        second.cancel(job_id)
+        assert _wait_for(first, job_id)["status"] == CANCELLED
+
+        reopened = JobStore(path).get(job_id)
+        assert reopened["status"] == CANCELLED
+        assert reopened["results"] == [
+            {"item": "a.pdf", "action": "About", "response": "partial answer", "error": None}
+        ]
+
+if __name__ == "__main__":
+    test_streamed_partials_until_final_result()
+    test_shared_database_cancellation_and_persistence()
+    print("✅ Job queue tests passed")
@@ -0,0 +1,124 @@
+"""
+Test script for the pluggable LLM backends and the local mock server
+"""
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from llm_cassette import CassetteBackend, CassetteMissError
+from llm_backends import HTTPBackend, MockBackend, MockConfig, MockUpstreamError, mock_response_text
+from mock_llm_server import start_background_server
+from resilience import RateLimitedError, TransientModelError, call_with_resilience, classify_error
+
+PARTS = ["Job description", {"mime_type": "image/jpeg", "data": b"\xff\xd8resume"}, "Prompt"]
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def test_mock_backend_latency_and_determinism():
+    """Responses are deterministic per request and latency follows the configured distribution"""
+    clock = FakeClock()
+    backend = MockBackend(MockConfig(latency_median_ms=500, latency_p99_ms=2000, seed=1),
+                          sleep=clock.sleep, clock=clock)
+    first = backend.generate(PARTS, "model")
+    assert first == backend.generate(PARTS, "model")
+    assert "Match Percentage" in first
+    assert "".join(backend.stream(PARTS, "model")) == first
+
+    latencies = sorted(backend._sample_latency() for _ in range(2000))
+    assert 0.4 < latencies[1000] < 0.6
+    assert 1.5 < latencies[1980] < 2.7
+
+    analysis = json.loads(backend.generate(PARTS, "model", {"response_mime_type": "application/json"}))
+    assert isinstance(analysis["match_percentage"], int)
+
+def test_mock_backend_rate_limits_and_timeouts():
+    """RPM limits produce 429s with Retry-After; slow responses time out"""
+    clock = FakeClock()
+    backend = MockBackend(MockConfig(latency_median_ms=10, rpm_limit=2, retry_after=5), sleep=clock.sleep, clock=clock)
+    backend.generate(PARTS, "model")
+    backend.generate(PARTS, "model")
+    try:
+        backend.generate(PARTS, "model")
+        assert False, "expected a 429"
+    except MockUpstreamError as e:
+        error = classify_error(e)
+        assert isinstance(error, RateLimitedError) and error.retry_after == 5
+    clock.now += 61
+    backend.generate(PARTS, "model")
+
+    slow = MockBackend(MockConfig(latency_median_ms=5000, latency_p99_ms=5000), sleep=clock.sleep, clock=clock)
+    try:
+        slow.generate(PARTS, "model", timeout=1)
+        assert False, "expected a timeout"
+    except TimeoutError as e:
+        assert isinstance(classify_error(e), TransientModelError)
+
+def test_http_server_round_trip_and_429_retry():
+    """The HTTP backend streams from the mock server and 429s are retried after Retry-After"""
+    server = start_background_server(config=MockConfig(latency_median_ms=1, latency_p99_ms=5, rpm_limit=1,
+                                                       retry_after=2, chunk_count=4))
+    try:
+        backend = HTTPBackend(f"http://127.0.0.1:{server.server_address[1]}")
+        text = "".join(backend.stream(PARTS, "model", timeout=5))
+        assert text == mock_response_text(PARTS)
+
+        delays = []
+        def attempt(timeout):
+            if delays:
+                server.backend.config.rpm_limit = 0  # The window has "passed"
+            return backend.generate(PARTS, "model", timeout=timeout)
+        result = call_with_resilience(attempt, sleep=delays.append)
+        assert result == text
+        assert len(delays) == 1 and delays[0] >= 2
+        assert server.backend.stats["rate_limited"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_cassette_record_and_replay():
+    """Recorded traffic replays with its timing, or instantly, and unknown requests miss"""
+    with tempfile.TemporaryDirectory() as cassette_dir:
+        _check_cassette(os.path.join(cassette_dir, "cassette.jsonl"))
+
+def _check_cassette(path):
+    clock = FakeClock()
+    inner = MockBackend(MockConfig(latency_median_ms=400, latency_p99_ms=400, chunk_count=3),
+                        sleep=clock.sleep, clock=clock)
+    recorder = CassetteBackend("record", inner, path=path, sleep=clock.sleep, clock=clock)
+    streamed = "".join(recorder.stream(PARTS, "model"))
+    json_text = recorder.generate(PARTS, "model", {"response_mime_type": "application/json"})
+    assert recorder.name == "mock"
+
+    replay_clock = FakeClock()
+    player = CassetteBackend("replay", path=path, sleep=replay_clock.sleep, clock=replay_clock)
+    assert player.generate(PARTS, "model") == streamed
+    assert abs(replay_clock.now - 0.4) < 0.01
+    assert player.generate(PARTS, "model", {"response_mime_type": "application/json"}) == json_text
+    assert list(player.stream(PARTS, "model")) == list(inner.stream(PARTS, "model"))
+
+    instant = CassetteBackend("replay", path=path, latency="zero", sleep=replay_clock.sleep)
+    before = replay_clock.now
+    assert instant.generate(PARTS, "model") == streamed and replay_clock.now == before
+    try:
+        instant.generate(["another request"], "model")
+        assert False, "expected a cassette miss"
+    except CassetteMissError:
+        pass
+
+if __name__ == "__main__":
+    test_mock_backend_latency_and_determinism()
+    test_mock_backend_rate_limits_and_timeouts()
+    test_http_server_round_trip_and_429_retry()
+    test_cassette_record_and_replay()
+    print("✅ LLM backend tests passed")
@@ -0,0 +1,87 @@
+"""
+Test script for the markdown parser used by PDF reports
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from markdown_parser import parse_markdown, render_inline, classify_tone, STRONG_LINE_LEVEL
+from pdf_generator import render_markdown, get_report_templates, create_pdf_response
+
+SAMPLE_RESPONSE = """
+## Evaluation
+
+**Overall Score: 85%**
+
+Your resume is a good match for the role.
+
+- Technical skills
+    - Python and *pandas*
+    - Missing Kubernetes
+- Communication
+1. First step
+2. Second step
+
+| Skill | Status |
+|-------|--------|
+| Python | **Present** |
+| Go | Missing |
+
+> We recommend adding metrics.
+
+```
+print("a < b")
+```
+"""
+
+def test_block_structure():
+    """Headings, nested lists, tables, quotes and code become AST nodes"""
+    blocks = [block for block in parse_markdown(SAMPLE_RESPONSE) if block['type'] != 'spacer']
+    kinds = [block['type'] for block in blocks]
+    assert kinds == ['heading', 'heading', 'paragraph', 'list', 'list', 'table', 'paragraph', 'code']
+
+    assert blocks[0]['level'] == 2 and blocks[0]['text'] == 'Evaluation'
+    assert blocks[1]['level'] == STRONG_LINE_LEVEL
+    assert blocks[2]['tone'] == 'success'
+
+    bullets, numbered = blocks[3], blocks[4]
+    assert not bullets['ordered'] and numbered['ordered']
+    assert [item['text'] for item in bullets['items']] == ['Technical skills', 'Communication']
+    nested = bullets['items'][0]['children'][0]['items']
+    assert [item['tone'] for item in nested] == ['body', 'warning']
+    assert [item['marker'] for item in numbered['items']] == ['1.', '2.']
+
+    table = blocks[5]
+    assert table['header'] == ['Skill', 'Status']
+    assert table['rows'] == [['Python', '**Present**'], ['Go', 'Missing']]
+
+    assert blocks[6]['tone'] == 'quote'
+    assert blocks[7]['text'] == 'print("a < b")'
+
+def test_inline_markup_and_tones():
+    """Inline markdown becomes escaped ReportLab markup"""
+    assert render_inline("**Bold** and *italic* with `code`") == \
+        '<b>Bold</b> and <i>italic</i> with <font face="Courier">code</font>'
+    assert render_inline("***both***") == '<b><i>both</i></b>'
+    assert render_inline("a < b & c -- done ...") == 'a &lt; b &amp; c — done …'
+    assert render_inline("snake_case_name stays, 5 * 3 * 2 too") == 'snake_case_name stays, 5 * 3 * 2 too'
+    assert render_inline("Score: 3.5 , ok") == 'Score: 3.5, ok'
+
+    assert classify_tone("Weak summary but strong skills") == 'success'
+    assert classify_tone("Lacks leadership") == 'warning'
+    assert classify_tone("Match: 72%") == 'metric'
+    assert classify_tone("Plain sentence") == 'body'
+
+def test_render_markdown_flowables():
+    """The shared renderer handles every block type and builds a PDF"""
+    flowables = render_markdown(SAMPLE_RESPONSE, get_report_templates())
+    assert len(flowables) > 10
+    pdf_bytes, filename = create_pdf_response("Markdown", SAMPLE_RESPONSE)
+    assert pdf_bytes.startswith(b"%PDF") and filename.endswith(".pdf")
+
+if __name__ == "__main__":
+    test_block_structure()
+    test_inline_markup_and_tones()
+    test_render_markdown_flowables()
+    print("✅ Markdown parser tests passed")
@@ -0,0 +1,81 @@
+"""
+Test script for the content-addressed page cache
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+import page_cache
+from page_cache import PageCache, compute_content_hash, make_page_key
+from pdf_processing import get_thumbnail
+
+def test_round_trip_and_keys():
+    """Entries are keyed by content and render parameters"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PageCache(cache_dir=cache_dir, max_bytes=1024 * 1024)
+        content_hash = compute_content_hash(b"%PDF-1.4 sample")
+
+        key = make_page_key(content_hash, 1, 200, 85)
+        assert key != make_page_key(content_hash, 1, 150, 85)
+        assert key != make_page_key(content_hash, 2, 200, 85)
+        assert key != make_page_key(compute_content_hash(b"%PDF-1.4 other"), 1, 200, 85)
+
+        assert cache.get(key) is None
+        cache.put(key, b"jpeg-bytes")
+        assert cache.get(key) == b"jpeg-bytes"
+
+        # A second instance over the same directory sees the entry
+        assert PageCache(cache_dir=cache_dir).get(key) == b"jpeg-bytes"
+
+def test_lru_eviction():
+    """Least recently used entries are evicted first"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PageCache(cache_dir=cache_dir, max_bytes=250)
+        for name in ("a", "b", "c"):
+            cache.put(name * 64, b"x" * 100)
+            time.sleep(0.01)
+
+        # Touch the oldest entry so it becomes the most recent one
+        os.utime(cache._path("a" * 64), (time.time() + 10, time.time() + 10))
+        cache.evict()
+
+        assert cache.get("a" * 64) is not None
+        assert cache.get("b" * 64) is None
+        assert cache.get("c" * 64) is not None
+
+def test_thumbnails_are_small_and_cached():
+    """Preview thumbnails are downscaled WebP made once per page"""
+    page = io.BytesIO()
+    Image.new("RGB", (1700, 2200), "white").save(page, format="JPEG", quality=85)
+    loads = []
+
+    def load_page():
+        loads.append(1)
+        return page.getvalue()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        previous = page_cache._default_cache
+        page_cache._default_cache = PageCache(cache_dir=cache_dir)
+        try:
+            content_hash = compute_content_hash(b"%PDF-1.4 sample")
+            thumbnail = get_thumbnail(content_hash, 1, load_page, width=300)
+            assert get_thumbnail(content_hash, 1, load_page, width=300) == thumbnail
+        finally:
+            page_cache._default_cache = previous
+
+    assert len(loads) == 1
+    assert len(thumbnail) < len(page.getvalue())
+    with Image.open(io.BytesIO(thumbnail)) as img:
+        assert img.format == "WEBP" and img.size == (300, 388)
+
+if __name__ == "__main__":
+    test_round_trip_and_keys()
+    test_lru_eviction()
+    test_thumbnails_are_small_and_cached()
+    print("✅ Page cache tests passed")
@@ -0,0 +1,64 @@
+"""
+Test script for token-budgeted page shaping
+"""
+import base64
+import io
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image, ImageDraw
+
+from payload_shaper import (
+    TOKENS_PER_TILE, crop_margins, estimate_image_tokens, plan_pages, shape_page_parts
+)
+
+def _page(width=1700, height=2200, margin=200):
+    """A white 200 DPI letter page with a block of 'text' inside its margins"""
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for y in range(margin, height - margin, 40):
+        draw.line((margin, y, width - margin, y), fill="black", width=6)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+def test_crop_and_token_estimate():
+    """Margins are cropped and tokens follow the tile grid"""
+    page = Image.open(io.BytesIO(_page())).convert("RGB")
+    cropped = crop_margins(page)
+    assert cropped.width < page.width - 300 and cropped.height < page.height - 300
+    assert estimate_image_tokens(300, 300) == TOKENS_PER_TILE
+    assert estimate_image_tokens(1700, 2200) == 9 * TOKENS_PER_TILE
+
+def test_plan_covers_all_pages_within_budget():
+    """Every page is sent when the budget allows readable renders of all of them"""
+    sizes = [(1332, 1832)] * 3
+    scales = plan_pages(sizes, token_budget=9 * TOKENS_PER_TILE)
+    assert all(scale is not None for scale in scales)
+    tokens = sum(estimate_image_tokens(int(w * s), int(h * s)) for (w, h), s in zip(sizes, scales))
+    assert tokens <= 9 * TOKENS_PER_TILE
+    assert scales[0] >= scales[1]  # Leftover budget goes to earlier pages first
+
+    # A budget too small for every page keeps the first pages, in order
+    assert plan_pages(sizes, token_budget=4 * TOKENS_PER_TILE)[-1] is None
+
+def test_shape_page_parts_respects_budgets():
+    """Only sent pages are encoded, within the token and byte budgets"""
+    pages = [_page(), _page(), _page()]
+    parts, stats = shape_page_parts(pages, token_budget=9 * TOKENS_PER_TILE)
+    assert stats["pages_sent"] == len(parts) == 3 and stats["pages_omitted"] == 0
+    assert stats["estimated_tokens"] <= 9 * TOKENS_PER_TILE
+    image = Image.open(io.BytesIO(base64.b64decode(parts[0]["data"])))
+    assert image.width >= 768
+
+    small_parts, small_stats = shape_page_parts(pages, token_budget=9 * TOKENS_PER_TILE, max_bytes=60000)
+    assert small_stats["payload_bytes"] <= 60000
+    assert len(small_parts) == 3
+
+if __name__ == "__main__":
+    test_crop_and_token_estimate()
+    test_plan_covers_all_pages_within_budget()
+    test_shape_page_parts_respects_budgets()
+    print("✅ Payload shaper tests passed")
@@ -0,0 +1,149 @@
+"""
+Test script for text layer extraction and mode selection in PDF preparation
+"""
+import io
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+import pdf_processing
+from pdf_processing import assess_text_quality, build_pdf_data, prepare_pdf_bytes, PREVIEW_DPI, RENDER_DPI
+from session_store import BlobStore, CompactPDFData
+
+RESUME_LINES = [
+    "Jane Doe - Backend Engineer",
+    "Seven years building Python and Django services on PostgreSQL.",
+    "Deployed containerized workloads with Docker and Kubernetes on AWS.",
+    "Owned CI/CD pipelines, observability and on-call for payment systems.",
+    "Mentored four engineers and led the migration to event-driven design.",
+]
+
+def _make_pdf(lines):
+    """A one-page PDF whose text layer holds ``lines`` (blank for an empty list)"""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    y = 720
+    for line in lines:
+        pdf.drawString(72, y, line)
+        y -= 18
+    if not lines:
+        pdf.rect(72, 600, 200, 100, fill=1)  # Ink without a text layer, like a scan
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+def _fake_renderer(calls):
+    """Stands in for poppler: records the requested DPI and returns one JPEG page"""
+    page = io.BytesIO()
+    Image.new("RGB", (850, 1100), "white").save(page, format="JPEG", quality=85)
+
+    def render(pdf_bytes, dpi=RENDER_DPI, content_hash=None, thread_count=1, **kwargs):
+        calls.append(dpi)
+        return [page.getvalue()]
+    return render
+
+def _with_renderer(calls, fn, *args):
+    previous = pdf_processing.render_pdf_pages
+    pdf_processing.render_pdf_pages = _fake_renderer(calls)
+    try:
+        return fn(*args)
+    finally:
+        pdf_processing.render_pdf_pages = previous
+
+def _prepare(pdf_bytes, extraction_mode):
+    calls = []
+    return _with_renderer(calls, prepare_pdf_bytes, pdf_bytes, extraction_mode), calls
+
+def test_text_quality():
+    """Long clean text is usable; short or garbled text is not"""
+    is_usable, stats = assess_text_quality(" ".join(RESUME_LINES))
+    assert is_usable
+    assert stats["char_count"] > 200 and stats["bad_glyph_ratio"] == 0
+
+    is_usable, stats = assess_text_quality("Jane Doe")
+    assert not is_usable and stats["char_count"] == 7
+
+    garbled = " ".join(RESUME_LINES) + " (cid:12)" * 20
+    is_usable, stats = assess_text_quality(garbled)
+    assert not is_usable and stats["bad_glyph_ratio"] > 0.05
+
+    is_usable, stats = assess_text_quality("")
+    assert not is_usable and stats["bad_glyph_ratio"] == 1.0
+
+def test_auto_mode_prefers_a_usable_text_layer():
+    """Born-digital PDFs go to the model as text and are not rasterized at ingestion"""
+    pdf_bytes = _make_pdf(RESUME_LINES)
+    prepared, calls = _prepare(pdf_bytes, "auto")
+
+    assert prepared["extraction_mode"] == "text"
+    assert calls == []
+    assert prepared["page_bytes"] == [] and prepared["pdf_bytes"] == pdf_bytes
+    assert len(prepared["content"]) == 1
+    assert "Django" in prepared["content"][0]
+    assert prepared["payload_stats"] is None
+    assert prepared["page_count"] == 1
+
+def test_text_mode_previews_are_rendered_on_demand():
+    """Preview pages of a text-mode PDF are rendered at preview resolution only when shown"""
+    prepared, _ = _prepare(_make_pdf(RESUME_LINES), "auto")
+
+    calls = []
+    pdf_data = CompactPDFData(prepared, owner="session", store=BlobStore())
+    assert pdf_data.image_count == 1 and len(pdf_data["images"]) == 1
+    assert "pdf_bytes" not in pdf_data and calls == []
+    page = _with_renderer(calls, pdf_data.page_bytes, 0)
+    assert page.startswith(b"\xff\xd8") and calls == [PREVIEW_DPI]
+
+    calls = []
+    pdf_data = _with_renderer(calls, build_pdf_data, prepared)
+    assert calls == [PREVIEW_DPI] and len(pdf_data["images"]) == 1
+    assert "pdf_bytes" not in pdf_data
+
+def test_auto_mode_falls_back_to_page_images():
+    """PDFs without a usable text layer are sent as full-resolution page images"""
+    prepared, calls = _prepare(_make_pdf([]), "auto")
+
+    assert prepared["extraction_mode"] == "image"
+    assert calls == [RENDER_DPI]
+    assert prepared["content"][0]["mime_type"] == "image/jpeg"
+    assert prepared["payload_stats"] is not None
+
+def test_explicit_modes():
+    """"text" accepts a short text layer and "image" never reads it"""
+    prepared, calls = _prepare(_make_pdf(RESUME_LINES[:1]), "auto")
+    assert prepared["extraction_mode"] == "image"
+
+    prepared, calls = _prepare(_make_pdf(RESUME_LINES[:1]), "text")
+    assert prepared["extraction_mode"] == "text" and calls == []
+
+    prepared, calls = _prepare(_make_pdf(RESUME_LINES), "image")
+    assert prepared["extraction_mode"] == "image" and calls == [RENDER_DPI]
+    assert prepared["text"] == "" and prepared["text_stats"] is None
+
+def test_render_failures_are_reported():
+    """A scanned PDF that yields no pages is rejected; the text path never renders"""
+    previous = pdf_processing.render_pdf_pages
+    pdf_processing.render_pdf_pages = lambda *args, **kwargs: []
+    try:
+        assert prepare_pdf_bytes(_make_pdf(RESUME_LINES), "auto")["extraction_mode"] == "text"
+        prepare_pdf_bytes(_make_pdf([]), "auto")
+    except ValueError as e:
+        assert "Could not extract any pages" in str(e)
+    else:
+        raise AssertionError("expected a ValueError")
+    finally:
+        pdf_processing.render_pdf_pages = previous
+
+if __name__ == "__main__":
+    test_text_quality()
+    test_auto_mode_prefers_a_usable_text_layer()
+    test_text_mode_previews_are_rendered_on_demand()
+    test_auto_mode_falls_back_to_page_images()
+    test_explicit_modes()
+    test_render_failures_are_reported()
+    print("✅ PDF processing tests passed")
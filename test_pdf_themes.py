@@ -0,0 +1,78 @@
+"""
+Test script for the PDF theme registry and its precompiled templates
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from reportlab.lib.colors import HexColor
+
+import pdf_generator
+from pdf_generator import (
+    DEFAULT_THEME, MonochromePDFStyles, ProfessionalPDFStyles,
+    create_pdf_response, create_professional_styles, get_report_templates, register_theme
+)
+
+def test_lookup_by_name():
+    """Registered themes are found by name and the default is the professional theme"""
+    assert get_report_templates().theme is ProfessionalPDFStyles
+    assert get_report_templates(DEFAULT_THEME).theme is ProfessionalPDFStyles
+    assert get_report_templates("monochrome").theme is MonochromePDFStyles
+
+    professional = get_report_templates("professional").styles["title"]
+    monochrome = get_report_templates("monochrome").styles["title"]
+    assert professional.textColor == ProfessionalPDFStyles.COLORS["primary_dark"]
+    assert monochrome.textColor == MonochromePDFStyles.COLORS["primary_dark"]
+
+    try:
+        get_report_templates("neon")
+    except ValueError as e:
+        assert "Unknown PDF theme: neon" in str(e)
+    else:
+        raise AssertionError("expected a ValueError")
+
+def test_templates_are_built_once_and_read_only():
+    """Every lookup shares one template set, which callers cannot modify"""
+    templates = get_report_templates("monochrome")
+    assert get_report_templates("monochrome") is templates
+    assert create_professional_styles("monochrome") is templates.styles
+    assert ("highlight", 0) in templates.list_styles and "markdown_table" in templates.table_styles
+
+    try:
+        templates.styles["title"] = None
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("template styles should be read-only")
+
+def test_registering_a_theme():
+    """A registered subclass is usable by name; bumping its version rebuilds its templates"""
+    class HighContrastPDFStyles(ProfessionalPDFStyles):
+        COLORS = dict(ProfessionalPDFStyles.COLORS, primary_dark=HexColor('#000000'))
+        THEME_NAME = 'high-contrast'
+        THEME_VERSION = 1
+
+    try:
+        assert register_theme(HighContrastPDFStyles) is HighContrastPDFStyles
+        templates = get_report_templates("high-contrast")
+        assert templates.styles["title"].textColor == HexColor('#000000')
+
+        pdf_bytes, filename = create_pdf_response("Theme Check", "## Summary\n\n- Python", theme="high-contrast")
+        assert pdf_bytes.startswith(b"%PDF") and filename.endswith(".pdf")
+
+        HighContrastPDFStyles.COLORS = dict(HighContrastPDFStyles.COLORS, primary_dark=HexColor('#222222'))
+        HighContrastPDFStyles.THEME_VERSION = 2
+        rebuilt = get_report_templates("high-contrast")
+        assert rebuilt is not templates
+        assert rebuilt.styles["title"].textColor == HexColor('#222222')
+    finally:
+        pdf_generator._THEMES.pop("high-contrast", None)
+        for key in [key for key in pdf_generator._templates if key[0] == "high-contrast"]:
+            del pdf_generator._templates[key]
+
+if __name__ == "__main__":
+    test_lookup_by_name()
+    test_templates_are_built_once_and_read_only()
+    test_registering_a_theme()
+    print("✅ PDF theme tests passed")
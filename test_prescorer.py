@@ -0,0 +1,146 @@
+"""
+Test script for the local resume pre-scorer
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import analysis_pipeline
+from analysis_pipeline import PDF_ARTIFACT_PREFIX, PRESCORES_ARTIFACT, run_analysis_batch
+from prescorer import tokenize, score_resumes, select_top_candidates
+from session_store import CompactPDFData, get_blob_store
+
+JOB_DESCRIPTION = """
+We are hiring a Backend Engineer with Python, Django, PostgreSQL and Docker.
+Experience with AWS, CI/CD pipelines and C++ is a plus.
+"""
+
+def test_tokenize_keeps_tech_terms():
+    """Tech tokens survive tokenization and stopwords are dropped"""
+    terms = tokenize("Experience with C++, C#, Node.js and CI/CD for the team.")
+    assert "c++" in terms
+    assert "c#" in terms
+    assert "node.js" in terms
+    assert "ci/cd" in terms
+    assert "the" not in terms and "experience" not in terms
+
+def test_ranking_and_shortlist():
+    """Closer resumes rank higher and text-less resumes are unscored"""
+    resumes = {
+        "strong.pdf": "Backend engineer: Python, Django, PostgreSQL, Docker, AWS, CI/CD pipelines.",
+        "partial.pdf": "Python developer building Flask services on MySQL.",
+        "unrelated.pdf": "Graphic designer skilled in Photoshop and Illustrator.",
+        "scanned.pdf": "",
+    }
+    ranked = score_resumes(JOB_DESCRIPTION, resumes)
+
+    assert [item["name"] for item in ranked] == ["strong.pdf", "partial.pdf", "unrelated.pdf", "scanned.pdf"]
+    assert ranked[0]["score"] > ranked[1]["score"] > ranked[2]["score"]
+    assert "docker" in ranked[0]["matched_terms"]
+    assert ranked[-1]["score"] is None
+    assert select_top_candidates(ranked, 2) == ["strong.pdf", "partial.pdf"]
+
+def test_slash_joined_skills_match():
+    """"Python/Django"-style resumes match the individual JD terms and keep the compound term"""
+    terms = tokenize("Python/Django, AWS/GCP and PostgreSQL/Redis; Node.js and CI/CD")
+    assert {"python/django", "python", "django", "aws", "gcp", "postgresql", "redis"} <= set(terms)
+    assert {"node.js", "node", "js", "ci/cd", "ci", "cd"} <= set(terms)
+
+    resumes = {
+        "slashed.pdf": "Backend engineer: Python/Django, AWS/GCP, PostgreSQL/Redis, Docker/Kubernetes.",
+        "one_mention.pdf": "Graphic designer who once automated exports with Python.",
+    }
+    ranked = score_resumes("Python developer with AWS and PostgreSQL", resumes)
+    assert [item["name"] for item in ranked] == ["slashed.pdf", "one_mention.pdf"]
+    assert ranked[0]["score"] > ranked[1]["score"]
+    assert {"python", "aws", "postgresql"} <= set(ranked[0]["matched_terms"])
+
+def test_large_pool_is_fast():
+    """Scoring a 500-resume pool stays well within interactive latency"""
+    resumes = {f"resume_{i}.pdf": "Python Django developer with Docker and AWS. " * 40 for i in range(500)}
+    start = time.perf_counter()
+    ranked = score_resumes(JOB_DESCRIPTION, resumes)
+    assert len(ranked) == 500
+    assert time.perf_counter() - start < 2.0
+
+class _Context:
+    """Just enough of job_queue.JobContext to run the pipeline inline"""
+
+    def __init__(self):
+        self.job_id = "job"
+        self.artifacts = {}
+        self.results = []
+
+    def check_cancelled(self):
+        pass
+
+    def is_cancelled(self):
+        return False
+
+    def set_progress(self, progress, message=""):
+        pass
+
+    def add_result(self, item, action, response, error=None):
+        self.results.append((item, action, response, error))
+
+    def set_artifact(self, key, value):
+        self.artifacts[key] = value
+
+def test_pipeline_rasterizes_only_the_shortlist():
+    """The pool is ranked from text layers; only the top K are ingested and analyzed"""
+    texts = {
+        "strong.pdf": "Backend engineer: Python, Django, PostgreSQL, Docker, AWS, CI/CD pipelines.",
+        "partial.pdf": "Python developer building Flask services on MySQL.",
+        "unrelated.pdf": "Graphic designer skilled in Photoshop and Illustrator.",
+    }
+    ingested, analyzed = [], []
+
+    def fake_extract_texts(named_files):
+        for file_name, pdf_bytes in named_files:
+            yield file_name, pdf_bytes.decode()
+
+    def fake_ingest(named_files, extraction_mode=None):
+        for file_name, pdf_bytes in named_files:
+            ingested.append(file_name)
+            yield file_name, {"page_bytes": [], "content": [file_name], "text": ""}, None
+
+    def fake_dispatch(requests, input_text, on_result, **kwargs):
+        for file_name, action, content, prompt in requests:
+            analyzed.append(file_name)
+            on_result(file_name, action, "Match 80%", None)
+
+    saved = (analysis_pipeline.extract_texts, analysis_pipeline.ingest_pdfs, analysis_pipeline.dispatch_analyses)
+    analysis_pipeline.extract_texts = fake_extract_texts
+    analysis_pipeline.ingest_pdfs = fake_ingest
+    analysis_pipeline.dispatch_analyses = fake_dispatch
+    try:
+        ctx = _Context()
+        # An image-mode resume the session already has, without a text layer in its session data
+        known = {"scanned.pdf": {"content": ["image"], "text": "", "done_actions": [],
+                                 "pdf_bytes": b"Python Django PostgreSQL Docker AWS engineer"}}
+        named_files = [(name, text.encode()) for name, text in texts.items()]
+        run_analysis_batch(ctx, named_files, JOB_DESCRIPTION, "Recruiter", "Percentage Match ",
+                           prescore_top_k=2, known_resumes=known, artifact_owner="session")
+    finally:
+        analysis_pipeline.extract_texts, analysis_pipeline.ingest_pdfs, analysis_pipeline.dispatch_analyses = saved
+
+    ranked = ctx.artifacts[PRESCORES_ARTIFACT]
+    assert all(item["score"] is not None for item in ranked)
+    assert [item["name"] for item in ranked[:2]] == ["strong.pdf", "scanned.pdf"]
+    assert ingested == ["strong.pdf"]
+    assert sorted(analyzed) == ["scanned.pdf", "strong.pdf"]
+    assert sorted(key for key in ctx.artifacts if key.startswith(PDF_ARTIFACT_PREFIX)) == ["pdf:strong.pdf"]
+    # Artifacts are kept compact and charged to the submitting session's memory budget
+    assert isinstance(ctx.artifacts["pdf:strong.pdf"], CompactPDFData)
+    assert ctx.artifacts["pdf:strong.pdf"]["content"] == ["strong.pdf"]
+    assert get_blob_store().usage("session") > 0
+
+if __name__ == "__main__":
+    test_tokenize_keeps_tech_terms()
+    test_ranking_and_shortlist()
+    test_slash_joined_skills_match()
+    test_large_pool_is_fast()
+    test_pipeline_rasterizes_only_the_shortlist()
+    print("✅ Pre-scorer tests passed")
@@ -0,0 +1,91 @@
+"""
+Test script for the combined analysis prompt and response splitting
+"""
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import llm_integration
+import response_cache
+from llm_backends import LLMBackend, set_backend
+from llm_integration import get_combined_analysis
+from prompts import get_combined_prompt, get_prompts, split_combined_analysis
+from rate_limiter import MemoryBucketBackend, TokenBucket
+from response_cache import ResponseCache
+
+class ScriptedBackend(LLMBackend):
+    """Returns the scripted replies in order, counting the calls"""
+
+    name = "scripted"
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    def generate(self, parts, model_name, generation_config=None, timeout=None):
+        self.calls += 1
+        return self.replies.pop(0)
+
+def test_split_combined_analysis_normalizes_string_fields():
+    """A string where a list was expected becomes one bullet, not one bullet per letter"""
+    analysis = {
+        "match_percentage": 72,
+        "summary": "Solid backend engineer.",
+        "strengths": ["Python", "SQL"],
+        "gaps": "No cloud experience",
+        "missing_keywords": "",
+        "improvement_advice": None,
+        "cold_email": "Dear hiring manager",
+    }
+    for user_mode in ("Recruiter", "Student"):
+        responses = split_combined_analysis(analysis, user_mode)
+        assert list(responses) == list(get_prompts(user_mode))
+
+    recruiter = split_combined_analysis(analysis, "Recruiter")
+    assert "**Match Percentage: 72%**" in recruiter["Percentage Match "]
+    assert "- Python\n- SQL" in recruiter["Percentage Match "]
+    assert "- No cloud experience" in recruiter["Percentage Match "]
+    assert "\n- N\n" not in recruiter["Percentage Match "]
+
+    student = split_combined_analysis(analysis, "Student")
+    assert "### Missing Keywords and Skills\n- None identified" in student["Percentage Match Resume vs Job Descripition"]
+    assert student["How Can I Improve My Skills"] == "### Recommendations\n- None identified"
+
+def test_unparseable_combined_replies_are_not_cached():
+    """A malformed reply fails once and the next call asks the model again; fenced JSON is accepted"""
+    analysis = {"match_percentage": 80, "summary": "Strong match"}
+    backend = ScriptedBackend([
+        '{"match_percentage": 80, "summ',
+        "[1, 2]",
+        "```json\n" + json.dumps(analysis) + "\n```",
+        "not reached",
+    ])
+    previous_cache, previous_limiter = response_cache._default_cache, llm_integration._rate_limiter
+    with tempfile.TemporaryDirectory() as cache_dir:
+        response_cache._default_cache = ResponseCache(os.path.join(cache_dir, "responses.sqlite3"))
+        llm_integration._rate_limiter = TokenBucket(rate=1000, capacity=1000, backend=MemoryBucketBackend())
+        previous_backend = set_backend(backend)
+        try:
+            prompt = get_combined_prompt("Recruiter")
+            for expected_error in ("invalid JSON", "not an object"):
+                try:
+                    get_combined_analysis("Python developer", ["resume text"], prompt)
+                except ValueError as e:
+                    assert expected_error in str(e)
+                else:
+                    raise AssertionError("expected a ValueError")
+
+            assert get_combined_analysis("Python developer", ["resume text"], prompt) == analysis
+            assert get_combined_analysis("Python developer", ["resume text"], prompt) == analysis
+            assert backend.calls == 3  # The valid reply was cached, without its fence
+        finally:
+            set_backend(previous_backend)
+            response_cache._default_cache, llm_integration._rate_limiter = previous_cache, previous_limiter
+
+if __name__ == "__main__":
+    test_split_combined_analysis_normalizes_string_fields()
+    test_unparseable_combined_replies_are_not_cached()
+    print("✅ Prompt tests passed")
@@ -0,0 +1,75 @@
+"""
+Test script for the token-bucket rate limiter
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rate_limiter import TokenBucket, MemoryBucketBackend, SQLiteBucketBackend, window_bucket
+from llm_integration import RATE_LIMIT, RATE_LIMIT_BURST, RATE_WINDOW
+
+def test_burst_then_wait():
+    """A full bucket allows a burst, then callers wait instead of failing"""
+    bucket = TokenBucket(rate=20, capacity=3, backend=MemoryBucketBackend())
+    for _ in range(3):
+        assert bucket.try_acquire() == 0
+
+    start = time.monotonic()
+    assert bucket.acquire(timeout=1)
+    assert time.monotonic() - start >= 0.03
+
+def test_deadline():
+    """Acquisition gives up when the wait would exceed the deadline"""
+    bucket = TokenBucket(rate=0.1, capacity=1, backend=MemoryBucketBackend())
+    assert bucket.acquire(timeout=0)
+    assert not bucket.acquire(timeout=0.5)
+    assert not asyncio.run(bucket.acquire_async(timeout=0.5))
+
+def test_sqlite_backend_shared_and_thread_safe():
+    """Buckets with the same name share one budget through SQLite"""
+    with tempfile.TemporaryDirectory() as state_dir:
+        path = os.path.join(state_dir, "rate_limit.sqlite3")
+        first = TokenBucket(rate=0.01, capacity=5, name="shared", backend=SQLiteBucketBackend(path))
+        second = TokenBucket(rate=0.01, capacity=5, name="shared", backend=SQLiteBucketBackend(path))
+
+        granted = []
+        def worker(bucket):
+            granted.append(bucket.try_acquire() == 0)
+
+        threads = [threading.Thread(target=worker, args=(first if i % 2 else second,)) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert granted.count(True) == 5
+
+def test_no_window_exceeds_the_quota():
+    """Greedy callers never get more than RATE_LIMIT requests into any RATE_WINDOW"""
+    now = [1000.0]
+    bucket = window_bucket(RATE_LIMIT, RATE_WINDOW, RATE_LIMIT_BURST,
+                           backend=MemoryBucketBackend(clock=lambda: now[0]))
+    admitted = []
+    while now[0] < 1000.0 + 10 * RATE_WINDOW:
+        wait = bucket.try_acquire()
+        if wait > 0:
+            now[0] += wait
+        else:
+            admitted.append(now[0])
+
+    for i, start in enumerate(admitted):
+        in_window = [t for t in admitted[i:] if t < start + RATE_WINDOW]
+        assert len(in_window) <= RATE_LIMIT
+    assert len(admitted) >= 9 * (RATE_LIMIT - RATE_LIMIT_BURST)  # Still close to the quota
+
+if __name__ == "__main__":
+    test_burst_then_wait()
+    test_deadline()
+    test_sqlite_backend_shared_and_thread_safe()
+    test_no_window_exceeds_the_quota()
+    print("✅ Rate limiter tests passed")
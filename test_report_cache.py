@@ -0,0 +1,80 @@
+"""
+Test script for the rendered report cache
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import report_cache
+from report_cache import ReportCache, get_multi_analysis_pdf, get_pdf_response, make_report_key
+
+RESPONSE = "## Summary\n\nStrong **Python** background.\n\n- Django\n- Docker"
+
+def test_keys_cover_every_input():
+    """Any change to the kind or inputs of a report changes its key"""
+    key = make_report_key("single", ["professional", 1], "Title", RESPONSE, "ATS_Analysis")
+    assert key == make_report_key("single", ["professional", 1], "Title", RESPONSE, "ATS_Analysis")
+    assert key != make_report_key("multi", ["professional", 1], "Title", RESPONSE, "ATS_Analysis")
+    assert key != make_report_key("single", ["monochrome", 1], "Title", RESPONSE, "ATS_Analysis")
+    assert key != make_report_key("single", ["professional", 2], "Title", RESPONSE, "ATS_Analysis")
+    assert key != make_report_key("single", ["professional", 1], "Title", RESPONSE + ".", "ATS_Analysis")
+
+def test_lru_eviction_by_size():
+    """The least recently used reports are evicted once the size bound is passed"""
+    cache = ReportCache(max_bytes=250)
+    for key in ("a", "b", "c"):
+        cache.put(key, (b"x" * 100, f"{key}.pdf"))
+
+    # Only two reports fit, and "a" is the oldest
+    assert cache.get("a") is None
+    assert cache.get("b") is not None  # "b" becomes the most recently used
+    cache.put("d", (b"x" * 100, "d.pdf"))
+    assert cache.get("c") is None
+    assert cache.get("b") == (b"x" * 100, "b.pdf")
+
+    # Replacing an entry does not count it twice, and an oversized report is still kept
+    cache.put("d", (b"y" * 100, "d.pdf"))
+    assert cache.get("b") is not None and cache.get("d")[0] == b"y" * 100
+    cache.put("huge", (b"z" * 1000, "huge.pdf"))
+    assert cache.get("huge") is not None and cache.get("b") is None and cache.get("d") is None
+
+def test_repeated_reports_are_rendered_once():
+    """The cached helpers only render on a miss"""
+    previous = (report_cache._default_cache, report_cache.create_pdf_response, report_cache.create_multi_analysis_pdf)
+    renders = []
+
+    def render_single(title, response, filename_prefix, theme):
+        renders.append(("single", title, theme))
+        return b"%PDF-single", f"{filename_prefix}.pdf"
+
+    def render_multi(analyses, filename_prefix, theme):
+        renders.append(("multi", tuple(analyses), theme))
+        return b"%PDF-multi", f"{filename_prefix}.pdf"
+
+    report_cache._default_cache = ReportCache()
+    report_cache.create_pdf_response = render_single
+    report_cache.create_multi_analysis_pdf = render_multi
+    try:
+        first = get_pdf_response("Evaluation", RESPONSE)
+        assert get_pdf_response("Evaluation", RESPONSE) is first
+        get_pdf_response("Evaluation", RESPONSE, theme="monochrome")
+        get_pdf_response("Evaluation", RESPONSE + "\n\nMore.")
+
+        analyses = {"Evaluation": RESPONSE, "Skills": "- Python"}
+        assert get_multi_analysis_pdf(analyses) == get_multi_analysis_pdf(dict(analyses))
+    finally:
+        report_cache._default_cache, report_cache.create_pdf_response, report_cache.create_multi_analysis_pdf = previous
+
+    assert renders == [
+        ("single", "Evaluation", "professional"),
+        ("single", "Evaluation", "monochrome"),
+        ("single", "Evaluation", "professional"),
+        ("multi", ("Evaluation", "Skills"), "professional"),
+    ]
+
+if __name__ == "__main__":
+    test_keys_cover_every_input()
+    test_lru_eviction_by_size()
+    test_repeated_reports_are_rendered_once()
+    print("✅ Report cache tests passed")
@@ -0,0 +1,132 @@
+"""
+Test script for the batch report export
+"""
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import report_export
+from job_queue import JobManager, JobStore, COMPLETED, FINISHED_STATES
+from leaderboard_report import build_leaderboard_pdf, extract_match_percentage
+from report_export import export_reports, collect_leaderboard_candidates, EXPORT_ARTIFACT
+
+def _wait_for(manager, job_id, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in FINISHED_STATES:
+            return job
+        time.sleep(0.1)
+    raise AssertionError("export job did not finish")
+
+def test_export_reports_zip():
+    """Every candidate gets a uniquely named report entry in the archive"""
+    previous_dir = report_export.EXPORT_DIR
+    with tempfile.TemporaryDirectory() as work_dir:
+        report_export.EXPORT_DIR = os.path.join(work_dir, "exports")
+        try:
+            _check_export_zip(JobManager(store=JobStore(os.path.join(work_dir, "jobs.sqlite3"))))
+        finally:
+            report_export.EXPORT_DIR = previous_dir
+
+def _check_export_zip(manager):
+    candidates = {
+        f"candidate {i}.pdf": {"Evaluation": f"## Candidate {i}\n\n- Strong Python skills\n- Missing Docker"}
+        for i in range(4)
+    }
+    candidates["candidate-0.pdf"] = {"Evaluation": "Duplicate safe name"}
+
+    job_id = manager.submit("export", export_reports, candidates)
+    job = _wait_for(manager, job_id)
+
+    assert job["status"] == COMPLETED, job["error"]
+    assert job["progress"] == 1.0
+    assert len(job["results"]) == len(candidates)
+    zip_path = manager.get_artifacts(job_id)[EXPORT_ARTIFACT]
+    with zipfile.ZipFile(zip_path) as archive:
+        names = archive.namelist()
+        assert len(names) == len(candidates) == len(set(names))
+        assert "candidate_0_report.pdf" in names and "candidate_0_report_2.pdf" in names
+        assert all(archive.read(name).startswith(b"%PDF") for name in names)
+
+def test_leaderboard_pdf_for_large_pool():
+    """A large pool renders a ranked, paginated leaderboard straight to a file"""
+    from pypdf import PdfReader
+
+    prescores = [
+        {"name": f"resume_{i}.pdf", "score": float(i % 90), "missing_terms": ["docker", "aws", "kubernetes", "go"]}
+        for i in range(1500)
+    ]
+    analyzed = {"resume_7.pdf": {"Percentage Match ": "**Match Percentage: 91%**\n\n- Strong Python"}}
+    candidates = collect_leaderboard_candidates(analyzed, prescores)
+    assert len(candidates) == 1500
+    assert next(c for c in candidates if c["name"] == "resume_7.pdf")["match"] == 91
+    assert next(c for c in candidates if c["name"] == "resume_89.pdf")["match"] is None  # Prescore stays apart
+    assert next(c for c in candidates if c["name"] == "resume_89.pdf")["prescore"] == 89
+    assert extract_match_percentage({"Evaluation": "No percentage here"}) is None
+
+    seen = []
+    output = tempfile.TemporaryFile()
+    with output:
+        count = build_leaderboard_pdf(candidates, output, analyzed.get,
+                                      on_candidate=lambda position, candidate: seen.append(candidate["name"]))
+        output.seek(0)
+        reader = PdfReader(output)
+
+        assert count == 1500
+        assert seen[0] == "resume_7.pdf"  # AI-scored candidates rank before keyword-only ones
+        assert next(c for c in candidates if c["name"] == seen[1])["prescore"] == 89  # Then by keyword score
+        assert len(reader.pages) > 20
+        assert "resume_7.pdf" in reader.pages[0].extract_text()
+
+class _BrokenPool:
+    """Stands in for a pool whose worker died: every future fails with BrokenProcessPool"""
+
+    def __init__(self):
+        self.shutdowns = 0
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns += 1
+
+def test_broken_pool_is_replaced_once():
+    """The failed futures of one broken pool do not shut down its replacement"""
+    broken = _BrokenPool()
+    replacements = []
+
+    def make_pool(max_workers, mp_context):
+        replacements.append(ThreadPoolExecutor(max_workers=max_workers))
+        return replacements[-1]
+
+    previous = (report_export._pool, report_export.ProcessPoolExecutor, report_export.EXPORT_MAX_WORKERS)
+    report_export._pool, report_export.ProcessPoolExecutor, report_export.EXPORT_MAX_WORKERS = broken, make_pool, 2
+    try:
+        candidates = {f"candidate {i}.pdf": {"Evaluation": "- Python"} for i in range(6)}
+        results = list(report_export._render_reports(candidates, "professional", lambda: False))
+        current = report_export._pool
+    finally:
+        report_export._pool, report_export.ProcessPoolExecutor, report_export.EXPORT_MAX_WORKERS = previous
+        for pool in replacements:
+            pool.shutdown()
+
+    assert broken.shutdowns == 1
+    assert len(replacements) == 1 and current is replacements[0]
+    errors = {candidate: error for candidate, _, error in results if error}
+    assert len(results) == 6 and len(errors) == 4  # The four submitted to the broken pool
+    assert all("Worker process failed" in error for error in errors.values())
+
+if __name__ == "__main__":
+    test_export_reports_zip()
+    test_leaderboard_pdf_for_large_pool()
+    test_broken_pool_is_replaced_once()
+    print("✅ Report export tests passed")
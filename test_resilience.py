@@ -0,0 +1,122 @@
+"""
+Test script for the retry, deadline and circuit breaker layer
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from resilience import (
+    CircuitBreaker, CircuitOpenError, DeadlineExceededError, PermanentModelError, RateLimitedError,
+    RetryPolicy, TransientModelError, call_with_resilience, classify_error
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+class UpstreamError(Exception):
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+def _flaky(failures):
+    """Callable failing with the given exceptions before succeeding"""
+    calls = []
+    def call(timeout):
+        calls.append(timeout)
+        if len(calls) <= len(failures):
+            raise failures[len(calls) - 1]
+        return "ok"
+    return call, calls
+
+def test_classify_error():
+    """Upstream failures map to typed, user-facing errors"""
+    rate_limited = classify_error(UpstreamError("429 Quota exceeded. Please retry in 7.5s", 429))
+    assert isinstance(rate_limited, RateLimitedError) and rate_limited.retry_after == 7.5
+    assert isinstance(classify_error(UpstreamError("503 Unavailable", 503)), TransientModelError)
+    assert isinstance(classify_error(ConnectionError("reset")), TransientModelError)
+    assert isinstance(classify_error(UpstreamError("400 Bad request", 400)), PermanentModelError)
+    assert isinstance(classify_error(RuntimeError("429 Resource has been exhausted")), RateLimitedError)
+    assert isinstance(classify_error(RuntimeError("RESOURCE_EXHAUSTED")), RateLimitedError)
+    # Digits that merely contain 429 (request ids, byte counts) are not rate limiting
+    assert isinstance(classify_error(UpstreamError("Bad request 14290 bytes (id a4291)", 400)), PermanentModelError)
+    assert isinstance(classify_error(RuntimeError("payload of 4290 bytes rejected")), PermanentModelError)
+
+def test_transient_429_is_retried_with_retry_after():
+    """A single 429 is retried after the server's hint instead of failing"""
+    clock = FakeClock()
+    call, calls = _flaky([UpstreamError("429 retry in 5s", 429)])
+    result = call_with_resilience(call, breaker=CircuitBreaker(clock=clock), deadline=60,
+                                  sleep=clock.sleep, clock=clock)
+    assert result == "ok"
+    assert len(calls) == 2
+    assert 5.0 <= clock.now <= 6.0
+    assert calls[1] < 60  # The second attempt gets the remaining deadline
+
+def test_permanent_errors_and_deadline():
+    """Permanent errors are not retried; retries stop at the deadline"""
+    clock = FakeClock()
+    call, calls = _flaky([UpstreamError("400 bad", 400)])
+    try:
+        call_with_resilience(call, sleep=clock.sleep, clock=clock)
+        assert False, "expected PermanentModelError"
+    except PermanentModelError:
+        assert len(calls) == 1
+
+    call, calls = _flaky([UpstreamError("429 retry in 20s", 429)] * 3)
+    try:
+        call_with_resilience(call, deadline=30, sleep=clock.sleep, clock=clock)
+        assert False, "expected DeadlineExceededError"
+    except DeadlineExceededError:
+        assert len(calls) == 2
+
+def test_circuit_breaker_sheds_load_and_recovers():
+    """A dead upstream opens the circuit; a successful trial closes it"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+    dead, calls = _flaky([UpstreamError("503", 503)] * 100)
+    try:
+        call_with_resilience(dead, breaker=breaker, policy=RetryPolicy(max_attempts=5),
+                             sleep=clock.sleep, clock=clock)
+        assert False, "expected CircuitOpenError"
+    except CircuitOpenError:
+        assert len(calls) == 3
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Fails fast without calling the upstream
+    try:
+        call_with_resilience(dead, breaker=breaker, sleep=clock.sleep, clock=clock)
+        assert False, "expected CircuitOpenError"
+    except CircuitOpenError:
+        assert len(calls) == 3
+
+    clock.now += 31
+    healthy, _ = _flaky([])
+    assert call_with_resilience(healthy, breaker=breaker, sleep=clock.sleep, clock=clock) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_rate_limits_do_not_open_the_circuit():
+    """A burst of 429s is retried without tripping the breaker"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    for _ in range(3):
+        call, calls = _flaky([UpstreamError("429 retry in 1s", 429)] * 2)
+        assert call_with_resilience(call, breaker=breaker, policy=RetryPolicy(max_attempts=3),
+                                    sleep=clock.sleep, clock=clock) == "ok"
+        assert len(calls) == 3
+    assert breaker.state == CircuitBreaker.CLOSED
+
+if __name__ == "__main__":
+    test_classify_error()
+    test_transient_429_is_retried_with_retry_after()
+    test_permanent_errors_and_deadline()
+    test_circuit_breaker_sheds_load_and_recovers()
+    test_rate_limits_do_not_open_the_circuit()
+    print("✅ Resilience tests passed")
@@ -0,0 +1,194 @@
+"""
+Test script for the persistent LLM response cache
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import llm_integration
+import response_cache
+from llm_backends import MockBackend, MockConfig, set_backend
+from rate_limiter import MemoryBucketBackend, TokenBucket
+from resilience import DeadlineExceededError
+from response_cache import ResponseCache, make_response_key
+
+def test_key_normalization():
+    """Whitespace-only JD differences share a key; other inputs do not"""
+    content = [{"mime_type": "image/jpeg", "data": "abc"}]
+    key = make_response_key("Python  developer\n", content, "prompt", "gemini-2.0-flash")
+
+    assert key == make_response_key("Python developer", content, "prompt", "gemini-2.0-flash")
+    assert key != make_response_key("Java developer", content, "prompt", "gemini-2.0-flash")
+    assert key != make_response_key("Python developer", ["resume text"], "prompt", "gemini-2.0-flash")
+    assert key != make_response_key("Python developer", content, "other prompt", "gemini-2.0-flash")
+    assert key != make_response_key("Python developer", content, "prompt", "gemini-1.5-pro")
+
+def test_ttl_and_size_eviction():
+    """Expired entries miss and the table is trimmed to its size bound"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResponseCache(path=os.path.join(cache_dir, "responses.sqlite3"), ttl=60, max_entries=2)
+        cache.put("k1", "first", "model")
+        assert cache.get("k1") == "first"
+
+        cache.ttl = 0
+        time.sleep(0.01)
+        assert cache.get("k1") is None
+        cache.ttl = 60
+
+        for i in range(4):
+            cache.put(f"k{i}", f"response {i}", "model")
+            time.sleep(0.01)
+        cache.get("k0")  # Most recently used now
+        cache.evict()
+
+        assert cache.get("k0") == "response 0"
+        assert cache.get("k3") == "response 3"
+        assert cache.get("k1") is None
+        assert cache.get("k2") is None
+
+def test_concurrent_identical_requests_are_coalesced():
+    """Identical requests in flight share one computation, within and across processes"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, "responses.sqlite3")
+        cache = ResponseCache(path=path)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "shared response"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute, "model")))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == ["shared response"] * 8
+        assert len(calls) == 1 and cache.flights.stats["coalesced"] >= 1
+
+        # Errors of the computing thread are shared with its waiters
+        def fail():
+            time.sleep(0.2)
+            raise RuntimeError("upstream down")
+
+        errors = []
+        def failing_call():
+            try:
+                cache.get_or_compute("broken", fail, "model")
+            except RuntimeError as e:
+                errors.append(e)
+        threads = [threading.Thread(target=failing_call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert [str(e) for e in errors] == ["upstream down"] * 3
+        assert len({id(e) for e in errors}) == 3  # Each waiter raises its own copy
+
+        # After a retryable failure the waiters retry instead of failing with the leader
+        class Transient(Exception):
+            retryable = True
+
+        attempts = []
+        def flaky():
+            attempts.append(1)
+            time.sleep(0.2)
+            if len(attempts) == 1:
+                raise Transient("timeout")
+            return "recovered"
+
+        outcomes = []
+        def flaky_call():
+            try:
+                outcomes.append(cache.get_or_compute("flaky", flaky, "model"))
+            except Transient:
+                outcomes.append("failed")
+        threads = [threading.Thread(target=flaky_call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        for thread in threads:
+            thread.join()
+        assert sorted(outcomes) == ["failed", "recovered", "recovered"]
+        assert len(attempts) == 2  # The waiters' retry is itself coalesced
+
+        # Another process holding the claim: wait for its answer instead of computing
+        other_process = ResponseCache(path=path)
+        assert other_process._try_claim("k2", "other")
+        def finish_elsewhere():
+            time.sleep(0.3)
+            other_process.put("k2", "from the other process", "model")
+            other_process._release_claim("k2", "other")
+        threading.Thread(target=finish_elsewhere).start()
+        assert cache.get_or_compute("k2", lambda: "computed twice", "model") == "from the other process"
+
+def test_claims_are_refreshed_and_waits_are_bounded():
+    """A live claim outlasts its TTL; a dead one expires, and waits stop at the caller's deadline"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, "responses.sqlite3")
+        cache = ResponseCache(path=path, claim_ttl=0.3)
+        other_process = ResponseCache(path=path, claim_ttl=0.3)
+
+        # The computing process keeps its claim while the computation runs past the TTL
+        def slow():
+            time.sleep(0.8)
+            assert not other_process._try_claim("slow", "other")
+            return "computed"
+        assert cache.get_or_compute("slow", slow, "model") == "computed"
+
+        # A claim left behind by a dead process is taken over once it expires
+        assert other_process._try_claim("orphaned", "dead")
+        start = time.monotonic()
+        assert cache.get_or_compute("orphaned", lambda: "recovered", "model") == "recovered"
+        assert 0.2 < time.monotonic() - start < 1.5
+
+        # A live claim is waited on only for as long as the caller's deadline allows
+        other_process.claim_ttl = 60
+        assert other_process._try_claim("held", "busy")
+        start = time.monotonic()
+        assert cache.get_or_compute("held", lambda: "computed anyway", "model", wait_timeout=0.3) == "computed anyway"
+        assert time.monotonic() - start < 1.5
+
+def test_model_requests_wait_on_claims_within_their_deadline():
+    """A request stuck behind another process's claim fails at its deadline instead of the claim's"""
+    previous = (response_cache._default_cache, llm_integration._rate_limiter, llm_integration.MODEL_DEADLINE)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, "responses.sqlite3")
+        response_cache._default_cache = ResponseCache(path=path)
+        llm_integration._rate_limiter = TokenBucket(rate=1000, capacity=1000, backend=MemoryBucketBackend())
+        llm_integration.MODEL_DEADLINE = 0.5
+        previous_backend = set_backend(MockBackend(MockConfig(latency_median_ms=1, latency_p99_ms=2)))
+        try:
+            key = make_response_key("Python", ["resume"], "prompt", llm_integration._cache_model(None))
+            other_process = ResponseCache(path=path, claim_ttl=60)
+            assert other_process._try_claim(key, "busy")
+
+            for call in (lambda: llm_integration.get_gemini_response("Python", ["resume"], "prompt"),
+                         lambda: "".join(llm_integration.stream_gemini_response("Python", ["resume"], "prompt"))):
+                start = time.monotonic()
+                try:
+                    call()
+                except DeadlineExceededError:
+                    pass
+                else:
+                    raise AssertionError("expected the deadline to be exceeded")
+                assert time.monotonic() - start < 2
+        finally:
+            set_backend(previous_backend)
+            response_cache._default_cache, llm_integration._rate_limiter, llm_integration.MODEL_DEADLINE = previous
+
+if __name__ == "__main__":
+    test_key_normalization()
+    test_ttl_and_size_eviction()
+    test_concurrent_identical_requests_are_coalesced()
+    test_claims_are_refreshed_and_waits_are_bounded()
+    test_model_requests_wait_on_claims_within_their_deadline()
+    print("✅ Response cache tests passed")
@@ -0,0 +1,65 @@
+"""
+Test script for the compact, memory-bounded session store
+"""
+import gc
+import io
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from session_store import BlobStore, CompactPDFData
+
+def _jpeg(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+def test_blob_store_spills_over_budget_and_reloads():
+    """Blobs beyond a session's or the global budget go to disk and come back on access"""
+    with tempfile.TemporaryDirectory() as spill_dir:
+        _check_spill(BlobStore(session_budget=250, global_budget=400, spill_dir=spill_dir))
+
+def _check_spill(store):
+    first = store.put("a", b"1" * 100)
+    second = store.put("a", b"2" * 100)
+    third = store.put("a", b"3" * 100)
+    assert store.usage("a") == 200 and store.stats["spilled"] == 1  # The least recently used one
+
+    assert store.get(first) == b"1" * 100  # Read back from disk and promoted
+    assert store.stats["loaded"] == 1 and store.usage("a") == 200
+    assert store.get(third) == b"3" * 100
+
+    other = [store.put("b", bytes([i]) * 100) for i in range(2)]
+    assert store.usage() <= 400 and store.usage("b") == 200
+
+    store.delete([first, second, third, *other])
+    assert store.usage() == 0 and not os.listdir(store._spill_dir)
+
+def test_compact_pdf_data_is_lazy_and_frees_its_blobs():
+    """Session data keeps encoded pages, decodes on access and releases memory when dropped"""
+    store = BlobStore()
+    pages = [_jpeg("red"), _jpeg("blue")]
+    prepared = {"page_bytes": pages, "content": ["Resume text", {"mime_type": "image/jpeg", "data": "abc"}],
+                "content_hash": "hash", "page_count": 2, "text": "Resume text"}
+    pdf_data = CompactPDFData(prepared, owner="session", store=store)
+
+    assert pdf_data["content_hash"] == "hash" and pdf_data.get("missing") is None
+    assert pdf_data["content"] == prepared["content"]
+    assert pdf_data.page_bytes(1) == pages[1]
+    assert len(pdf_data["images"]) == 2
+    assert pdf_data["images"][-1].getpixel((32, 32))[2] > 200
+    assert pdf_data["first_page"].size == (64, 64)
+    assert store.usage("session") > 0
+
+    del pdf_data
+    gc.collect()
+    assert store.usage("session") == 0
+
+if __name__ == "__main__":
+    test_blob_store_spills_over_budget_and_reloads()
+    test_compact_pdf_data_is_lazy_and_frees_its_blobs()
+    print("✅ Session store tests passed")
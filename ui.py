@@ -55,7 +55,7 @@ def create_streamlit_ui():
     # Resume upload with validation
     st.markdown("### 📄 Upload Resumes")
     uploaded_files = st.file_uploader(
-        "Choose PDF files (up to 10 files, max 10MB each):",
+        "Choose PDF files (up to 10 files, or 500 with pre-scoring; max 10MB each):",
         type=["pdf"],
         accept_multiple_files=True,
         help="Upload your resume files in PDF format for analysis"
@@ -81,6 +81,7 @@ def create_streamlit_ui():
         - **Resume Format**: Use standard PDF format with clear text (avoid image-only PDFs)
         - **File Size**: Keep files under 10MB for faster processing
         - **Multiple Resumes**: Upload different versions to compare results
+        - **Large Pools**: Enable local pre-scoring to rank hundreds of resumes and send only the top candidates to the AI
         - **Rate Limits**: Free tier allows 15 requests per minute
         """)
 